@@ -0,0 +1,262 @@
+"""
+End-to-end benchmark harness for the training projects, run against the
+offline mock OpenAI server.
+
+Drives each app through its real code path with OPENAI_BASE_URL pointed at
+`mock_openai_server.py` and reports throughput, p50/p95/p99 latency and
+tokens per request. Scenarios whose dependencies are not installed are skipped.
+
+Usage:
+    python common/benchmarks/e2e_benchmark.py --requests 50 --concurrency 4 --latency-ms 200 --jitter-ms 50
+    python common/benchmarks/e2e_benchmark.py --scenarios legal_agent resume_backend --out results.json
+"""
+import argparse
+import importlib.util
+import io
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from typing import Any, Callable, Dict, List, Optional
+
+from mock_openai_server import MockConfig, MockOpenAIServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SPRINT_1 = os.path.join(REPO_ROOT, "sprints", "sprint-1-llm-foundations")
+SPRINT_2 = os.path.join(REPO_ROOT, "sprints", "sprint-2-agents")
+
+SAMPLE_RESUME = ("Tumelo\nSoftware Engineer\n5+ years experience in Python development, "
+                 "REST APIs and data pipelines. Led a team of 4 engineers.")
+SAMPLE_RECIPE = ("Tomato pasta. Boil 200 g spaghetti for 10 minutes. Simmer 4 chopped tomatoes "
+                 "with garlic and olive oil, then toss with the pasta and basil.")
+
+class SkipScenario(Exception):
+    """Raised when a scenario's app or its dependencies are unavailable."""
+
+def _load_module(name: str, path: str):
+    """Import a single-file app under a unique module name."""
+    if not os.path.exists(path):
+        raise SkipScenario(f"{path} not found")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except ImportError as e:
+        raise SkipScenario(f"missing dependency: {e.name or e}")
+    return module
+
+# -------------------------
+# Scenarios
+# -------------------------
+# Each scenario prepares its app and returns a function performing one request.
+
+def scenario_legal_agent(args) -> Callable[[], None]:
+    """Multi-Tool Agent: one full `run_agent` contract review (tool calls + final answer)."""
+    project = os.path.join(SPRINT_2, "week-4", "Multi-Tool Agent")
+    sys.path.insert(0, project)
+    try:
+        from core import agent
+        from core.events import CollectingEventSink, use_sink
+        from tools.cache import ToolResultCache
+    except ImportError as e:
+        raise SkipScenario(f"missing dependency: {e.name or e}")
+
+    # An in-memory cache, emptied before every request, so each review does its
+    # tool work instead of hitting results left by earlier requests (or on disk)
+    cache = ToolResultCache(max_entries=agent.tool_cache.max_entries)
+    agent.tool_cache = cache
+
+    contract = os.path.join(project, "docs", "contracts", "sample_service_agreement.txt")
+    with open(contract, "r", encoding="utf-8") as f, use_sink(CollectingEventSink()):
+        prompt = agent.contract_analysis_prompt(os.path.basename(contract), f.read())
+
+    def once():
+        cache.clear()
+        # The event sink is context-local, unlike sys.stdout, so this is safe on worker threads
+        with use_sink(CollectingEventSink()):
+            messages, _ = agent.run_agent(prompt)
+        if not any(m.get("role") == "assistant" and m.get("content") for m in messages):
+            raise RuntimeError("agent returned no final answer")
+    return once
+
+def scenario_resume_backend(args) -> Callable[[], None]:
+    """Mini GenAI App backend: POST /resume-feedback through the FastAPI app."""
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError as e:
+        raise SkipScenario(f"missing dependency: {e.name or e}")
+    backend = _load_module(
+        "resume_backend_main", os.path.join(SPRINT_1, "week-2", "Project", "Mini GenAI App", "backend", "main.py")
+    )
+    logging.getLogger().setLevel(logging.WARNING)  # the backend configures INFO logging on import
+    client = TestClient(backend.app)
+
+    def once():
+        response = client.post("/resume-feedback", json={"resume_text": SAMPLE_RESUME, "role": "Data Scientist"})
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+    return once
+
+def scenario_financial_bot(args) -> Callable[[], None]:
+    """Mini-RAG PoC: `FinancialPlanningBot.answer_question` (hybrid retrieval + two LLM calls)."""
+    if not args.rag_pdf:
+        raise SkipScenario("pass --rag-pdf to benchmark the RAG bot")
+    rag = _load_module("mini_rag", os.path.join(SPRINT_1, "week-3", "Project", "Mini-RAG PoC", "app", "mini_rag.py"))
+    with redirect_stdout(io.StringIO()):
+        bot = rag.FinancialPlanningBot(pdf_path=os.path.abspath(args.rag_pdf))
+
+    def once():
+        with redirect_stdout(io.StringIO()):
+            bot.answer_question("How much should I keep in an emergency fund?")
+    return once
+
+def scenario_recipe_creator(args) -> Callable[[], None]:
+    """Tool-Using-Agent: `VisualRecipeCreator.parse_recipe` followed by one image generation."""
+    recipe_app = _load_module("visual_recipe_creator", os.path.join(SPRINT_2, "week-4", "Tool-Using-Agent", "app.py"))
+    creator = recipe_app.VisualRecipeCreator()
+
+    def once():
+        recipe = creator.parse_recipe(SAMPLE_RECIPE)
+        if not recipe:
+            raise RuntimeError("recipe could not be parsed")
+        if not creator.generate_image(recipe["title"]):
+            raise RuntimeError("image generation failed")
+    return once
+
+SCENARIOS: Dict[str, Callable[[Any], Callable[[], None]]] = {
+    "legal_agent": scenario_legal_agent,
+    "resume_backend": scenario_resume_backend,
+    "financial_bot": scenario_financial_bot,
+    "recipe_creator": scenario_recipe_creator
+}
+
+# -------------------------
+# Runner
+# -------------------------
+
+WARMUP_ATTEMPTS = 3
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def run_scenario(once: Callable[[], None], requests: int, concurrency: int,
+                 server: MockOpenAIServer) -> Dict[str, Any]:
+    """Run `once` `requests` times on `concurrency` threads and collect latency and token stats."""
+    # Warm-up: imports, clients and caches. With --error-rate it may fail, so retry a few times
+    warmup_error = None
+    for _ in range(WARMUP_ATTEMPTS):
+        try:
+            once()
+            warmup_error = None
+            break
+        except Exception as e:
+            warmup_error = f"{type(e).__name__}: {e}"
+    before = server.state.stats()
+
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    def timed():
+        started = time.perf_counter()
+        try:
+            once()
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+            return
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(requests):
+            pool.submit(timed)
+    elapsed = time.perf_counter() - started
+
+    after = server.state.stats()
+    delta = {k: after[k] - before[k] for k in after}
+    ordered = sorted(latencies)
+    return {
+        "requests": requests,
+        "succeeded": len(latencies),
+        "errors": len(errors),
+        "sample_error": errors[0] if errors else None,
+        "warmup_error": warmup_error,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": statistics.fmean(ordered) if ordered else 0.0,
+            "p50": _percentile(ordered, 50),
+            "p95": _percentile(ordered, 95),
+            "p99": _percentile(ordered, 99)
+        },
+        "api_calls_per_request": delta["requests"] / requests,
+        "rate_limited": delta["rate_limited"],
+        "tokens_per_request": {
+            "prompt": delta["prompt_tokens"] / requests,
+            "completion": delta["completion_tokens"] / requests,
+            "cached": delta["cached_tokens"] / requests
+        }
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmarks against the mock OpenAI server")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=20, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--ms-per-token", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tool-rounds", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rag-pdf", help="PDF for the financial_bot scenario")
+    parser.add_argument("--out", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, ms_per_output_token=args.ms_per_token,
+        error_rate=args.error_rate, tool_rounds=args.tool_rounds, seed=args.seed
+    )
+    results: Dict[str, Any] = {"config": vars(args), "scenarios": {}}
+    with MockOpenAIServer(config) as server:
+        # Every OpenAI client (openai, llama-index) reads these at construction time
+        os.environ.update({
+            "OPENAI_BASE_URL": server.base_url,
+            "OPENAI_API_BASE": server.base_url,
+            "OPENAI_API_KEY": "mock"
+        })
+        print(f"🧪 Mock OpenAI API on {server.base_url}\n")
+        print(f"{'scenario':<16} {'ok/n':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+              f"{'calls':>6} {'tok/req':>9}")
+
+        for name in args.scenarios:
+            try:
+                once = SCENARIOS[name](args)
+                stats = run_scenario(once, args.requests, args.concurrency, server)
+            except SkipScenario as e:
+                print(f"{name:<16} skipped: {e}")
+                results["scenarios"][name] = {"skipped": str(e)}
+                continue
+            results["scenarios"][name] = stats
+            tokens = stats["tokens_per_request"]
+            print(f"{name:<16} {stats['succeeded']:>3}/{stats['requests']:<3} {stats['throughput_rps']:>8.2f} "
+                  f"{stats['latency_ms']['p50']:>9.1f} {stats['latency_ms']['p95']:>9.1f} "
+                  f"{stats['latency_ms']['p99']:>9.1f} {stats['api_calls_per_request']:>6.1f} "
+                  f"{tokens['prompt'] + tokens['completion']:>9.0f}")
+            if stats["warmup_error"]:
+                print(f"{'':<16} warm-up failed: {stats['warmup_error']}")
+            if stats["sample_error"]:
+                print(f"{'':<16} first error: {stats['sample_error']}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results written to {args.out}")
+
+if __name__ == "__main__":
+    main()
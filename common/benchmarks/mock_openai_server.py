@@ -0,0 +1,484 @@
+"""
+Offline OpenAI-compatible stand-in server for benchmarks and demos.
+
+Serves chat completions (including tool calls and streaming), embeddings and
+image generation with scripted responses, configurable latency and jitter,
+and injected 429 rate-limit errors. Standard library only.
+
+Usage:
+    python mock_openai_server.py --port 8808 --latency-ms 300 --jitter-ms 100 --error-rate 0.05
+    export OPENAI_BASE_URL=http://127.0.0.1:8808/v1 OPENAI_API_KEY=mock
+"""
+import argparse
+import base64
+import hashlib
+import json
+import random
+import struct
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+def _tiny_png() -> str:
+    """Build a 1x1 transparent PNG, returned for b64_json image requests."""
+    def png_chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    header = struct.pack(">IIBBBBB", 1, 1, 8, 6, 0, 0, 0)
+    png = (b"\x89PNG\r\n\x1a\n" + png_chunk(b"IHDR", header)
+           + png_chunk(b"IDAT", zlib.compress(b"\x00\x00\x00\x00\x00")) + png_chunk(b"IEND", b""))
+    return base64.b64encode(png).decode("ascii")
+
+_TINY_PNG = _tiny_png()
+
+# Scripted replies, matched in order against the request's messages.
+# `match` is a case-insensitive substring; `content` is returned as the
+# assistant message, or `json` is serialized into it.
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {
+        "match": "overall_score",
+        "json": {
+            "overall_score": 7,
+            "strengths": [{"category": "Technical Skills", "description": "Relevant, well-evidenced skills.",
+                           "examples_from_resume": ["Python development"]}],
+            "improvements": [{"category": "Summary", "description": "Summary is generic.",
+                              "potential_impact": "A targeted summary earns more recruiter attention."}],
+            "edit_suggestions": [{"section": "Summary", "original_text": None,
+                                  "suggested_text": "Results-driven engineer with 5+ years of Python.",
+                                  "reason": "Adds specificity."}],
+            "keyword_analysis": {"present": ["Python"], "missing": [], "suggestions": []}
+        }
+    },
+    {
+        "match": "areas_for_improvement",
+        "json": {
+            "strengths": ["Clear structure", "Quantified achievements", "Relevant experience"],
+            "areas_for_improvement": ["Generic summary", "Unordered skills", "Thin education section"],
+            "suggested_edits": ["Lead with impact", "Group skills by area", "Add relevant coursework"]
+        }
+    },
+    {
+        "match": "parse this recipe",
+        "json": {
+            "title": "Mock Tomato Pasta", "description": "A quick weeknight pasta.",
+            "prep_time": "10 minutes", "cook_time": "15 minutes", "servings": "2 servings",
+            "difficulty": "Easy",
+            "ingredients": [{"name": "spaghetti", "amount": "200", "unit": "g"},
+                            {"name": "tomatoes", "amount": "4", "unit": "whole"}],
+            "steps": [{"step_number": 1, "instruction": "Boil the pasta.", "time": "10 minutes", "temperature": ""},
+                      {"step_number": 2, "instruction": "Simmer the tomatoes and toss.", "time": "5 minutes",
+                       "temperature": ""}],
+            "tips": ["Salt the water well."], "tags": ["italian", "vegetarian"]
+        }
+    }
+]
+
+DEFAULT_ANSWER = ("Based on the provided material, here is a concise answer. "
+                  "The key points are summarized above, with the relevant sections cited [Page 1].")
+
+@dataclass
+class MockConfig:
+    """Behaviour of the mock server."""
+    latency_ms: float = 0.0          # fixed delay per request
+    jitter_ms: float = 0.0           # extra uniform random delay in [0, jitter_ms]
+    ms_per_output_token: float = 0.0  # generation speed for chat completions
+    error_rate: float = 0.0          # probability of answering 429
+    tool_rounds: int = 1             # tool-calling turns before a final answer
+    tool_calls_per_round: int = 2
+    embedding_dimensions: int = 1536
+    seed: Optional[int] = None
+    rules: List[Dict[str, Any]] = field(default_factory=lambda: list(DEFAULT_RULES))
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4) if text else 0
+
+class MockState:
+    """Counters shared by all handler threads."""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.rate_limited = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self._last_prompt: Dict[str, str] = {}
+
+    def record(self, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0):
+        with self.lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cached_tokens += cached_tokens
+
+    def cached_prefix_tokens(self, model: str, prompt: str) -> int:
+        """Simulate provider prefix caching: shared prefix with the previous prompt, in 128-token steps from 1024."""
+        with self.lock:
+            previous = self._last_prompt.get(model, "")
+            self._last_prompt[model] = prompt
+        common = 0
+        for a, b in zip(previous, prompt):
+            if a != b:
+                break
+            common += 1
+        tokens = estimate_tokens(prompt[:common])
+        return tokens // 128 * 128 if tokens >= 1024 else 0
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "rate_limited": self.rate_limited,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "cached_tokens": self.cached_tokens
+            }
+
+def _message_text(message: Dict[str, Any]) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):  # multi-part content
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+def _fill_arguments(schema: Dict[str, Any], user_text: str) -> Dict[str, Any]:
+    """Make plausible arguments for a tool from its JSON schema."""
+    args = {}
+    properties = schema.get("properties", {})
+    for name in schema.get("required", list(properties)):
+        kind = properties.get(name, {}).get("type", "string")
+        if kind == "integer":
+            args[name] = 1
+        elif kind == "number":
+            args[name] = 1.0
+        elif kind == "boolean":
+            args[name] = True
+        elif kind == "array":
+            args[name] = []
+        elif kind == "object":
+            args[name] = {}
+        elif name == "query":
+            args[name] = (user_text.split() or ["contract"])[-1].strip("'\".?")
+        else:
+            args[name] = user_text[:400]
+    return args
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    """Request handler implementing the subset of the OpenAI REST API used by the apps."""
+    server_version = "MockOpenAI/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def state(self) -> MockState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output clean
+
+    # -- plumbing --------------------------------------------------------
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _delay(self, output_tokens: int = 0):
+        config = self.state.config
+        with self.state.lock:
+            jitter = self.state.random.uniform(0, config.jitter_ms) if config.jitter_ms else 0.0
+        delay_ms = config.latency_ms + jitter + output_tokens * config.ms_per_output_token
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+    def _rate_limited(self) -> bool:
+        with self.state.lock:
+            self.state.requests += 1
+            limited = self.state.random.random() < self.state.config.error_rate
+            if limited:
+                self.state.rate_limited += 1
+        if limited:
+            self._send_json(429, {"error": {
+                "message": "Rate limit reached (injected by mock server).",
+                "type": "requests", "param": None, "code": "rate_limit_exceeded"
+            }}, headers={"retry-after-ms": "50", "retry-after": "0"})
+        return limited
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            models = ["gpt-4o", "gpt-4o-mini", "gpt-4", "gpt-3.5-turbo", "text-embedding-ada-002", "dall-e-3"]
+            self._send_json(200, {"object": "list", "data": [
+                {"id": m, "object": "model", "created": 0, "owned_by": "mock"} for m in models
+            ]})
+        elif self.path.rstrip("/").endswith("/stats"):
+            self._send_json(200, self.state.stats())
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+
+        if self._rate_limited():
+            return
+        path = self.path.split("?")[0].rstrip("/")
+        if path.endswith("/chat/completions"):
+            self._chat_completions(body)
+        elif path.endswith("/completions"):
+            self._legacy_completions(body)
+        elif path.endswith("/embeddings"):
+            self._embeddings(body)
+        elif path.endswith("/images/generations"):
+            self._images(body)
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+    # -- endpoints -------------------------------------------------------
+
+    def _plan_reply(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Decide between scripted content and tool calls for a chat request."""
+        messages = body.get("messages", [])
+        config = self.state.config
+        last_user = next((m for m in reversed(messages) if m.get("role") == "user"), {})
+        user_text = _message_text(last_user)
+
+        tools = body.get("tools") or []
+        if tools and body.get("tool_choice") != "none":
+            # Count assistant tool-call turns since the last user message
+            rounds = 0
+            for m in reversed(messages):
+                if m.get("role") == "user":
+                    break
+                if m.get("role") == "assistant" and m.get("tool_calls"):
+                    rounds += 1
+            if rounds < config.tool_rounds:
+                calls = []
+                for i in range(config.tool_calls_per_round):
+                    fn = tools[(rounds * config.tool_calls_per_round + i) % len(tools)]["function"]
+                    calls.append({
+                        "id": f"call_{uuid.uuid4().hex[:24]}",
+                        "type": "function",
+                        "function": {
+                            "name": fn["name"],
+                            "arguments": json.dumps(_fill_arguments(fn.get("parameters", {}), user_text))
+                        }
+                    })
+                return {"content": None, "tool_calls": calls}
+
+        haystack = "\n".join(_message_text(m) for m in messages).lower()
+        for rule in config.rules:
+            if rule["match"].lower() in haystack:
+                content = rule.get("content")
+                if content is None:
+                    content = json.dumps(rule.get("json", {}))
+                return {"content": content, "tool_calls": None}
+        return {"content": DEFAULT_ANSWER, "tool_calls": None}
+
+    def _chat_completions(self, body: Dict[str, Any]):
+        model = body.get("model", "gpt-4o")
+        # Providers cache the prompt prefix as sent: tool definitions first, then the messages in order
+        prompt = json.dumps(body.get("tools") or []) + json.dumps(body.get("messages", []))
+        prompt_tokens = estimate_tokens(prompt)
+        cached_tokens = self.state.cached_prefix_tokens(model, prompt)
+        reply = self._plan_reply(body)
+        completion_tokens = estimate_tokens(reply["content"] or json.dumps(reply["tool_calls"]))
+        self.state.record(prompt_tokens, completion_tokens, cached_tokens)
+
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens}
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        finish_reason = "tool_calls" if reply["tool_calls"] else "stop"
+
+        if body.get("stream"):
+            self._stream_chat(body, model, completion_id, reply, finish_reason, usage)
+            return
+
+        self._delay(completion_tokens)
+        message = {"role": "assistant", "content": reply["content"]}
+        if reply["tool_calls"]:
+            message["tool_calls"] = reply["tool_calls"]
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+            "usage": usage
+        })
+
+    def _stream_chat(self, body, model, completion_id, reply, finish_reason, usage):
+        """Send the reply as server-sent events, pacing chunks by the configured token speed."""
+        self._delay()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def chunk(delta, finish=None, usage_block=None):
+            payload = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model,
+                "choices": [] if usage_block else [{"index": 0, "delta": delta, "finish_reason": finish}]
+            }
+            if usage_block:
+                payload["usage"] = usage_block
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        config = self.state.config
+        chunk({"role": "assistant", "content": ""})
+        if reply["tool_calls"]:
+            for index, call in enumerate(reply["tool_calls"]):
+                chunk({"tool_calls": [{"index": index, "id": call["id"], "type": "function",
+                                       "function": {"name": call["function"]["name"], "arguments": ""}}]})
+                chunk({"tool_calls": [{"index": index,
+                                       "function": {"arguments": call["function"]["arguments"]}}]})
+        else:
+            words = reply["content"].split(" ")
+            for i, word in enumerate(words):
+                if config.ms_per_output_token:
+                    time.sleep(config.ms_per_output_token * estimate_tokens(word + " ") / 1000)
+                chunk({"content": word + (" " if i < len(words) - 1 else "")})
+        chunk({}, finish=finish_reason)
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunk(None, usage_block=usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _legacy_completions(self, body: Dict[str, Any]):
+        prompt = body.get("prompt", "")
+        prompt = prompt if isinstance(prompt, str) else " ".join(prompt)
+        prompt_tokens, completion_tokens = estimate_tokens(prompt), estimate_tokens(DEFAULT_ANSWER)
+        self.state.record(prompt_tokens, completion_tokens)
+        self._delay(completion_tokens)
+        self._send_json(200, {
+            "id": f"cmpl-{uuid.uuid4().hex[:24]}", "object": "text_completion", "created": int(time.time()),
+            "model": body.get("model", "gpt-3.5-turbo-instruct"),
+            "choices": [{"index": 0, "text": DEFAULT_ANSWER, "finish_reason": "stop", "logprobs": None}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens}
+        })
+
+    def _embeddings(self, body: Dict[str, Any]):
+        inputs = body.get("input", "")
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        dimensions = body.get("dimensions") or self.state.config.embedding_dimensions
+        as_base64 = body.get("encoding_format") == "base64"
+
+        data = []
+        prompt_tokens = 0
+        for index, item in enumerate(inputs):
+            text = item if isinstance(item, str) else json.dumps(item)
+            prompt_tokens += estimate_tokens(text)
+            # Deterministic pseudo-embedding: identical inputs give identical vectors
+            rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+            vector = [rng.uniform(-1, 1) for _ in range(dimensions)]
+            norm = sum(v * v for v in vector) ** 0.5 or 1.0
+            vector = [v / norm for v in vector]
+            embedding = (base64.b64encode(struct.pack(f"<{dimensions}f", *vector)).decode("ascii")
+                         if as_base64 else vector)
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+
+        self.state.record(prompt_tokens, 0)
+        self._delay()
+        self._send_json(200, {
+            "object": "list", "data": data, "model": body.get("model", "text-embedding-ada-002"),
+            "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens}
+        })
+
+    def _images(self, body: Dict[str, Any]):
+        n = int(body.get("n") or 1)
+        digest = hashlib.sha256(body.get("prompt", "").encode("utf-8")).hexdigest()[:16]
+        host = self.headers.get("Host", "127.0.0.1")
+        if body.get("response_format") == "b64_json":
+            images = [{"b64_json": _TINY_PNG, "revised_prompt": body.get("prompt", "")} for _ in range(n)]
+        else:
+            images = [{"url": f"http://{host}/images/{digest}-{i}.png", "revised_prompt": body.get("prompt", "")}
+                      for i in range(n)]
+        self._delay()
+        self._send_json(200, {"created": int(time.time()), "data": images})
+
+class MockOpenAIServer:
+    """Run the mock API in a background thread, e.g. from a benchmark harness."""
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.httpd = ThreadingHTTPServer((host, port), MockOpenAIHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = MockState(config or MockConfig())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def state(self) -> MockState:
+        return self.httpd.state
+
+    def start(self) -> "MockOpenAIServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible mock server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8808)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fixed delay per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="extra random delay per request")
+    parser.add_argument("--ms-per-token", type=float, default=0.0, help="delay per generated token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--tool-rounds", type=int, default=1, help="tool-calling turns before a final answer")
+    parser.add_argument("--script", help="JSON file with extra response rules ([{match, content|json}])")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, ms_per_output_token=args.ms_per_token,
+        error_rate=args.error_rate, tool_rounds=args.tool_rounds, seed=args.seed
+    )
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            config.rules = json.load(f) + config.rules
+
+    server = MockOpenAIServer(config, host=args.host, port=args.port)
+    print(f"🧪 Mock OpenAI API listening on {server.base_url}")
+    print(f"   export OPENAI_BASE_URL={server.base_url} OPENAI_API_KEY=mock")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Concurrency-safe usage totals for TokenTracker.
+
+ThreadLocalTotals gives every thread its own counters, so logging takes no
+lock; the counters are summed when totals are read, and a thread's counters
+are folded into one base when it exits. SharedTotals keeps one set
+of totals in a small memory-mapped file, updated under an exclusive file lock,
+so every process that opens the same path (server workers, batch agents) adds
+to the same totals.
+"""
+import itertools
+import mmap
+import os
+import struct
+import threading
+import weakref
+from typing import Callable, Dict, Any, List
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+# prompt, completion and total tokens, cost, interactions
+_FIELDS = ("prompt", "completion", "total", "cost", "interactions")
+_LAYOUT = struct.Struct("<qqqdq")
+
+class _ThreadExit:
+    """Kept in a thread's local storage, which is freed when the thread exits."""
+
+def on_thread_exit(local: threading.local, callback: Callable, *args):
+    """Call `callback(*args)` when the current thread exits (or its `local` data is replaced)."""
+    local.exit_token = token = _ThreadExit()
+    weakref.finalize(token, callback, *args)
+
+def _as_dict(values) -> Dict[str, Any]:
+    prompt, completion, total, cost, interactions = values
+    return {
+        "tokens": {"prompt": int(prompt), "completion": int(completion), "total": int(total)},
+        "cost": cost,
+        "interactions": int(interactions)
+    }
+
+class ThreadLocalTotals:
+    """Per-thread counters, merged on read.
+
+    A read taken while another thread is logging may include part of that
+    thread's latest record; totals are exact once logging threads are idle.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()  # guards the registry of counters, not the counters
+        self._ids = itertools.count()
+        self._counters: Dict[int, List[float]] = {}
+        self._finished = [0, 0, 0, 0.0, 0]  # threads that have exited
+
+    def add(self, prompt: int, completion: int, cost: float):
+        local = self._local
+        if getattr(local, "registry", None) is not self._counters:
+            counters = [0, 0, 0, 0.0, 0]
+            with self._lock:
+                key = next(self._ids)
+                registry = self._counters
+                registry[key] = counters
+                local.registry = registry
+            local.counters = counters
+            on_thread_exit(local, self._retire, registry, key)
+        c = local.counters
+        c[0] += prompt
+        c[1] += completion
+        c[2] += prompt + completion
+        c[3] += cost
+        c[4] += 1
+
+    def _retire(self, registry: Dict[int, List[float]], key: int):
+        """Fold an exited thread's counters into the base."""
+        with self._lock:
+            if registry is not self._counters:
+                return  # reset since
+            for i, value in enumerate(registry.pop(key)):
+                self._finished[i] += value
+
+    def totals(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = list(self._counters.values()) + [list(self._finished)]
+        return _as_dict([sum(c[i] for c in counters) for i in range(len(_FIELDS))])
+
+    def reset(self):
+        with self._lock:
+            self._counters = {}
+            self._finished = [0, 0, 0, 0.0, 0]
+
+class SharedTotals:
+    """Totals kept in a memory-mapped file and shared by every process that opens it."""
+
+    def __init__(self, path: str):
+        if not FCNTL_AVAILABLE:
+            raise RuntimeError("Cross-process totals need fcntl file locks (POSIX only)")
+        self.path = path
+        self._lock = threading.Lock()  # flock is per open file, so threads also need a lock
+        self._pid = None
+        self._open()
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < _LAYOUT.size:
+                os.ftruncate(self._fd, _LAYOUT.size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, _LAYOUT.size)
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        # A forked child shares the parent's open file, and with it the flock; reopen
+        if self._pid != os.getpid():
+            self._open()
+
+    def add(self, prompt: int, completion: int, cost: float):
+        with self._lock:
+            self._check_fork()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                p, c, t, total_cost, n = _LAYOUT.unpack_from(self._map, 0)
+                _LAYOUT.pack_into(self._map, 0, p + prompt, c + completion, t + prompt + completion,
+                                  total_cost + cost, n + 1)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def totals(self) -> Dict[str, Any]:
+        with self._lock:
+            self._check_fork()
+            fcntl.flock(self._fd, fcntl.LOCK_SH)
+            try:
+                values = _LAYOUT.unpack_from(self._map, 0)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return _as_dict(values)
+
+    def reset(self):
+        """Zero the totals for every process sharing the file."""
+        with self._lock:
+            self._check_fork()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                _LAYOUT.pack_into(self._map, 0, 0, 0, 0, 0.0, 0)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        with self._lock:
+            self._map.close()
+            os.close(self._fd)
@@ -36,7 +36,7 @@ def main():
     with ongoing research in areas like reinforcement learning, generative models, and multi-modal systems."""
     
     # Log the interaction
-    interaction = tracker.log_interaction(prompt, completion)
+    interaction = tracker.log(prompt, completion)
     
     # Print token usage and cost for this interaction
     print("Example 1: Simple Query")
@@ -75,7 +75,7 @@ def main():
     evaluation, and adaptive governance frameworks that can evolve with advancing technology."""
     
     # Log the interaction with metadata
-    interaction = tracker.log_interaction(
+    interaction = tracker.log(
         prompt, 
         completion,
         metadata={
@@ -95,14 +95,14 @@ def main():
     print("-" * 50)
     
     # Get session summary
-    summary = tracker.get_session_summary()
+    summary = tracker.summary()
     print("Session Summary:")
     print(f"Total tokens used: {summary['tokens']['total']}")
     print(f"Total cost: ${summary['cost']:.6f}")
-    print(f"Number of interactions: {summary['interactions_count']}")
+    print(f"Number of interactions: {summary['interactions']}")
     
     # Export session data to a JSON file
-    export_path = tracker.export_session_data("logs/session_export.json")
+    export_path = tracker.export("logs/session_export.json")
     print(f"Session data exported to: {export_path}")
 
 if __name__ == "__main__":
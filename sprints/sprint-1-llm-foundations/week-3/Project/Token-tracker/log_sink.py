@@ -0,0 +1,215 @@
+"""
+Buffered JSONL log sink for TokenTracker.
+Records are queued on the caller's thread and written in batches by a
+background thread, so logging costs a queue put on the request path. The file
+stays open between batches and can be rotated (and gzip-compressed) by size.
+When the queue is full, records are dropped and counted instead of blocking.
+
+Each batch is appended with a single write under an exclusive lock on
+`<path>.lock`, so processes logging to the same file never interleave partial
+lines. Rotation happens under the same lock, and a writer whose file was
+rotated by another process reopens the path before writing. Without `fcntl`
+(Windows) there is no lock, and rotation is only safe with a single process.
+"""
+import atexit
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+from typing import Optional, Dict, Any
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+class _Flush:
+    def __init__(self):
+        self.done = threading.Event()
+
+_STOP = object()
+
+class JSONLSink:
+    """Appends records to a JSONL file from a background writer thread."""
+
+    def __init__(self, path: str, batch_size: int = 256, flush_interval: float = 1.0, max_queue: int = 10000,
+                 max_bytes: Optional[int] = None, backups: int = 5, compress: bool = True):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backups = max(1, backups)
+        self.compress = compress
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self.rotations = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._drop_lock = threading.Lock()
+        self._state_lock = threading.Lock()  # orders writes before the stop marker
+        self._file = None
+        self._lock_file = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="jsonl-sink", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, record: Dict[str, Any]) -> bool:
+        """Queue a record; returns False (and counts it as dropped) if the queue is full or the sink is closing."""
+        with self._state_lock:
+            if not self._closed:
+                try:
+                    self._queue.put_nowait(record)
+                    return True
+                except queue.Full:
+                    pass
+        self._count_dropped(1)
+        return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far is written; returns False on timeout."""
+        if self._closed:
+            return True
+        marker = _Flush()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """Write the remaining records and stop the writer thread."""
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "queued": self._queue.qsize(),
+            "rotations": self.rotations
+        }
+
+    # -------------------------
+    # Writer thread
+    # -------------------------
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch, markers, stop = [], [], False
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, _Flush):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write_batch(batch)
+            for marker in markers:
+                marker.done.set()
+            if stop:
+                self._close_file()
+                if self._lock_file is not None:
+                    self._lock_file.close()
+                return
+
+    def _write_batch(self, batch):
+        try:
+            data = "".join(json.dumps(record) + "\n" for record in batch).encode("utf-8")
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                if FCNTL_AVAILABLE and self._lock_file is None:
+                    self._lock_file = open(self.path + ".lock", "ab")
+            self._lock()
+            try:
+                self._reopen_if_rotated()
+                view = memoryview(data)
+                while view:
+                    view = view[self._file.write(view):]
+                self.written += len(batch)
+                if self.max_bytes and self._file.tell() >= self.max_bytes:
+                    try:
+                        self._rotate()
+                    except Exception:
+                        self.errors += 1
+            finally:
+                self._unlock()
+        except Exception:
+            self.errors += 1
+            self._count_dropped(len(batch))
+            self._close_file()
+
+    def _lock(self):
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+
+    def _unlock(self):
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _reopen_if_rotated(self):
+        """Open the path, or reopen it if another process rotated the open file away."""
+        if self._file is not None:
+            try:
+                current = os.stat(self.path)
+            except FileNotFoundError:
+                current = None
+            opened = os.fstat(self._file.fileno())
+            if current is None or (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino):
+                self._close_file()
+        if self._file is None:
+            self._file = open(self.path, "ab", buffering=0)
+
+    def _rotate(self):
+        """Move the current file to `<path>.1`, shifting older ones up to `backups`; call with the lock held."""
+        self._close_file()
+        suffix = ".gz" if self.compress else ""
+        oldest = f"{self.path}.{self.backups}{suffix}"
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for i in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{i}{suffix}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{i + 1}{suffix}")
+        rotated = f"{self.path}.1"
+        os.replace(self.path, rotated)
+        if self.compress:
+            with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(rotated)
+        self.rotations += 1
+
+    def _count_dropped(self, n: int):
+        with self._drop_lock:
+            self.dropped += n
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+            self._file = None
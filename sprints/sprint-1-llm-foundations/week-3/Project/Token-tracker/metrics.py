@@ -0,0 +1,169 @@
+"""
+Prometheus metrics for TokenTracker.
+
+TokenMetrics keeps counters and histograms for requests, tokens, cost,
+latency, prompt cache hits and errors, labelled by model and app (the `app`
+metadata value). Recording one request is a handful of dict and list updates
+under one lock. `render()` produces the Prometheus text format, which can be
+served from an existing web app or from the small HTTP server started by
+`serve()`.
+"""
+import bisect
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, List, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536, 262144)
+NO_APP = ""
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Counter:
+    """A monotonically increasing value per label combination."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1.0):
+        values = self.values
+        values[labels] = values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    """Counts of observations in fixed buckets, plus their sum, per label combination."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # Per label combination: [count per bucket..., count above the last bucket, sum]
+        self.values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        row = self.values.get(labels)
+        if row is None:
+            row = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        row[bisect.bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, row in sorted(self.values.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), row):
+                cumulative += n
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(row[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+class TokenMetrics:
+    """LLM request metrics for one or more TokenTrackers, in Prometheus format."""
+    LABELS = ("model", "app")
+
+    def __init__(self, prefix: str = "llm", app: str = NO_APP):
+        self.app = app
+        self._lock = threading.Lock()
+        labels = self.LABELS
+        self.requests = Counter(f"{prefix}_requests_total", "Completed LLM requests.", labels)
+        self.tokens = Counter(f"{prefix}_tokens_total", "Tokens used, by type (prompt, completion, cached).",
+                              labels + ("type",))
+        self.cost = Counter(f"{prefix}_cost_usd_total", "Estimated cost in US dollars.", labels)
+        self.cache_hits = Counter(f"{prefix}_prompt_cache_hits_total",
+                                  "Requests with at least one cached prompt token.", labels)
+        self.errors = Counter(f"{prefix}_errors_total", "Failed LLM requests, by error type.", labels + ("error",))
+        self.latency = Histogram(f"{prefix}_request_duration_seconds", "LLM request latency.", labels,
+                                 LATENCY_BUCKETS)
+        self.first_chunk = Histogram(f"{prefix}_time_to_first_chunk_seconds",
+                                     "Time until the first chunk of a streamed response.", labels, LATENCY_BUCKETS)
+        self.request_tokens = Histogram(f"{prefix}_request_tokens", "Prompt plus completion tokens per request.",
+                                        labels, TOKEN_BUCKETS)
+        self.metrics = [self.requests, self.tokens, self.cost, self.cache_hits, self.errors,
+                        self.latency, self.first_chunk, self.request_tokens]
+
+    def _labels(self, model: str, metadata: Optional[Dict[str, Any]]) -> Tuple[str, str]:
+        app = metadata.get("app") if metadata else None
+        return model, str(app) if app is not None else self.app
+
+    def record(self, record: Dict[str, Any]):
+        """Count one TokenTracker record."""
+        labels = self._labels(record["model"], record.get("metadata"))
+        model, app = labels
+        tokens = record["tokens"]
+        cached = tokens.get("cached", 0)
+        latency_ms = record.get("latency_ms")
+        first_chunk_ms = record.get("first_chunk_ms")
+        with self._lock:
+            self.requests.inc(labels)
+            self.tokens.inc((model, app, "prompt"), tokens["prompt"])
+            self.tokens.inc((model, app, "completion"), tokens["completion"])
+            self.cost.inc(labels, record["cost"]["total"])
+            if cached:
+                self.tokens.inc((model, app, "cached"), cached)
+                self.cache_hits.inc(labels)
+            if latency_ms is not None:
+                self.latency.observe(labels, latency_ms / 1000)
+            if first_chunk_ms is not None:
+                self.first_chunk.observe(labels, first_chunk_ms / 1000)
+            self.request_tokens.observe(labels, tokens["total"])
+
+    def record_error(self, model: str, error: str, metadata: Optional[Dict[str, Any]] = None):
+        model, app = self._labels(model, metadata)
+        with self._lock:
+            self.errors.inc((model, app, error))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [line for metric in self.metrics for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve `/metrics` from a background thread; call `shutdown()` on the result to stop."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # scrapes are too frequent to log
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="token-metrics-http", daemon=True).start()
+        return server
@@ -0,0 +1,235 @@
+"""
+Automatic TokenTracker accounting for OpenAI clients.
+
+`instrument(client, tracker)` wraps `chat.completions.create`,
+`embeddings.create` and `images.generate` on an `OpenAI` or `AsyncOpenAI`
+client, so every call records the response's real `usage` (or image count),
+its latency and model. Failed calls are counted as errors by exception type.
+The client is patched in place and keeps working exactly as before.
+
+Streams are passed through unchanged and recorded when they end (or are
+closed). Usage comes from the final usage chunk when the request sets
+`stream_options={"include_usage": True}`; otherwise it is estimated from the
+messages and the streamed text with tiktoken.
+"""
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, List
+
+from token_counter import count_chat_tokens, count_tokens
+
+_metadata: ContextVar[Dict[str, Any]] = ContextVar("token_tracker_metadata", default={})
+
+@contextmanager
+def usage_metadata(**metadata):
+    """Add metadata (e.g. user_id, project) to every call recorded in this context."""
+    token = _metadata.set({**_metadata.get(), **metadata})
+    try:
+        yield
+    finally:
+        _metadata.reset(token)
+
+def _usage_counts(usage):
+    """(prompt, completion, cached) tokens from a `usage` object."""
+    prompt = getattr(usage, "prompt_tokens", 0) or 0
+    completion = getattr(usage, "completion_tokens", 0) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+    return prompt, completion, cached
+
+class _Call:
+    """One tracked API call, recorded once when its response is complete."""
+
+    def __init__(self, tracker, kwargs: Dict[str, Any], metadata: Dict[str, Any]):
+        self.tracker = tracker
+        self.kwargs = kwargs
+        self.model = kwargs.get("model") or tracker.model_name
+        self.metadata = {**metadata, **_metadata.get()} or None
+        self.started = time.perf_counter()
+        self.first_chunk_ms: Optional[float] = None
+        self.usage = None
+        self.text: List[str] = []
+        self.done = False
+
+    def record_images(self, response):
+        self.done = True
+        self.tracker.record_images(
+            len(getattr(response, "data", None) or []), model_name=self.kwargs.get("model") or "dall-e-2",
+            size=self.kwargs.get("size") or "1024x1024", quality=self.kwargs.get("quality") or "standard",
+            metadata=self.metadata, latency_ms=self.elapsed_ms()
+        )
+
+    def record_error(self, error: BaseException):
+        self.done = True
+        self.tracker.record_error(self.model, type(error).__name__, self.metadata)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def record(self, usage, details: Optional[Dict[str, Any]] = None):
+        if self.done:
+            return
+        self.done = True
+        prompt, completion, cached = _usage_counts(usage)
+        self.tracker.record_usage(prompt, completion, model_name=self.model, metadata=self.metadata,
+                                  latency_ms=self.elapsed_ms(), cached_tokens=cached, details=details)
+
+    # Streaming
+
+    def add_chunk(self, chunk):
+        if self.first_chunk_ms is None:
+            self.first_chunk_ms = self.elapsed_ms()
+        if getattr(chunk, "usage", None):
+            self.usage = chunk.usage
+        for choice in getattr(chunk, "choices", None) or []:
+            delta = choice.delta
+            if delta is None:
+                continue
+            if delta.content:
+                self.text.append(delta.content)
+            for tool_call in delta.tool_calls or []:
+                if tool_call.function is not None:
+                    self.text.append(tool_call.function.name or "")
+                    self.text.append(tool_call.function.arguments or "")
+
+    def finish_stream(self):
+        if self.done:
+            return
+        details = {"streamed": True, "first_chunk_ms": self.first_chunk_ms}
+        if self.usage is not None:
+            self.record(self.usage, details)
+            return
+        # No usage chunk was requested: estimate both sides
+        self.done = True
+        prompt = count_chat_tokens(self.kwargs.get("messages") or [], self.kwargs.get("tools"), self.model)
+        completion = count_tokens("".join(self.text), self.model)
+        self.tracker.record_usage(prompt, completion, model_name=self.model, metadata=self.metadata,
+                                  latency_ms=self.elapsed_ms(), details={**details, "estimated": True})
+
+class TrackedStream:
+    """Passes a chat completion stream through and records its usage when it ends."""
+
+    def __init__(self, stream, call: _Call):
+        self._stream = stream
+        self._call = call
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            chunk = next(self._stream)
+        except StopIteration:
+            self._call.finish_stream()
+            raise
+        except Exception as e:
+            self._call.record_error(e)
+            raise
+        self._call.add_chunk(chunk)
+        return chunk
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._call.finish_stream()
+        self._stream.close()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+class AsyncTrackedStream:
+    """Async version of TrackedStream."""
+
+    def __init__(self, stream, call: _Call):
+        self._stream = stream
+        self._call = call
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            chunk = await self._stream.__anext__()
+        except StopAsyncIteration:
+            self._call.finish_stream()
+            raise
+        except Exception as e:
+            self._call.record_error(e)
+            raise
+        self._call.add_chunk(chunk)
+        return chunk
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        self._call.finish_stream()
+        await self._stream.close()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+# -------------------------
+# Wrapping
+# -------------------------
+
+def _wrap(create, tracker, metadata: Dict[str, Any], kind: str):
+    """Wrap an API method; `kind` is 'chat', 'embeddings' or 'images'."""
+    if getattr(create, "_token_tracker", None) is tracker:
+        return create  # already instrumented with this tracker
+
+    def handle(response, call: _Call, is_async: bool):
+        if kind == "chat" and call.kwargs.get("stream"):
+            return AsyncTrackedStream(response, call) if is_async else TrackedStream(response, call)
+        if kind == "images":
+            call.record_images(response)
+        else:
+            call.record(getattr(response, "usage", None))
+        return response
+
+    if inspect.iscoroutinefunction(inspect.unwrap(create)):
+        @functools.wraps(create)
+        async def tracked(*args, **kwargs):
+            call = _Call(tracker, kwargs, metadata)
+            try:
+                response = await create(*args, **kwargs)
+            except Exception as e:
+                call.record_error(e)
+                raise
+            return handle(response, call, True)
+    else:
+        @functools.wraps(create)
+        def tracked(*args, **kwargs):
+            call = _Call(tracker, kwargs, metadata)
+            try:
+                response = create(*args, **kwargs)
+            except Exception as e:
+                call.record_error(e)
+                raise
+            return handle(response, call, False)
+    tracked._token_tracker = tracker
+    return tracked
+
+def instrument(client, tracker, metadata: Optional[Dict[str, Any]] = None):
+    """Record every chat completion, embedding and image call made with `client`; returns the client.
+
+    `metadata` (e.g. {"app": "legal_agent"}) is added to every record.
+    """
+    metadata = dict(metadata or {})
+    completions = client.chat.completions
+    completions.create = _wrap(completions.create, tracker, metadata, "chat")
+    embeddings = client.embeddings
+    embeddings.create = _wrap(embeddings.create, tracker, metadata, "embeddings")
+    images = client.images
+    images.generate = _wrap(images.generate, tracker, metadata, "images")
+    return client
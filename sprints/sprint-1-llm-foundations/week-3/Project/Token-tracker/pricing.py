@@ -0,0 +1,110 @@
+"""
+Model pricing for TokenTracker, loaded from a versioned JSON file.
+
+Model names resolve to the longest matching entry: "gpt-4o-2024-08-06" is
+priced as "gpt-4o" and "gpt-4o-mini-2024-07-18" as "gpt-4o-mini". A prefix
+only matches up to a "-", ":" or "@", so "gpt-4" does not price
+"gpt-4.5-preview". Fine-tuned models ("ft:gpt-4o-mini-2024-07-18:org::id")
+are billed at their own rates, so they match only "ft:" entries and are
+unpriced (with a warning) when the table has none. Each name is resolved once and cached, so pricing a call is
+a dict lookup.
+
+Set TOKEN_TRACKER_PRICING to use a different pricing file.
+"""
+import json
+import os
+import threading
+import warnings
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Tuple
+
+DEFAULT_PRICING_PATH = os.getenv(
+    "TOKEN_TRACKER_PRICING", os.path.join(os.path.dirname(os.path.abspath(__file__)), "pricing.json")
+)
+_BOUNDARIES = ("-", ":", "@")
+
+@dataclass(frozen=True)
+class ModelPrice:
+    """Prices per 1K tokens; cached prompt tokens cost `prompt` unless `cached_prompt` is set."""
+    prompt: float
+    completion: float
+    cached_prompt: Optional[float] = None
+
+    def cost(self, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> Tuple[float, float]:
+        """(prompt cost, completion cost) for one call."""
+        cached_price = self.prompt if self.cached_prompt is None else self.cached_prompt
+        prompt_cost = ((prompt_tokens - cached_tokens) * self.prompt + cached_tokens * cached_price) / 1000
+        return prompt_cost, completion_tokens * self.completion / 1000
+
+class PricingTable:
+    """Token and image prices with cached longest-prefix model resolution."""
+
+    def __init__(self, models: Dict[str, ModelPrice], images: Optional[Dict[str, Dict[str, float]]] = None,
+                 version: str = "custom"):
+        self.version = version
+        self.models = dict(models)
+        self.images = {name: dict(prices) for name, prices in (images or {}).items()}
+        self._resolved: Dict[str, Optional[ModelPrice]] = {}
+        self._warned = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PRICING_PATH) -> "PricingTable":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        models = {
+            name: ModelPrice(price["prompt"], price.get("completion", 0.0), price.get("cached_prompt"))
+            for name, price in data.get("models", {}).items()
+        }
+        return cls(models, data.get("images"), data.get("version", "unversioned"))
+
+    def _match(self, model_name: str, names) -> Optional[str]:
+        best = None
+        for candidate in names:
+            if model_name.startswith(candidate) and (len(model_name) == len(candidate)
+                                                     or model_name[len(candidate)] in _BOUNDARIES):
+                if best is None or len(candidate) > len(best):
+                    best = candidate
+        return best
+
+    def resolve(self, model_name: str) -> Optional[ModelPrice]:
+        """Price entry for `model_name`, or None (with a one-time warning) if it has none."""
+        try:
+            return self._resolved[model_name]
+        except KeyError:
+            pass
+        match = self._match(model_name, self.models)
+        price = self.models[match] if match else None
+        with self._lock:
+            self._resolved[model_name] = price
+            if price is None and model_name not in self._warned:
+                self._warned.add(model_name)
+                warnings.warn(f"No price for model {model_name!r} in pricing table {self.version}; "
+                              f"its cost is recorded as 0", stacklevel=3)
+        return price
+
+    @property
+    def unpriced_models(self):
+        return sorted(self._warned)
+
+    def set_price(self, model_name: str, prompt: float, completion: float, cached_prompt: Optional[float] = None):
+        """Add or replace a model's prices (per 1K tokens)."""
+        with self._lock:
+            self.models[model_name] = ModelPrice(prompt, completion, cached_prompt)
+            self._resolved = {}
+            self._warned.discard(model_name)
+
+    def image_price(self, model_name: str, size: str = "1024x1024", quality: str = "standard") -> Optional[float]:
+        """Price of one generated image, or None if the model or size is unknown."""
+        match = self._match(model_name, self.images)
+        if match is None:
+            return None
+        return self.images[match].get(f"{quality}:{size}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "models": {name: {k: v for k, v in vars(price).items() if v is not None}
+                       for name, price in self.models.items()},
+            "images": self.images
+        }
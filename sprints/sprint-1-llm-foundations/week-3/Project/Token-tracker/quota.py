@@ -0,0 +1,398 @@
+"""
+Quota enforcement for LLM calls, checked before they are made.
+
+A call's tokens and cost are estimated up front (chat framing and tool
+schemas included, plus the completion it may generate) and reserved against
+hierarchical token buckets: global, per project and per user. A call is
+admitted only if every level has room. If a level is short but refills soon
+enough, the call waits; if it would have to wait too long, it is rejected
+with QuotaExceeded. When the real usage is known, the reservation is settled
+and the difference is refunded or charged.
+
+Buckets refill continuously, so a limit of 100K tokens per hour allows bursts
+of up to 100K and then about 28 tokens a second. Admission is a few float
+updates under one lock. At most `max_keys` project and user budgets are
+kept: idle ones are evicted least recently used first, and while none is
+idle, new names share one "(other)" budget per scope. Quotas are per process.
+"""
+import asyncio
+import itertools
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Tuple
+
+from pricing import PricingTable
+from token_counter import count_chat_tokens, count_tokens
+
+try:
+    from fastapi import HTTPException, Request
+    FASTAPI_AVAILABLE = True
+except ImportError:
+    FASTAPI_AVAILABLE = False
+
+UNITS = ("tokens", "cost")
+EVICTION_SCAN = 8  # least recently used budgets checked for eviction per new name
+
+@dataclass(frozen=True)
+class Limit:
+    """Tokens and/or dollars allowed per `period_seconds`. `None` disables that budget."""
+    tokens: Optional[float] = None
+    cost: Optional[float] = None
+    period_seconds: float = 3600.0
+
+class QuotaExceeded(Exception):
+    """A call was rejected because a budget had no room for it."""
+
+    def __init__(self, scope: str, name: str, unit: str, retry_after: float):
+        self.scope = scope
+        self.name = name
+        self.unit = unit
+        self.retry_after = retry_after
+        who = scope if scope == "global" else f"{scope} {name!r}"
+        when = "never fits" if math.isinf(retry_after) else f"retry after {retry_after:.1f}s"
+        super().__init__(f"{who} {unit} quota exceeded ({when})")
+
+class TokenBucket:
+    """A budget of `capacity` that refills at `capacity / period_seconds` per second.
+
+    `key` is (scope, name, unit); `holds` counts open reservations against it.
+    """
+    __slots__ = ("key", "capacity", "rate", "level", "updated", "holds")
+
+    def __init__(self, key: Tuple[str, str, str], capacity: float, period_seconds: float, now: float):
+        self.key = key
+        self.capacity = capacity
+        self.rate = capacity / period_seconds
+        self.level = capacity
+        self.updated = now
+        self.holds = 0
+
+    def resize(self, capacity: float, period_seconds: float, now: float):
+        """Apply a new limit, keeping what has been used so far."""
+        self.refill(now)
+        self.level = min(capacity, self.level - self.capacity + capacity)
+        self.capacity = capacity
+        self.rate = capacity / period_seconds
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until `amount` is available (after `refill`); inf if it exceeds the capacity."""
+        if amount <= self.level:
+            return 0.0
+        if amount > self.capacity:
+            return math.inf
+        return (amount - self.level) / self.rate
+
+class Reservation:
+    """Tokens and cost held for one admitted call until it is settled."""
+
+    def __init__(self, manager: "QuotaManager", buckets: List[TokenBucket], tokens: int, cost: float,
+                 model: Optional[str] = None):
+        self.manager = manager
+        self.buckets = buckets
+        self.tokens = tokens
+        self.cost = cost
+        self.model = model
+        self.settled = False
+
+    def settle(self, tokens: int, cost: Optional[float] = None):
+        """Replace the estimate with the call's real usage; `cost` defaults to the estimate's cost per token."""
+        if self.settled:
+            return
+        self.settled = True
+        if cost is None:
+            cost = self.cost * tokens / self.tokens if self.tokens else 0.0
+        self.manager._adjust(self.buckets, tokens - self.tokens, cost - self.cost)
+
+    def settle_usage(self, usage):
+        """Settle from an API response's `usage`, priced with the manager's pricing table."""
+        prompt = getattr(usage, "prompt_tokens", 0) or 0
+        completion = getattr(usage, "completion_tokens", 0) or 0
+        self.settle(prompt + completion, self.manager.price(self.model, prompt, completion) if self.model else None)
+
+    def release(self):
+        """Return the whole reservation, e.g. when the call failed."""
+        self.settle(0, 0.0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.release()
+
+class QuotaManager:
+    """Admits, queues or rejects calls against global, per-project and per-user limits.
+
+    `overrides` maps (scope, name) to a Limit, e.g. {("user", "batch-job"): Limit(tokens=5_000_000)}.
+    Names with an override always get their own budget.
+    A call that cannot be admitted within `max_wait` seconds, or while
+    `max_waiting` calls are already queued, raises QuotaExceeded.
+    """
+
+    def __init__(self, global_limit: Optional[Limit] = None, project_limit: Optional[Limit] = None,
+                 user_limit: Optional[Limit] = None, overrides: Optional[Dict[Tuple[str, str], Limit]] = None,
+                 pricing: Optional[PricingTable] = None, max_wait: float = 0.0, max_waiting: int = 64,
+                 default_completion_tokens: int = 512, max_keys: int = 10000):
+        self.limits = {"global": global_limit, "project": project_limit, "user": user_limit}
+        self.overrides = dict(overrides or {})
+        self.pricing = pricing or PricingTable.load()
+        self.max_wait = max_wait
+        self.max_waiting = max_waiting
+        self.default_completion_tokens = default_completion_tokens
+        self.max_keys = max_keys
+        self._budgets: "OrderedDict[Tuple[str, str], List[TokenBucket]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self.counts = {"admitted": 0, "queued": 0, "rejected": 0}
+
+    # -------------------------
+    # Estimates
+    # -------------------------
+
+    def price(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        price = self.pricing.resolve(model)
+        return sum(price.cost(prompt_tokens, completion_tokens)) if price else 0.0
+
+    def estimate(self, model: str, messages: Optional[List[Dict[str, Any]]] = None,
+                 tools: Optional[List[Dict[str, Any]]] = None, text: Optional[str] = None,
+                 max_tokens: Optional[int] = None) -> Tuple[int, float]:
+        """Worst-case (tokens, cost) of a call: its prompt plus `max_tokens` (or the default) of completion."""
+        prompt = count_chat_tokens(messages, tools, model) if messages is not None else 0
+        if text:
+            prompt += count_tokens(text, model)
+        completion = max_tokens if max_tokens is not None else self.default_completion_tokens
+        return prompt + completion, self.price(model, prompt, completion)
+
+    # -------------------------
+    # Admission
+    # -------------------------
+
+    OTHER = "(other)"
+
+    def set_limit(self, scope: str, name: str, limit: Optional[Limit]):
+        """Override the limit for one project or user (None removes the override)."""
+        with self._lock:
+            if limit is None:
+                self.overrides.pop((scope, name), None)
+            else:
+                self.overrides[(scope, name)] = limit
+            buckets = self._budgets.get((scope, name))
+            if buckets is None:
+                return
+            # Resize in place, so open reservations still settle against these buckets
+            limit = self.overrides.get((scope, name), self.limits[scope])
+            now = time.monotonic()
+            by_unit = {bucket.key[2]: bucket for bucket in buckets}
+            resized = []
+            for unit in UNITS:
+                capacity = getattr(limit, unit) if limit is not None else None
+                if capacity is None:
+                    continue
+                bucket = by_unit.get(unit)
+                if bucket is None:
+                    bucket = TokenBucket((scope, name, unit), capacity, limit.period_seconds, now)
+                else:
+                    bucket.resize(capacity, limit.period_seconds, now)
+                resized.append(bucket)
+            buckets[:] = resized
+
+    def _new_budget(self, scope: str, name: str, limit: Limit, now: float) -> List[TokenBucket]:
+        buckets = [TokenBucket((scope, name, unit), getattr(limit, unit), limit.period_seconds, now)
+                   for unit in UNITS if getattr(limit, unit) is not None]
+        self._budgets[(scope, name)] = buckets
+        return buckets
+
+    def _evict_idle(self, now: float) -> bool:
+        """Drop one of the least recently used budgets if it has refilled and has no open reservations."""
+        for key in list(itertools.islice(self._budgets, EVICTION_SCAN)):
+            if key[0] == "global" or key[1] == self.OTHER:
+                continue
+            buckets = self._budgets[key]
+            for bucket in buckets:
+                bucket.refill(now)
+            if all(not bucket.holds and bucket.level >= bucket.capacity for bucket in buckets):
+                del self._budgets[key]
+                return True
+        return False
+
+    def _budget(self, scope: str, name: str, now: float) -> List[TokenBucket]:
+        """Buckets for one level; empty if it has no limit."""
+        key = (scope, name)
+        buckets = self._budgets.get(key)
+        if buckets is not None:
+            self._budgets.move_to_end(key)
+            return buckets
+        limit = self.overrides.get(key)
+        if limit is None:
+            limit = self.limits[scope]
+            if limit is None:
+                return []
+            if scope != "global" and len(self._budgets) >= self.max_keys and not self._evict_idle(now):
+                # Every tracked budget is in use: throttle new names together
+                return self._budget_other(scope, limit, now)
+        return self._new_budget(scope, name, limit, now)
+
+    def _budget_other(self, scope: str, limit: Limit, now: float) -> List[TokenBucket]:
+        key = (scope, self.OTHER)
+        buckets = self._budgets.get(key)
+        if buckets is None:
+            return self._new_budget(scope, self.OTHER, limit, now)
+        self._budgets.move_to_end(key)
+        return buckets
+
+    def _try_acquire(self, tokens: int, cost: float, user: Optional[str], project: Optional[str]):
+        """Take `tokens` and `cost` from every level, or return (wait seconds, limiting key)."""
+        now = time.monotonic()
+        with self._lock:
+            buckets = []
+            for scope, name in (("global", ""), ("project", project), ("user", user)):
+                if name is not None:
+                    buckets.extend(self._budget(scope, name, now))
+            wait, limiting = 0.0, None
+            for bucket in buckets:
+                bucket.refill(now)
+                needed = bucket.wait_for(tokens if bucket.key[2] == "tokens" else cost)
+                if needed > wait:
+                    wait, limiting = needed, bucket.key
+            if limiting is None:
+                for bucket in buckets:
+                    bucket.level -= tokens if bucket.key[2] == "tokens" else cost
+                    bucket.holds += 1
+                self.counts["admitted"] += 1
+                return buckets, 0.0, None
+            return None, wait, limiting
+
+    def _admit_or_wait(self, tokens: int, cost: float, user: Optional[str], project: Optional[str],
+                       deadline: float, queued: bool):
+        """One admission attempt; returns (reservation, seconds to sleep) or raises QuotaExceeded."""
+        taken, wait, limiting = self._try_acquire(tokens, cost, user, project)
+        if taken is not None:
+            return Reservation(self, taken, tokens, cost), 0.0
+        with self._lock:
+            too_late = time.monotonic() + wait > deadline
+            if too_late or (not queued and self._waiting >= self.max_waiting):
+                self.counts["rejected"] += 1
+                raise QuotaExceeded(limiting[0], limiting[1], limiting[2], wait)
+        return None, wait
+
+    def acquire(self, tokens: int, cost: float = 0.0, user: Optional[str] = None, project: Optional[str] = None,
+                max_wait: Optional[float] = None) -> Reservation:
+        """Reserve `tokens` and `cost`, waiting up to `max_wait` seconds for the budgets to refill."""
+        deadline = time.monotonic() + (self.max_wait if max_wait is None else max_wait)
+        queued = False
+        try:
+            while True:
+                reservation, wait = self._admit_or_wait(tokens, cost, user, project, deadline, queued)
+                if reservation is not None:
+                    return reservation
+                if not queued:
+                    queued = True
+                    with self._lock:
+                        self._waiting += 1
+                        self.counts["queued"] += 1
+                time.sleep(wait)
+        finally:
+            if queued:
+                with self._lock:
+                    self._waiting -= 1
+
+    async def acquire_async(self, tokens: int, cost: float = 0.0, user: Optional[str] = None,
+                            project: Optional[str] = None, max_wait: Optional[float] = None) -> Reservation:
+        """Async version of `acquire`; waiting does not block the event loop."""
+        deadline = time.monotonic() + (self.max_wait if max_wait is None else max_wait)
+        queued = False
+        try:
+            while True:
+                reservation, wait = self._admit_or_wait(tokens, cost, user, project, deadline, queued)
+                if reservation is not None:
+                    return reservation
+                if not queued:
+                    queued = True
+                    with self._lock:
+                        self._waiting += 1
+                        self.counts["queued"] += 1
+                await asyncio.sleep(wait)
+        finally:
+            if queued:
+                with self._lock:
+                    self._waiting -= 1
+
+    def reserve(self, model: str, messages: Optional[List[Dict[str, Any]]] = None,
+                tools: Optional[List[Dict[str, Any]]] = None, max_tokens: Optional[int] = None,
+                user: Optional[str] = None, project: Optional[str] = None,
+                max_wait: Optional[float] = None) -> Reservation:
+        """Estimate a chat call and reserve it; use as a guard before each model call."""
+        tokens, cost = self.estimate(model, messages, tools, max_tokens=max_tokens)
+        reservation = self.acquire(tokens, cost, user, project, max_wait)
+        reservation.model = model
+        return reservation
+
+    def _adjust(self, buckets: List[TokenBucket], tokens: int, cost: float):
+        with self._lock:
+            for bucket in buckets:
+                bucket.level = min(bucket.capacity, bucket.level - (tokens if bucket.key[2] == "tokens" else cost))
+                bucket.holds -= 1
+
+    def remaining(self, scope: str, name: str = "") -> Dict[str, float]:
+        """Tokens and dollars currently available at one level."""
+        now = time.monotonic()
+        with self._lock:
+            buckets = self._budgets.get((scope, name))
+            if buckets is not None:
+                for bucket in buckets:
+                    bucket.refill(now)
+                return {bucket.key[2]: bucket.level for bucket in buckets}
+            limit = self.overrides.get((scope, name), self.limits[scope])
+            if limit is None:
+                return {}
+            return {unit: getattr(limit, unit) for unit in UNITS if getattr(limit, unit) is not None}
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.counts, "waiting": self._waiting, "tracked_budgets": len(self._budgets)}
+
+    # -------------------------
+    # FastAPI
+    # -------------------------
+
+    def dependency(self, model: str, max_tokens: Optional[int] = None, project: Optional[str] = None,
+                   user_header: str = "X-User-Id", project_header: str = "X-Project"):
+        """FastAPI dependency that admits a request or answers 429 with Retry-After.
+
+        The estimate counts the request body as prompt text. The endpoint
+        receives the Reservation and should settle it with the real usage.
+        If the endpoint fails the reservation is released; if it returns
+        without settling, the estimate is charged.
+        """
+        if not FASTAPI_AVAILABLE:
+            raise ImportError("fastapi is required for QuotaManager.dependency()")
+
+        async def admit(request: Request):
+            body = (await request.body()).decode("utf-8", errors="replace")
+            tokens, cost = self.estimate(model, text=body, max_tokens=max_tokens)
+            try:
+                reservation = await self.acquire_async(
+                    tokens, cost, user=request.headers.get(user_header),
+                    project=project or request.headers.get(project_header)
+                )
+            except QuotaExceeded as e:
+                headers = None if math.isinf(e.retry_after) else {"Retry-After": str(math.ceil(e.retry_after))}
+                raise HTTPException(status_code=429, detail=str(e), headers=headers)
+            reservation.model = model
+            try:
+                yield reservation
+            except BaseException:
+                reservation.release()
+                raise
+            finally:
+                if not reservation.settled:
+                    reservation.settle(reservation.tokens, reservation.cost)
+
+        return admit
@@ -0,0 +1,244 @@
+"""
+Usage reports over TokenTracker JSONL logs.
+
+Logs (plain or the .gz files produced by rotation) are read in large binary
+chunks and parsed with orjson when it is installed. Several files can be
+parsed in parallel processes. With a cache file, each log's aggregates are
+saved with the byte offset they cover, so later reports only parse files
+that are new or have grown since.
+
+Usage:
+    python token_tracker.py report logs/*.jsonl* --group-by model project hour
+    python token_tracker.py report logs/ --since 2026-10-01 --until 2026-11-01 --cache logs/.report_cache.json
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
+
+try:
+    import orjson
+    _loads = orjson.loads
+    ORJSON_AVAILABLE = True
+except ImportError:
+    _loads = json.loads
+    ORJSON_AVAILABLE = False
+
+DIMENSIONS = ("model", "project", "user", "hour", "day")
+CHUNK_BYTES = 8 * 1024 * 1024
+_HEAD_BYTES = 4096
+_UNKNOWN = "(none)"
+
+# Aggregate rows: [interactions, prompt tokens, completion tokens, total tokens, cost]
+
+def _new_aggregate() -> Dict[str, Any]:
+    return {"total": [0, 0, 0, 0, 0.0], "errors": 0, **{dim: {} for dim in DIMENSIONS}}
+
+def _merge(into: Dict[str, Any], other: Dict[str, Any]):
+    for j, value in enumerate(other["total"]):
+        into["total"][j] += value
+    into["errors"] += other["errors"]
+    for dim in DIMENSIONS:
+        rows = into[dim]
+        for key, values in other[dim].items():
+            row = rows.get(key)
+            if row is None:
+                rows[key] = list(values)
+            else:
+                for j, value in enumerate(values):
+                    row[j] += value
+
+def _aggregate_lines(lines, agg: Dict[str, Any], since: Optional[str], until: Optional[str]):
+    total = agg["total"]
+    by_dim = [agg[dim] for dim in DIMENSIONS]
+    errors = 0
+    for line in lines:
+        if not line:
+            continue
+        try:
+            record = _loads(line)
+        except ValueError:
+            errors += 1
+            continue
+        timestamp = record.get("timestamp") or ""
+        if (since and timestamp < since) or (until and timestamp >= until):
+            continue
+        tokens = record.get("tokens") or {}
+        prompt = tokens.get("prompt", 0)
+        completion = tokens.get("completion", 0)
+        total_tokens = tokens.get("total", 0)
+        cost = (record.get("cost") or {}).get("total", 0.0)
+        metadata = record.get("metadata") or {}
+        keys = (
+            record.get("model") or _UNKNOWN,
+            str(metadata.get("project", _UNKNOWN)),
+            str(metadata.get("user_id", metadata.get("user", _UNKNOWN))),
+            timestamp[:13] or _UNKNOWN,
+            timestamp[:10] or _UNKNOWN
+        )
+        total[0] += 1
+        total[1] += prompt
+        total[2] += completion
+        total[3] += total_tokens
+        total[4] += cost
+        for rows, key in zip(by_dim, keys):
+            row = rows.get(key)
+            if row is None:
+                rows[key] = [1, prompt, completion, total_tokens, cost]
+            else:
+                row[0] += 1
+                row[1] += prompt
+                row[2] += completion
+                row[3] += total_tokens
+                row[4] += cost
+    agg["errors"] += errors
+
+def _read_lines(f, offset: int):
+    """Complete lines from `f` starting at `offset`; returns them with the offset after the last one."""
+    f.seek(offset)
+    tail = b""
+    while True:
+        chunk = f.read(CHUNK_BYTES)
+        if not chunk:
+            break
+        data = tail + chunk
+        cut = data.rfind(b"\n") + 1
+        tail = data[cut:]  # an incomplete last line is left for the next chunk (or the next report)
+        if cut:
+            offset += cut
+            yield data[:cut].split(b"\n"), offset
+
+def _file_head(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read(_HEAD_BYTES)).hexdigest()
+
+def aggregate_file(path: str, since: Optional[str] = None, until: Optional[str] = None,
+                   cached: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Aggregate one log file, resuming from `cached` when the file has only grown since."""
+    stat = os.stat(path)
+    compressed = path.endswith(".gz")
+    head = None if compressed else _file_head(path)
+    entry = {"size": stat.st_size, "mtime": stat.st_mtime, "head": head, "since": since, "until": until}
+
+    if cached and all(cached.get(k) == entry[k] for k in ("since", "until")):
+        if cached["size"] == stat.st_size and cached["mtime"] == stat.st_mtime:
+            return cached
+        # A plain log that was appended to: parse only the new lines
+        resumable = (not compressed and cached.get("head") == head and stat.st_size > cached["offset"]
+                     and cached["offset"] >= _HEAD_BYTES)
+        if resumable:
+            agg, offset = cached["aggregate"], cached["offset"]
+        else:
+            agg, offset = _new_aggregate(), 0
+    else:
+        agg, offset = _new_aggregate(), 0
+
+    if compressed:
+        with gzip.open(path, "rb") as f:
+            lines = (line for line in f)
+            _aggregate_lines(lines, agg, since, until)
+        offset = stat.st_size
+    else:
+        with open(path, "rb") as f:
+            for lines, offset in _read_lines(f, offset):
+                _aggregate_lines(lines, agg, since, until)
+    entry.update({"offset": offset, "aggregate": agg})
+    return entry
+
+def _aggregate_file_task(args: Tuple[str, Optional[str], Optional[str], Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    return aggregate_file(*args)
+
+def find_logs(paths: List[str]) -> List[str]:
+    """Expand directories into the .jsonl and rotated .jsonl.N[.gz] files inside them."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if ".jsonl" in name and not name.endswith((".tmp", ".lock")):
+                    files.append(os.path.join(path, name))
+        else:
+            files.append(path)
+    return files
+
+def build_report(paths: List[str], since: Optional[str] = None, until: Optional[str] = None,
+                 workers: int = 1, cache_path: Optional[str] = None) -> Dict[str, Any]:
+    """Aggregate every log under `paths` into totals per dimension."""
+    files = find_logs(paths)
+    cache: Dict[str, Any] = {}
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, "rb") as f:
+            cache = _loads(f.read())
+
+    tasks = [(path, since, until, cache.get(os.path.abspath(path))) for path in files]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            entries = list(pool.map(_aggregate_file_task, tasks))
+    else:
+        entries = [_aggregate_file_task(task) for task in tasks]
+
+    report = _new_aggregate()
+    for entry in entries:
+        _merge(report, entry["aggregate"])
+
+    if cache_path:
+        cache = {os.path.abspath(path): entry for path, entry in zip(files, entries)}
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f, separators=(",", ":"))
+        os.replace(tmp_path, cache_path)
+    report["files"] = len(files)
+    return report
+
+# -------------------------
+# Output
+# -------------------------
+
+def _row(values: List[float]) -> Dict[str, Any]:
+    n, prompt, completion, total, cost = values
+    return {"interactions": n, "prompt_tokens": prompt, "completion_tokens": completion,
+            "total_tokens": total, "cost": round(cost, 6)}
+
+def format_report(report: Dict[str, Any], group_by: List[str], top: Optional[int] = None) -> str:
+    lines = [f"📊 Token usage report: {report['files']} files, {report['total'][0]:,} interactions"]
+    if report["errors"]:
+        lines.append(f"⚠️ {report['errors']:,} unreadable lines skipped")
+    n, prompt, completion, total, cost = report["total"]
+    lines.append(f"Total: {total:,} tokens ({prompt:,} prompt / {completion:,} completion), ${cost:,.4f}")
+    for dim in group_by:
+        rows = report[dim].items()
+        # Time dimensions read best in order; the others by cost
+        ordered = sorted(rows) if dim in ("hour", "day") else sorted(rows, key=lambda kv: kv[1][4], reverse=True)
+        if top:
+            ordered = ordered[:top]
+        lines.append("")
+        lines.append(f"By {dim}:")
+        lines.append(f"  {dim:<24} {'calls':>10} {'tokens':>14} {'cost ($)':>12}")
+        for key, (n, _, _, total, cost) in ordered:
+            lines.append(f"  {key[:24]:<24} {n:>10,} {total:>14,} {cost:>12,.4f}")
+    return "\n".join(lines)
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("paths", nargs="+", help="log files or directories")
+    parser.add_argument("--group-by", nargs="+", choices=DIMENSIONS, default=["model", "project", "day"])
+    parser.add_argument("--since", help="ISO date or time, inclusive (e.g. 2026-10-01)")
+    parser.add_argument("--until", help="ISO date or time, exclusive")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes for parsing files")
+    parser.add_argument("--cache", help="file for per-log aggregates, so unchanged logs are not parsed again")
+    parser.add_argument("--top", type=int, help="show only the first N rows per group")
+    parser.add_argument("--format", choices=("table", "json"), default="table")
+
+def run(args: argparse.Namespace) -> int:
+    report = build_report(args.paths, args.since, args.until, args.workers, args.cache)
+    if args.format == "json":
+        print(json.dumps({
+            "files": report["files"],
+            "errors": report["errors"],
+            "total": _row(report["total"]),
+            **{dim: {key: _row(values) for key, values in report[dim].items()} for dim in args.group_by}
+        }, indent=2))
+    else:
+        print(format_report(report, args.group_by, args.top))
+    return 0
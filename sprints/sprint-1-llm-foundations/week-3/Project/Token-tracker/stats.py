@@ -0,0 +1,312 @@
+"""
+Streaming usage statistics for TokenTracker.
+Memory stays constant however many interactions are logged. Every series
+(overall, per model and per metadata value) keeps sums, log-bucketed
+histograms for percentiles, and time-slotted counters for recent windows.
+Like the totals, statistics are kept per thread and merged when read, so
+recording takes no lock; a thread's statistics are folded into one base
+when it exits.
+"""
+import math
+import threading
+import time
+from typing import Optional, Dict, Any, List, Set, Tuple
+
+from aggregation import on_thread_exit
+
+PRECISION = 0.02
+SLOT_SECONDS = 60
+
+class LogHistogram:
+    """HDR-style histogram with logarithmic buckets.
+
+    Percentiles are accurate to about `precision` (relative), and the number
+    of buckets grows only with the logarithm of the value range.
+    """
+
+    def __init__(self, precision: float = PRECISION):
+        self.precision = precision
+        self._log_base = math.log1p(precision)
+        self.counts: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def bucket(self, value: float) -> Optional[int]:
+        """Bucket index for `value` (None for zero and negative values)."""
+        return math.floor(math.log(value) / self._log_base) if value > 0 else None
+
+    def record(self, value: float, index: Optional[int] = None):
+        """Add `value`; pass its precomputed `bucket()` index to skip the logarithm."""
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value <= 0:
+            self.zeros += 1
+            return
+        if index is None:
+            index = self.bucket(value)
+        counts = self.counts
+        counts[index] = counts.get(index, 0) + 1
+
+    def merge(self, other: "LogHistogram"):
+        for index, n in dict(other.counts).items():
+            self.counts[index] = self.counts.get(index, 0) + n
+        self.zeros += other.zeros
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(pct / 100 * self.count))
+        if rank <= self.zeros:
+            return max(self.min, 0.0) if self.min <= 0 else 0.0
+        seen = self.zeros
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                # Geometric midpoint of the bucket, kept within the observed range
+                value = math.exp((index + 0.5) * self._log_base)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+class WindowedCounter:
+    """Interaction, token and cost sums over the last `slots * slot_seconds` seconds."""
+
+    def __init__(self, slot_seconds: int = SLOT_SECONDS, slots: int = 60):
+        self.slot_seconds = slot_seconds
+        self.slots = slots
+        self._epochs = [-1] * slots
+        self._interactions = [0] * slots
+        self._tokens = [0] * slots
+        self._cost = [0.0] * slots
+
+    def add(self, epoch: int, tokens: int, cost: float):
+        """Count one interaction in time slot `epoch` (`int(now // slot_seconds)`)."""
+        i = epoch % self.slots
+        if self._epochs[i] != epoch:
+            self._epochs[i] = epoch
+            self._interactions[i] = 0
+            self._tokens[i] = 0
+            self._cost[i] = 0.0
+        self._interactions[i] += 1
+        self._tokens[i] += tokens
+        self._cost[i] += cost
+
+    def merge(self, other: "WindowedCounter"):
+        """Add `other`'s slots; slots from an older epoch are replaced by newer ones."""
+        for i, epoch in enumerate(list(other._epochs)):
+            if epoch > self._epochs[i]:
+                self._epochs[i] = epoch
+                self._interactions[i] = self._tokens[i] = 0
+                self._cost[i] = 0.0
+            if epoch == self._epochs[i]:
+                self._interactions[i] += other._interactions[i]
+                self._tokens[i] += other._tokens[i]
+                self._cost[i] += other._cost[i]
+
+    def window(self, seconds: float, now: float) -> List[float]:
+        """[interactions, tokens, cost] within the last `seconds` (rounded to whole slots)."""
+        current = int(now // self.slot_seconds)
+        oldest = current - min(self.slots, max(1, math.ceil(seconds / self.slot_seconds))) + 1
+        totals = [0, 0, 0.0]
+        for i, epoch in enumerate(list(self._epochs)):
+            if oldest <= epoch <= current:
+                totals[0] += self._interactions[i]
+                totals[1] += self._tokens[i]
+                totals[2] += self._cost[i]
+        return totals
+
+class Series:
+    """Statistics for one group of interactions."""
+
+    def __init__(self):
+        self.interactions = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.tokens = LogHistogram()
+        self.costs = LogHistogram()
+        self.latency = LogHistogram()
+        self.recent = WindowedCounter()
+
+    def record(self, prompt: int, completion: int, cost: float, latency_ms: Optional[float], epoch: int,
+               buckets: Tuple[Optional[int], Optional[int], Optional[int]]):
+        self.interactions += 1
+        self.prompt_tokens += prompt
+        self.completion_tokens += completion
+        self.cost += cost
+        self.tokens.record(prompt + completion, buckets[0])
+        self.costs.record(cost, buckets[1])
+        if latency_ms is not None:
+            self.latency.record(latency_ms, buckets[2])
+        self.recent.add(epoch, prompt + completion, cost)
+
+    def merge(self, other: "Series"):
+        self.interactions += other.interactions
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cost += other.cost
+        self.tokens.merge(other.tokens)
+        self.costs.merge(other.costs)
+        self.latency.merge(other.latency)
+        self.recent.merge(other.recent)
+
+_BUCKETS = LogHistogram()  # bucket() for the default precision
+
+class _ThreadStats:
+    def __init__(self):
+        self.series: Dict[Tuple[str, str, str], Series] = {}
+        self.metadata_groups = 0
+        self.metadata_keys: Set[str] = set()
+
+class RollingStats:
+    """Per-model and per-metadata statistics with constant memory.
+
+    At most `max_keys` metadata keys and `max_groups` metadata values are
+    tracked per thread; later keys and values are counted under "(other)".
+    Only string, number and boolean metadata values are grouped.
+    """
+    OVERALL = ("overall", "", "")
+    OTHER = "(other)"
+
+    def __init__(self, max_groups: int = 256, max_keys: int = 32, window_seconds: int = 3600):
+        self.max_groups = max_groups
+        self.max_keys = max_keys
+        self.window_seconds = window_seconds
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._threads: List[_ThreadStats] = []
+        self._finished = _ThreadStats()  # threads that have exited, within the same caps
+
+    def _thread_stats(self) -> _ThreadStats:
+        local = self._local
+        if getattr(local, "registry", None) is not self._threads:
+            stats = _ThreadStats()
+            with self._lock:
+                registry = self._threads
+                registry.append(stats)
+                local.registry = registry
+            local.stats = stats
+            on_thread_exit(local, self._retire, registry, stats)
+        return local.stats
+
+    def _retire(self, registry: List[_ThreadStats], stats: _ThreadStats):
+        """Fold an exited thread's statistics into the base."""
+        with self._lock:
+            if registry is not self._threads:
+                return  # reset since
+            registry[:] = [s for s in registry if s is not stats]
+            for key, series in stats.series.items():
+                self._series(self._finished, key).merge(series)
+
+    def _series(self, stats: _ThreadStats, key: Tuple[str, str, str]) -> Series:
+        series = stats.series.get(key)
+        if series is None:
+            if key[0] == "metadata":
+                key = self._metadata_group(stats, key)
+                series = stats.series.get(key)
+            if series is None:
+                series = stats.series[key] = Series()
+                if key[0] == "metadata":
+                    stats.metadata_groups += 1
+        return series
+
+    def _metadata_group(self, stats: _ThreadStats, key: Tuple[str, str, str]) -> Tuple[str, str, str]:
+        """Series key for a new metadata value, folded into "(other)" past the caps."""
+        name = key[1]
+        if name not in stats.metadata_keys:
+            if len(stats.metadata_keys) >= self.max_keys:
+                return ("metadata", self.OTHER, self.OTHER)
+            stats.metadata_keys.add(name)
+        if stats.metadata_groups >= self.max_groups:
+            return ("metadata", name, self.OTHER)
+        return key
+
+    def record(self, model: str, prompt: int, completion: int, cost: float,
+               latency_ms: Optional[float] = None, metadata: Optional[Dict[str, Any]] = None,
+               now: Optional[float] = None):
+        now = time.time() if now is None else now
+        stats = self._thread_stats()
+        # Bucket indices are the same for every series, so compute them once
+        buckets = (
+            _BUCKETS.bucket(prompt + completion),
+            _BUCKETS.bucket(cost),
+            _BUCKETS.bucket(latency_ms) if latency_ms is not None else None
+        )
+        epoch = int(now // SLOT_SECONDS)
+        keys = [self.OVERALL, ("model", model, "")]
+        if metadata:
+            keys.extend(("metadata", str(k), str(v)) for k, v in metadata.items()
+                        if isinstance(v, (str, int, float, bool)))
+        for key in keys:
+            self._series(stats, key).record(prompt, completion, cost, latency_ms, epoch, buckets)
+
+    def reset(self):
+        with self._lock:
+            self._threads = []
+            self._finished = _ThreadStats()
+
+    def _merged(self, now: float) -> Dict[Tuple[str, str, str], Tuple[Series, List[float]]]:
+        """Every thread's series summed per key, with their sums over the recent window."""
+        merged: Dict[Tuple[str, str, str], Tuple[Series, List[float]]] = {}
+
+        def add(stats: _ThreadStats):
+            for key, series in list(stats.series.items()):
+                target, recent = merged.setdefault(key, (Series(), [0, 0, 0.0]))
+                target.merge(series)
+                for j, value in enumerate(series.recent.window(self.window_seconds, now)):
+                    recent[j] += value
+
+        with self._lock:
+            threads = list(self._threads)
+            add(self._finished)
+        for stats in threads:
+            add(stats)
+        return merged
+
+    def _describe(self, series: Series, recent: List[float]) -> Dict[str, Any]:
+        return {
+            "interactions": series.interactions,
+            "tokens": {
+                "prompt": series.prompt_tokens,
+                "completion": series.completion_tokens,
+                "total": series.prompt_tokens + series.completion_tokens,
+                "p50": series.tokens.percentile(50),
+                "p95": series.tokens.percentile(95),
+                "p99": series.tokens.percentile(99)
+            },
+            "cost": {
+                "total": series.cost,
+                "p50": series.costs.percentile(50),
+                "p95": series.costs.percentile(95)
+            },
+            "latency_ms": {
+                "p50": series.latency.percentile(50),
+                "p95": series.latency.percentile(95),
+                "p99": series.latency.percentile(99)
+            } if series.latency.count else None,
+            "recent": {"window_seconds": self.window_seconds, "interactions": recent[0],
+                       "tokens": recent[1], "cost": recent[2]}
+        }
+
+    def summary(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Overall, per-model and per-metadata statistics."""
+        now = time.time() if now is None else now
+        merged = self._merged(now)
+        result: Dict[str, Any] = {
+            "overall": self._describe(*merged.get(self.OVERALL, (Series(), [0, 0, 0.0]))),
+            "by_model": {},
+            "by_metadata": {}
+        }
+        for (kind, name, value), (series, recent) in merged.items():
+            if kind == "model":
+                result["by_model"][name] = self._describe(series, recent)
+            elif kind == "metadata":
+                result["by_metadata"].setdefault(name, {})[value] = self._describe(series, recent)
+        return result
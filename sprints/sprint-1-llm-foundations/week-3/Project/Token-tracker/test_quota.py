@@ -0,0 +1,115 @@
+import time
+
+import pytest
+
+from quota import QuotaManager, Limit, QuotaExceeded
+
+def test_admits_within_every_level():
+    quota = QuotaManager(global_limit=Limit(tokens=10000), project_limit=Limit(tokens=5000),
+                         user_limit=Limit(tokens=1000))
+    reservation = quota.acquire(400, user="alice", project="legal")
+    assert reservation.tokens == 400
+    assert quota.remaining("user", "alice")["tokens"] == pytest.approx(600, abs=1)
+    assert quota.remaining("project", "legal")["tokens"] == pytest.approx(4600, abs=1)
+    assert quota.remaining("global")["tokens"] == pytest.approx(9600, abs=1)
+    assert quota.summary()["admitted"] == 1
+
+def test_rejects_when_a_level_is_short():
+    quota = QuotaManager(user_limit=Limit(tokens=1000, period_seconds=3600))
+    quota.acquire(900, user="alice")
+    with pytest.raises(QuotaExceeded) as exc:
+        quota.acquire(500, user="alice")
+    assert (exc.value.scope, exc.value.name, exc.value.unit) == ("user", "alice", "tokens")
+    assert exc.value.retry_after > 0
+    # Other users have their own budget
+    quota.acquire(500, user="bob")
+    assert quota.summary()["rejected"] == 1
+
+def test_rejects_a_call_larger_than_the_limit():
+    quota = QuotaManager(user_limit=Limit(tokens=1000), max_wait=60)
+    with pytest.raises(QuotaExceeded) as exc:
+        quota.acquire(2000, user="alice")
+    assert exc.value.retry_after == float("inf")
+
+def test_queues_until_the_budget_refills():
+    quota = QuotaManager(user_limit=Limit(tokens=1000, period_seconds=1), max_wait=2)
+    quota.acquire(1000, user="alice")
+    started = time.monotonic()
+    quota.acquire(200, user="alice")
+    assert time.monotonic() - started >= 0.15
+    assert quota.summary()["queued"] == 1
+    assert quota.summary()["waiting"] == 0
+
+def test_settle_refunds_and_charges_the_difference():
+    quota = QuotaManager(user_limit=Limit(tokens=1000, period_seconds=3600))
+    quota.acquire(500, user="alice").settle(100)
+    assert quota.remaining("user", "alice")["tokens"] == pytest.approx(900, abs=1)
+    quota.acquire(100, user="alice").settle(700)
+    assert quota.remaining("user", "alice")["tokens"] == pytest.approx(200, abs=1)
+
+def test_failed_call_releases_its_reservation():
+    quota = QuotaManager(user_limit=Limit(tokens=1000, period_seconds=3600))
+    with pytest.raises(RuntimeError):
+        with quota.acquire(800, user="alice"):
+            raise RuntimeError("API error")
+    assert quota.remaining("user", "alice")["tokens"] == pytest.approx(1000, abs=1)
+
+def test_budgets_are_capped_and_new_names_share_other():
+    quota = QuotaManager(user_limit=Limit(tokens=1000, period_seconds=3600), max_keys=100)
+    for i in range(100):
+        quota.acquire(1000, user=f"user-{i}")  # drained, so none can be evicted
+    started = time.perf_counter()
+    quota.acquire(600, user="new-1")
+    with pytest.raises(QuotaExceeded) as exc:
+        quota.acquire(600, user="new-2")
+    assert time.perf_counter() - started < 0.05
+    assert exc.value.name == QuotaManager.OTHER
+    assert quota.summary()["tracked_budgets"] <= 101
+
+def test_idle_budgets_are_evicted_at_the_cap():
+    quota = QuotaManager(user_limit=Limit(tokens=1000, period_seconds=3600), max_keys=10)
+    for i in range(10):
+        quota.acquire(100, user=f"user-{i}").settle(0)  # fully refunded, so idle
+    quota.acquire(1000, user="new")
+    assert quota.summary()["tracked_budgets"] == 10
+    assert quota.remaining("user", "new")["tokens"] == pytest.approx(0, abs=1)
+
+def test_budgets_with_open_reservations_are_not_evicted():
+    quota = QuotaManager(user_limit=Limit(tokens=1000, period_seconds=3600), max_keys=1)
+    reservation = quota.acquire(0, user="alice")
+    quota.acquire(100, user="bob")  # alice's budget is full but held, so bob goes to (other)
+    reservation.settle(300)
+    assert quota.remaining("user", "alice")["tokens"] == pytest.approx(700, abs=1)
+
+def test_set_limit_keeps_open_reservations():
+    quota = QuotaManager(user_limit=Limit(tokens=1000, period_seconds=3600))
+    reservation = quota.acquire(400, user="alice")
+    quota.set_limit("user", "alice", Limit(tokens=2000, period_seconds=3600))
+    assert quota.remaining("user", "alice")["tokens"] == pytest.approx(1600, abs=1)
+    reservation.settle(600)
+    assert quota.remaining("user", "alice")["tokens"] == pytest.approx(1400, abs=1)
+
+def test_dependency_releases_the_reservation_when_the_endpoint_raises():
+    from fastapi import Depends, FastAPI
+    from fastapi.testclient import TestClient
+    from quota import Reservation
+
+    quota = QuotaManager(user_limit=Limit(tokens=1000, period_seconds=3600))
+    app = FastAPI()
+
+    @app.post("/fails")
+    async def fails(reservation: Reservation = Depends(quota.dependency("gpt-4o", max_tokens=100))):
+        raise RuntimeError("API error")
+
+    @app.post("/unsettled")
+    async def unsettled(reservation: Reservation = Depends(quota.dependency("gpt-4o", max_tokens=100))):
+        return {"tokens": reservation.tokens}
+
+    client = TestClient(app, raise_server_exceptions=False)
+    assert client.post("/fails", headers={"X-User-Id": "alice"}).status_code == 500
+    assert quota.remaining("user", "alice")["tokens"] == pytest.approx(1000, abs=1)
+    assert all(bucket.holds == 0 for buckets in quota._budgets.values() for bucket in buckets)
+
+    estimate = client.post("/unsettled", headers={"X-User-Id": "alice"}).json()["tokens"]
+    assert quota.remaining("user", "alice")["tokens"] == pytest.approx(1000 - estimate, abs=1)
+    assert all(bucket.holds == 0 for buckets in quota._budgets.values() for bucket in buckets)
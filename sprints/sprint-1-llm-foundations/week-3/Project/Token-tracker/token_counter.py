@@ -0,0 +1,232 @@
+"""
+Token counting for TokenTracker.
+Encodings are resolved once per model name and cached. Models tiktoken does
+not know use DEFAULT_ENCODING; when no encoding can be loaded (tiktoken is
+missing, or its BPE files cannot be downloaded) counts are approximated from
+the text length, and that outcome is cached too.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, List, Iterable, Any, Tuple
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+DEFAULT_ENCODING = "cl100k_base"
+BATCH_THREADS = min(8, os.cpu_count() or 1)
+
+_encodings: Dict[str, Optional[Any]] = {}
+_lock = threading.Lock()
+
+def _resolve(model_name: str):
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        pass  # unknown model name
+    except Exception:
+        return None  # BPE file could not be loaded
+    try:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception:
+        return None
+
+def get_encoding(model_name: str):
+    """Return the cached tiktoken encoding for `model_name`, or None if there is none."""
+    try:
+        return _encodings[model_name]
+    except KeyError:
+        pass
+    with _lock:
+        if model_name not in _encodings:
+            _encodings[model_name] = _resolve(model_name)
+        return _encodings[model_name]
+
+def approximate_tokens(text: str) -> int:
+    """Rough count (4 characters per token) used when no encoding is available."""
+    return max(1, len(text) // 4) if text else 0
+
+def count_tokens(text: str, model_name: str) -> int:
+    """Number of tokens in `text` for `model_name`.
+
+    Special tokens such as <|endoftext|> are counted as plain text.
+    """
+    if not text:
+        return 0
+    enc = get_encoding(model_name)
+    if enc is None:
+        return approximate_tokens(text)
+    return len(enc.encode_ordinary(text))
+
+def count_tokens_many(texts: Iterable[str], model_name: str, num_threads: int = BATCH_THREADS) -> List[int]:
+    """Token counts for several texts, encoded in parallel threads."""
+    texts = [text or "" for text in texts]
+    enc = get_encoding(model_name)
+    if enc is None:
+        return [approximate_tokens(text) for text in texts]
+    return [len(tokens) for tokens in enc.encode_ordinary_batch(texts, num_threads=num_threads)]
+
+# -------------------------
+# Chat requests
+# -------------------------
+# OpenAI frames every chat message with a few extra tokens and renders tool
+# definitions into the system prompt as a TypeScript-style namespace. These
+# rules follow the OpenAI cookbook and match `usage.prompt_tokens` closely for
+# text messages; images and other content parts are not counted.
+
+# (tokens per message, tokens per name) by model prefix; longest prefix wins
+MESSAGE_FRAMING = {
+    "gpt-3.5-turbo-0301": (4, -1),
+    "": (3, 1),
+}
+REPLY_PRIMING_TOKENS = 3  # every reply is primed with <|start|>assistant<|message|>
+TOOLS_OVERHEAD_TOKENS = 9
+TOOLS_SYSTEM_MESSAGE_DISCOUNT = 4  # tool definitions share the system message's framing
+TOOL_CALL_OVERHEAD_TOKENS = 3
+
+# Tool token counts, least recently used first: by tool list identity (the list is kept, so its
+# id cannot be reused while cached), and by content for equal lists built per request
+_tools_by_id: "OrderedDict[Tuple[str, int], Tuple[List[Dict[str, Any]], int]]" = OrderedDict()
+_tools_by_content: "OrderedDict[str, int]" = OrderedDict()
+_tool_lock = threading.Lock()
+_TOOL_CACHE_SIZE = 64
+
+def _framing(model_name: str):
+    prefix = max((p for p in MESSAGE_FRAMING if model_name.startswith(p)), key=len)
+    return MESSAGE_FRAMING[prefix]
+
+def _format_type(schema: Dict[str, Any], indent: int) -> str:
+    if "enum" in schema:
+        return " | ".join(json.dumps(value) for value in schema["enum"])
+    kind = schema.get("type")
+    if kind == "array":
+        return _format_type(schema.get("items") or {}, indent) + "[]"
+    if kind == "object" and schema.get("properties"):
+        return "{\n" + _format_properties(schema, indent + 2) + "\n" + " " * indent + "}"
+    if kind in ("integer", "number"):
+        return "number"
+    if kind in ("string", "boolean", "null"):
+        return kind
+    return "any"
+
+def _format_properties(schema: Dict[str, Any], indent: int) -> str:
+    required = set(schema.get("required") or [])
+    lines = []
+    for name, prop in (schema.get("properties") or {}).items():
+        if prop.get("description"):
+            lines.append(" " * indent + f"// {prop['description']}")
+        optional = "" if name in required else "?"
+        lines.append(" " * indent + f"{name}{optional}: {_format_type(prop, indent)},")
+    return "\n".join(lines)
+
+def format_tool_definitions(tools: List[Dict[str, Any]]) -> str:
+    """Render tool schemas the way they are shown to the model."""
+    lines = ["namespace functions {", ""]
+    for tool in tools:
+        function = tool.get("function", tool)
+        if function.get("description"):
+            lines.append(f"// {function['description']}")
+        parameters = function.get("parameters") or {}
+        if parameters.get("properties"):
+            lines.append(f"type {function['name']} = (_: {{")
+            lines.append(_format_properties(parameters, 0))
+            lines.append("}) => any;")
+        else:
+            lines.append(f"type {function['name']} = () => any;")
+        lines.append("")
+    lines.append("} // namespace functions")
+    return "\n".join(lines)
+
+def _cache_put(cache: OrderedDict, key, value):
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > _TOOL_CACHE_SIZE:
+        cache.popitem(last=False)
+
+def count_tool_tokens(tools: List[Dict[str, Any]], model_name: str) -> int:
+    """Tokens added to a request by its tool definitions (cached per tool list).
+
+    Reusing the same list object skips serializing it; don't mutate a tool list after counting it.
+    """
+    if not tools:
+        return 0
+    id_key = (model_name, id(tools))
+    with _tool_lock:
+        entry = _tools_by_id.get(id_key)
+        if entry is not None and entry[0] is tools:
+            _tools_by_id.move_to_end(id_key)
+            return entry[1]
+
+    key = model_name + "\0" + json.dumps(tools, sort_keys=True)
+    with _tool_lock:
+        count = _tools_by_content.get(key)
+        if count is not None:
+            _tools_by_content.move_to_end(key)
+    if count is None:
+        count = count_tokens(format_tool_definitions(tools), model_name) + TOOLS_OVERHEAD_TOKENS
+    with _tool_lock:
+        _cache_put(_tools_by_content, key, count)
+        _cache_put(_tools_by_id, id_key, (tools, count))
+    return count
+
+def _field(obj, name: str, default=None):
+    """A field of a message, tool call or content part, given as a dict or an OpenAI SDK object."""
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    value = getattr(obj, name, default)
+    return default if value is None else value
+
+def _content_text(content) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(_field(part, "text") or "" for part in content if not isinstance(part, str))
+    return ""
+
+def count_chat_tokens(messages: List[Any], tools: Optional[List[Dict[str, Any]]] = None,
+                      model_name: str = "gpt-3.5-turbo") -> int:
+    """Estimated prompt tokens for a chat completion request with these messages and tools.
+
+    Messages may be dicts or OpenAI SDK message objects (e.g. a previous response's message).
+    """
+    tokens_per_message, tokens_per_name = _framing(model_name)
+    total = REPLY_PRIMING_TOKENS
+    has_system = False
+    for message in messages:
+        total += tokens_per_message
+        role = _field(message, "role", "")
+        name = _field(message, "name")
+        total += count_tokens(role, model_name)
+        total += count_tokens(_content_text(_field(message, "content")), model_name)
+        if name:
+            total += count_tokens(name, model_name) + tokens_per_name
+        for tool_call in _field(message, "tool_calls") or []:
+            function = _field(tool_call, "function", {})
+            total += TOOL_CALL_OVERHEAD_TOKENS
+            total += count_tokens(_field(function, "name", ""), model_name)
+            total += count_tokens(_field(function, "arguments", ""), model_name)
+        has_system = has_system or role == "system"
+    if tools:
+        total += count_tool_tokens(tools, model_name)
+        if has_system:
+            total -= TOOLS_SYSTEM_MESSAGE_DISCOUNT
+    return total
+
+def reconcile_usage(estimated_prompt_tokens: int, usage) -> Dict[str, Any]:
+    """Compare an estimate with the `usage` of the response (object or dict)."""
+    actual = usage.get("prompt_tokens") if isinstance(usage, dict) else getattr(usage, "prompt_tokens", None)
+    if actual is None:
+        return {"estimated": estimated_prompt_tokens, "actual": None, "difference": None, "error_ratio": None}
+    difference = estimated_prompt_tokens - actual
+    return {
+        "estimated": estimated_prompt_tokens,
+        "actual": actual,
+        "difference": difference,
+        "error_ratio": difference / actual if actual else 0.0
+    }
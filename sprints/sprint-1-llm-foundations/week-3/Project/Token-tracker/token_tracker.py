@@ -1,102 +1,228 @@
 import time
 import json
 import os
+import threading
+from collections import deque
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Iterable
 
-try:
-    import tiktoken
-    TIKTOKEN_AVAILABLE = True
-except ImportError:
-    TIKTOKEN_AVAILABLE = False
+from aggregation import ThreadLocalTotals, SharedTotals
+from log_sink import JSONLSink
+from metrics import TokenMetrics
+from pricing import PricingTable
+from stats import RollingStats
+from token_counter import TIKTOKEN_AVAILABLE, count_tokens, count_tokens_many, count_chat_tokens, reconcile_usage
+
+TOKEN_TYPES = ("prompt", "completion", "cached_prompt")
 
 class TokenTracker:
     """
     Simple token tracker for monitoring token usage and costs.
+
+    Safe to share between threads. Pass `shared_totals_path` to also add every
+    interaction to totals shared with other processes using the same path.
+    Only the last `retention` raw records are kept in memory; totals and
+    percentiles cover every interaction. Prices come from `pricing.json`
+    unless a PricingTable is passed. Pass `metrics` to also count every
+    interaction in Prometheus metrics.
     """
-    DEFAULT_PRICING = {
-        "gpt-3.5-turbo": {"prompt": 0.0015, "completion": 0.002},
-        "gpt-4": {"prompt": 0.03, "completion": 0.06},
-    }
 
-    def __init__(self, model_name: str = "gpt-3.5-turbo", log_path: Optional[str] = None):
+    def __init__(self, model_name: str = "gpt-3.5-turbo", log_path: Optional[str] = None,
+                 sink: Optional[JSONLSink] = None, shared_totals_path: Optional[str] = None,
+                 retention: int = 1000, pricing: Optional[PricingTable] = None,
+                 metrics: Optional[TokenMetrics] = None):
         self.model_name = model_name
         self.log_path = log_path
-        self.tokens = {"prompt": 0, "completion": 0, "total": 0}
-        self.cost = 0.0
+        self.sink = sink or (JSONLSink(log_path) if log_path else None)
+        self.shared = SharedTotals(shared_totals_path) if shared_totals_path else None
+        self._totals = ThreadLocalTotals()
+        self.stats = RollingStats()
+        self._lock = threading.Lock()
         self.start_time = time.time()
-        self.interactions = []
-        self.pricing = self.DEFAULT_PRICING.copy()
+        self.interactions = deque(maxlen=retention)
+        self.reconciliation = {"calls": 0, "estimated": 0, "actual": 0}
+        self.pricing = pricing or PricingTable.load()
+        self.metrics = metrics
 
     def count_tokens(self, text: str) -> int:
-        if not text:
-            return 0
-        if TIKTOKEN_AVAILABLE:
-            try:
-                enc = tiktoken.encoding_for_model(self.model_name)
-                return len(enc.encode(text))
-            except Exception:
-                pass
-        return max(1, len(text) // 4)
-
-    def get_price(self, token_type: str) -> float:
-        return self.pricing.get(self.model_name, {}).get(token_type, 0.001)
-
-    def log(self, prompt: str, completion: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        pt = self.count_tokens(prompt)
-        ct = self.count_tokens(completion)
-        total = pt + ct
-        pcost = (pt / 1000) * self.get_price("prompt")
-        ccost = (ct / 1000) * self.get_price("completion")
-        tcost = pcost + ccost
-
-        self.tokens["prompt"] += pt
-        self.tokens["completion"] += ct
-        self.tokens["total"] += total
-        self.cost += tcost
+        return count_tokens(text, self.model_name)
+
+    def count_tokens_many(self, texts: Iterable[str]) -> List[int]:
+        return count_tokens_many(texts, self.model_name)
+
+    def count_chat_tokens(self, messages: List[Any], tools: Optional[List[Dict[str, Any]]] = None) -> int:
+        """Estimated prompt tokens for a chat request, including message framing and tool schemas."""
+        return count_chat_tokens(messages, tools, self.model_name)
+
+    @property
+    def tokens(self) -> Dict[str, int]:
+        return self._totals.totals()["tokens"]
+
+    @property
+    def cost(self) -> float:
+        return self._totals.totals()["cost"]
+
+    def reconcile(self, estimated_prompt_tokens: int, usage) -> Dict[str, Any]:
+        """Compare a pre-flight estimate with the response's `usage` and keep running totals."""
+        result = reconcile_usage(estimated_prompt_tokens, usage)
+        if result["actual"] is not None:
+            with self._lock:
+                self.reconciliation["calls"] += 1
+                self.reconciliation["estimated"] += result["estimated"]
+                self.reconciliation["actual"] += result["actual"]
+        return result
+
+    def get_price(self, token_type: str, model_name: Optional[str] = None) -> float:
+        """Price per 1K tokens of `token_type` ('prompt', 'completion' or 'cached_prompt').
+
+        Returns 0.0 for an unpriced model; raises ValueError for any other token type.
+        """
+        if token_type not in TOKEN_TYPES:
+            raise ValueError(f"Unknown token type {token_type!r}; expected one of {', '.join(TOKEN_TYPES)}")
+        price = self.pricing.resolve(model_name or self.model_name)
+        if price is None:
+            return 0.0
+        if token_type == "cached_prompt" and price.cached_prompt is None:
+            return price.prompt
+        return getattr(price, token_type)
+
+    def update_pricing(self, model_name: str, prompt_price: float, completion_price: float,
+                       cached_prompt_price: Optional[float] = None):
+        """Set the price per 1K prompt and completion tokens for a model."""
+        self.pricing.set_price(model_name, prompt_price, completion_price, cached_prompt_price)
+
+    def log(self, prompt: str, completion: str, metadata: Optional[Dict[str, Any]] = None,
+            latency_ms: Optional[float] = None) -> Dict[str, Any]:
+        """Record an interaction, counting the tokens of its prompt and completion text."""
+        return self.record_usage(self.count_tokens(prompt), self.count_tokens(completion),
+                                 metadata=metadata, latency_ms=latency_ms)
+
+    def record_usage(self, prompt_tokens: int, completion_tokens: int, model_name: Optional[str] = None,
+                     metadata: Optional[Dict[str, Any]] = None, latency_ms: Optional[float] = None,
+                     cached_tokens: int = 0, details: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Record an interaction from known token counts, such as an API response's `usage`.
+
+        `details` are extra fields stored on the record (e.g. whether it was streamed).
+        """
+        model_name = model_name or self.model_name
+        pt, ct = prompt_tokens, completion_tokens
+        price = self.pricing.resolve(model_name)
+        pcost, ccost = price.cost(pt, ct, cached_tokens) if price else (0.0, 0.0)
+        tokens = {"prompt": pt, "completion": ct, "total": pt + ct}
+        if cached_tokens:
+            tokens["cached"] = cached_tokens
+        return self._add_record(model_name, tokens, {"prompt": pcost, "completion": ccost, "total": pcost + ccost},
+                                metadata, latency_ms, details)
+
+    def record_images(self, n: int, model_name: str = "dall-e-3", size: str = "1024x1024",
+                      quality: str = "standard", metadata: Optional[Dict[str, Any]] = None,
+                      latency_ms: Optional[float] = None) -> Dict[str, Any]:
+        """Record an image generation call of `n` images."""
+        price = self.pricing.image_price(model_name, size, quality)
+        cost = n * price if price is not None else 0.0
+        return self._add_record(model_name, {"prompt": 0, "completion": 0, "total": 0},
+                                {"images": cost, "total": cost}, metadata, latency_ms,
+                                {"images": {"n": n, "size": size, "quality": quality}})
+
+    def _add_record(self, model_name: str, tokens: Dict[str, int], cost: Dict[str, float],
+                    metadata: Optional[Dict[str, Any]], latency_ms: Optional[float],
+                    details: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        pt, ct, tcost = tokens["prompt"], tokens["completion"], cost["total"]
+        self._totals.add(pt, ct, tcost)
+        if self.shared:
+            self.shared.add(pt, ct, tcost)
+        self.stats.record(model_name, pt, ct, tcost, latency_ms, metadata)
 
         record = {
             "timestamp": datetime.now().isoformat(),
-            "model": self.model_name,
-            "tokens": {"prompt": pt, "completion": ct, "total": total},
-            "cost": {"prompt": pcost, "completion": ccost, "total": tcost},
+            "model": model_name,
+            "tokens": tokens,
+            "cost": cost,
         }
+        if latency_ms is not None:
+            record["latency_ms"] = latency_ms
+        if details:
+            record.update(details)
         if metadata:
             record["metadata"] = metadata
         self.interactions.append(record)
-        if self.log_path:
-            self._save(record)
+        if self.sink:
+            self.sink.write(record)
+        if self.metrics:
+            self.metrics.record(record)
         return record
 
-    def _save(self, record: Dict[str, Any]):
-        try:
-            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
-            with open(self.log_path, "a") as f:
-                f.write(json.dumps(record) + "\n")
-        except Exception:
-            pass
+    def record_error(self, model_name: Optional[str] = None, error: str = "error",
+                     metadata: Optional[Dict[str, Any]] = None):
+        """Count a failed call (e.g. by exception class name) in the metrics."""
+        if self.metrics:
+            self.metrics.record_error(model_name or self.model_name, error, metadata)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every logged record has been written to the log file."""
+        return self.sink.flush(timeout) if self.sink else True
+
+    def close(self):
+        """Write pending log records, stop the log writer and release the shared totals."""
+        if self.sink:
+            self.sink.close()
+        if self.shared:
+            self.shared.close()
 
     def summary(self) -> Dict[str, Any]:
+        totals = self._totals.totals()
+        stats = self.stats.summary()
         return {
             "model": self.model_name,
-            "tokens": self.tokens,
-            "cost": self.cost,
+            "tokens": totals["tokens"],
+            "cost": totals["cost"],
             "duration_seconds": time.time() - self.start_time,
-            "interactions": len(self.interactions),
+            "interactions": totals["interactions"],
+            "percentiles": {
+                "tokens": {p: stats["overall"]["tokens"][p] for p in ("p50", "p95", "p99")},
+                "cost": {p: stats["overall"]["cost"][p] for p in ("p50", "p95")},
+                "latency_ms": stats["overall"]["latency_ms"],
+            },
+            "by_model": {model: {"interactions": s["interactions"], "tokens": s["tokens"]["total"],
+                                 "cost": s["cost"]["total"]} for model, s in stats["by_model"].items()},
+            "estimate_error_ratio": self._estimate_error_ratio(),
+            "pricing_version": self.pricing.version,
+            "unpriced_models": self.pricing.unpriced_models,
+            "log": self.sink.stats() if self.sink else None,
+            "all_processes": self.shared.totals() if self.shared else None,
         }
 
+    def _estimate_error_ratio(self) -> Optional[float]:
+        actual = self.reconciliation["actual"]
+        if not actual:
+            return None
+        return (self.reconciliation["estimated"] - actual) / actual
+
     def reset(self):
-        self.tokens = {"prompt": 0, "completion": 0, "total": 0}
-        self.cost = 0.0
+        """Reset this tracker's totals; shared totals are kept (see SharedTotals.reset)."""
+        self._totals.reset()
+        self.stats.reset()
         self.start_time = time.time()
-        self.interactions = []
+        self.interactions.clear()
+        self.reconciliation = {"calls": 0, "estimated": 0, "actual": 0}
 
     def export(self, path: str) -> str:
-        data = {"summary": self.summary(), "interactions": self.interactions}
+        """Write the summary, full statistics and the retained raw records to `path`."""
+        data = {"summary": self.summary(), "stats": self.stats.summary(), "interactions": list(self.interactions)}
         try:
             os.makedirs(os.path.dirname(path), exist_ok=True)
             with open(path, "w") as f:
-                json.dump(data, f, indent=2)
+                json.dump(data, f, separators=(",", ":"))
             return path
         except Exception:
             return ""
+
+if __name__ == "__main__":
+    import argparse
+    import report
+
+    parser = argparse.ArgumentParser(prog="token_tracker", description="TokenTracker command line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report.add_arguments(commands.add_parser("report", help="summarize usage from JSONL logs"))
+    args = parser.parse_args()
+    raise SystemExit(report.run(args))
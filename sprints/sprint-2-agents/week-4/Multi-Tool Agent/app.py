@@ -1,7 +1,29 @@
 """
 Main entry point for the Legal Contract Analysis Tool.
 """
-from ui.cli import run_cli
+import argparse
+
+def main():
+    parser = argparse.ArgumentParser(description="Legal Contract Analysis Assistant")
+    parser.add_argument("--batch", metavar="DIR", help="review every contract in DIR without the interactive shell")
+    parser.add_argument("--out", default="results.jsonl", help="JSONL file for batch results (default: results.jsonl)")
+    parser.add_argument("--workers", type=int, help="number of worker processes for batch mode")
+    parser.add_argument("--rpm", type=int, help="model requests per minute shared by all batch workers")
+    parser.add_argument("--serve", action="store_true", help="run the multi-user HTTP service instead of the shell")
+    parser.add_argument("--host", default="127.0.0.1", help="address for --serve (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="port for --serve (default: 8000)")
+    args = parser.parse_args()
+
+    if args.serve:
+        import uvicorn
+        from ui.server import app
+        uvicorn.run(app, host=args.host, port=args.port)
+    elif args.batch:
+        from ui.batch import run_batch
+        run_batch(args.batch, args.out, workers=args.workers, requests_per_minute=args.rpm)
+    else:
+        from ui.cli import run_cli
+        run_cli()
 
 if __name__ == "__main__":
-    run_cli()
+    main()
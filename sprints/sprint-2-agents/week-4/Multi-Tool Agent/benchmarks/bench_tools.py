@@ -0,0 +1,57 @@
+"""
+Micro-benchmarks for the local hot paths of the legal assistant.
+
+Each benchmark runs over a synthetic contract of every configured size
+(see conftest.py), so the results for one function form a scaling curve.
+Clause-level functions are timed over all clauses of the contract.
+"""
+import pytest
+
+from core.reasoning import ReasoningAnalyzer
+from tools.analysis_tools import classify_clause
+from tools.document_tools import extract_clauses, read_pdf, summarize_document
+from tools.search_tools import search_document
+
+def _group(benchmark, name, size):
+    benchmark.group = name
+    benchmark.extra_info["size"] = size
+
+def bench_extract_clauses(benchmark, size, contract_text):
+    _group(benchmark, "extract_clauses", size)
+    result = benchmark(extract_clauses, contract_text)
+    assert result.clauses
+
+def bench_search_document(benchmark, size, contract_text):
+    _group(benchmark, "search_document", size)
+    result = benchmark(search_document, contract_text, "liability")
+    assert result.matches
+
+def bench_summarize_document(benchmark, size, contract_text):
+    _group(benchmark, "summarize_document", size)
+    result = benchmark(summarize_document, contract_text)
+    assert result.overview
+
+def bench_classify_clause(benchmark, size, contract_clauses):
+    _group(benchmark, "classify_clause", size)
+    results = benchmark(lambda: [classify_clause(c) for c in contract_clauses])
+    assert len(results) == len(contract_clauses)
+
+def bench_analyze_clause_reasoning(benchmark, size, contract_clauses):
+    _group(benchmark, "analyze_clause_reasoning", size)
+    results = benchmark(lambda: [ReasoningAnalyzer.analyze_clause_reasoning(c) for c in contract_clauses])
+    assert len(results) == len(contract_clauses)
+
+def bench_suggest_analysis_strategy(benchmark, size, contract_text):
+    _group(benchmark, "suggest_analysis_strategy", size)
+    result = benchmark(ReasoningAnalyzer.suggest_analysis_strategy, contract_text)
+    assert result["document_type"] == "service_agreement"
+
+def bench_read_pdf(benchmark, size, contract_pdf):
+    _group(benchmark, "read_pdf", size)
+    text = benchmark.pedantic(read_pdf, args=(contract_pdf,), rounds=3, iterations=1)
+    assert not text.startswith("Error reading file")
+
+def bench_analyze_contract(benchmark, size, contract_clauses):
+    _group(benchmark, "analyze_contract", size)
+    table = benchmark(ReasoningAnalyzer.analyze_contract, contract_clauses)
+    assert len(table) == len(contract_clauses)
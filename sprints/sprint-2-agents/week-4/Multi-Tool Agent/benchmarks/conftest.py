@@ -0,0 +1,45 @@
+"""
+Fixtures for the tool micro-benchmarks.
+
+Contract sizes come from CONTRACT_BENCH_SIZES (default "10KB,100KB,1MB");
+use e.g. CONTRACT_BENCH_SIZES=10KB,100KB,1MB,10MB,50MB for full scaling curves.
+"""
+import os
+import sys
+
+import pytest
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))  # project root, for core/ tools/ models/
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_contracts import generate_contract, parse_size, split_clauses, write_pdf
+
+SIZES = [s.strip() for s in os.getenv("CONTRACT_BENCH_SIZES", "10KB,100KB,1MB").split(",") if s.strip()]
+
+_contracts = {}
+
+def contract_for(size: str) -> str:
+    """Generate (once per session) a synthetic contract of the given size."""
+    if size not in _contracts:
+        _contracts[size] = generate_contract(parse_size(size))
+    return _contracts[size]
+
+@pytest.fixture(params=SIZES)
+def size(request):
+    return request.param
+
+@pytest.fixture
+def contract_text(size):
+    return contract_for(size)
+
+@pytest.fixture
+def contract_clauses(size):
+    return split_clauses(contract_for(size))
+
+@pytest.fixture
+def contract_pdf(size, tmp_path_factory):
+    path = tmp_path_factory.getbasetemp() / f"contract_{size}.pdf"
+    if not path.exists():
+        write_pdf(contract_for(size), str(path))
+    return str(path)
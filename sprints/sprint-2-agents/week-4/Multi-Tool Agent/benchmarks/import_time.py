@@ -0,0 +1,95 @@
+"""
+Import-time benchmark for the Legal Contract Analysis Tool entry points.
+
+Runs `python -X importtime` for each entry point in a fresh interpreter and
+records the cumulative import cost plus the heaviest modules it pulled in.
+
+Usage:
+    python benchmarks/import_time.py [--repeat 5] [--out benchmarks/results/import_time.json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, List, Any
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules imported when each entry point starts
+ENTRY_POINTS = {
+    "app": "app",
+    "cli": "ui.cli",
+    "batch_worker": "ui.batch",
+    "agent": "core.agent",
+    "tools": "tools.document_tools"
+}
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def measure(module: str) -> Dict[str, Any]:
+    """Import `module` in a fresh interpreter and parse its -X importtime report."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    modules = []
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), match[3], match[4]
+        modules.append((name, self_us, cumulative_us))
+        if len(indent) <= 1:  # top-level import
+            total_us += cumulative_us
+
+    heaviest = sorted(modules, key=lambda m: m[2], reverse=True)[:10]
+    return {
+        "total_ms": total_us / 1000,
+        "modules_imported": len(modules),
+        "heaviest": [{"module": n, "self_ms": s / 1000, "cumulative_ms": c / 1000} for n, s, c in heaviest]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per entry point (median is reported)")
+    parser.add_argument("--out", help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "entry_points": {}
+    }
+    for label, module in ENTRY_POINTS.items():
+        runs: List[Dict[str, Any]] = [measure(module) for _ in range(args.repeat)]
+        totals = [r["total_ms"] for r in runs]
+        median_run = sorted(runs, key=lambda r: r["total_ms"])[len(runs) // 2]
+        results["entry_points"][label] = {
+            "module": module,
+            "median_ms": statistics.median(totals),
+            "min_ms": min(totals),
+            "max_ms": max(totals),
+            "modules_imported": median_run["modules_imported"],
+            "heaviest": median_run["heaviest"]
+        }
+        top = median_run["heaviest"][1] if len(median_run["heaviest"]) > 1 else median_run["heaviest"][0]
+        print(f"{label:<14} {module:<24} {statistics.median(totals):8.1f} ms "
+              f"({median_run['modules_imported']} modules, heaviest import: {top['module']})")
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Scaling report for the tool micro-benchmarks.
+
+Reads a pytest-benchmark JSON file and fits, per function, the log-log slope
+of mean time against contract size (1.0 = linear, 2.0 = quadratic).
+
+Usage:
+    pytest benchmarks --benchmark-json=benchmarks/results/tools.json
+    python benchmarks/scaling_report.py benchmarks/results/tools.json
+"""
+import argparse
+import json
+import math
+import os
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_contracts import parse_size
+
+def loglog_slope(points: List[Tuple[float, float]]) -> float:
+    """Least-squares slope of log(time) against log(size)."""
+    xs = [math.log(size) for size, _ in points]
+    ys = [math.log(seconds) for _, seconds in points]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    if not var_x:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit scaling curves from pytest-benchmark results")
+    parser.add_argument("results", help="file written by pytest --benchmark-json")
+    args = parser.parse_args()
+
+    with open(args.results, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    curves: Dict[str, List[Tuple[float, float]]] = defaultdict(list)
+    for bench in data["benchmarks"]:
+        size = bench["extra_info"].get("size") or bench["params"]["size"]
+        curves[bench["group"]].append((parse_size(size), bench["stats"]["mean"]))
+
+    print(f"{'function':<28} {'sizes':>6} {'smallest':>12} {'largest':>12} {'slope':>7}")
+    for name, points in sorted(curves.items()):
+        points.sort()
+        slope = loglog_slope(points) if len(points) > 1 else float("nan")
+        warning = "  ⚠️ superlinear" if slope > 1.2 else ""
+        print(f"{name:<28} {len(points):>6} {points[0][1] * 1000:>10.2f}ms {points[-1][1] * 1000:>10.2f}ms "
+              f"{slope:>7.2f}{warning}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Synthetic contract generator for the tool micro-benchmarks.
+
+Builds deterministic, contract-shaped text of any size by cycling through
+clause templates (with the risk keywords the tools look for), plus a minimal
+PDF writer so `read_pdf` can be benchmarked without extra dependencies.
+"""
+import random
+import re
+from typing import List
+
+SECTION_TITLES = [
+    "Definitions", "Services", "Term and Termination", "Fees and Payment", "Data Privacy",
+    "Confidentiality", "Intellectual Property", "Warranties", "Limitation of Liability",
+    "Indemnification", "Governing Law and Jurisdiction", "Miscellaneous"
+]
+
+CLAUSE_TEMPLATES = [
+    "The Company shall provide the Services described in Schedule {n} in accordance with generally accepted industry standards and the service levels set out therein.",
+    "Either party may terminate this Agreement upon {days} days' written notice; the Company may terminate immediately and without notice at its sole discretion if the Client commits a material breach.",
+    "The Client shall pay all invoices within {days} days of receipt. Late payments shall accrue interest at {pct}% per month, and the Company may suspend the Services until payment is received.",
+    "The Company collects data from the Client and its users, including personal information, device identifiers and usage patterns, and may share such data with third-party processors.",
+    "Each party shall hold the other party's Confidential Information in strict confidence and shall not disclose it to any third party for a period of {years} years after termination.",
+    "All intellectual property rights in the deliverables shall vest in the Company. The Client receives a non-exclusive, non-transferable licence to use the deliverables for internal purposes.",
+    "The Services are provided as-is with no warranty of any kind, whether express or implied, including any warranty of merchantability or fitness for a particular purpose.",
+    "In no event shall the Company's aggregate liability exceed the fees paid in the {months} months preceding the claim, and the Company shall not be liable for indirect or consequential damages.",
+    "The Client shall indemnify and hold harmless the Company against all claims, losses and liquidated damages arising from the Client's use of the Services.",
+    "This Agreement is governed by the laws of the State of {state}, and the parties submit to the exclusive jurisdiction of its courts for any dispute.",
+    "This Agreement constitutes the entire agreement between the parties and supersedes all prior negotiations, representations and agreements, whether written or oral."
+]
+
+STATES = ["California", "New York", "Delaware", "Texas", "Washington"]
+
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMG]?B)?\s*$", re.IGNORECASE)
+_UNITS = {None: 1, "B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+def parse_size(size: str) -> int:
+    """Parse sizes such as '10KB', '1.5MB' or '2048' into bytes."""
+    match = _SIZE.match(size)
+    if not match:
+        raise ValueError(f"Invalid size: {size!r}")
+    unit = match[2].upper() if match[2] else None
+    return int(float(match[1]) * _UNITS[unit])
+
+def generate_contract(size_bytes: int, seed: int = 0) -> str:
+    """Generate a contract of roughly `size_bytes` characters, split into paragraphs by blank lines."""
+    rng = random.Random(seed)
+    parts: List[str] = ["MASTER SERVICES AGREEMENT\n\nThis Agreement is entered into between Example Corporation (the \"Company\") and the Client."]
+    length = len(parts[0])
+    section = 0
+    while length < size_bytes:
+        section += 1
+        title = SECTION_TITLES[(section - 1) % len(SECTION_TITLES)]
+        paragraph_lines = [f"{section}. {title.upper()}"]
+        for sub in range(1, rng.randint(2, 4) + 1):
+            template = rng.choice(CLAUSE_TEMPLATES)
+            clause = template.format(
+                n=rng.choice("ABCD"), days=rng.choice([10, 15, 30, 60]), pct=rng.choice([1, 1.5, 2]),
+                years=rng.randint(1, 5), months=rng.choice([3, 6, 12]), state=rng.choice(STATES)
+            )
+            paragraph_lines.append(f"{section}.{sub} {clause}")
+        paragraph = "\n\n".join(paragraph_lines)
+        parts.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(parts)[:size_bytes]
+
+def split_clauses(text: str) -> List[str]:
+    """Split generated text into clause paragraphs, as `extract_clauses` does."""
+    return [p.strip() for p in text.split("\n\n") if p.strip()]
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_pdf(text: str, path: str, lines_per_page: int = 60, chars_per_line: int = 95):
+    """Write `text` to a minimal, valid single-font PDF at `path`."""
+    lines: List[str] = []
+    for paragraph in text.split("\n"):
+        while len(paragraph) > chars_per_line:
+            lines.append(paragraph[:chars_per_line])
+            paragraph = paragraph[chars_per_line:]
+        lines.append(paragraph)
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[""]]
+
+    objects: List[bytes] = []
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    catalog = add(b"")  # placeholder, filled in once the page tree exists
+    page_tree = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    page_ids = []
+    for page_lines in pages:
+        stream = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({_pdf_escape(l)}) '" for l in page_lines) + " ET"
+        data = stream.encode("latin-1", "replace")
+        content = add(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 842] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (page_tree, content, font)
+        ))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % page_tree
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects[page_tree - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    with open(path, "wb") as f:
+        f.write(bytes(out))
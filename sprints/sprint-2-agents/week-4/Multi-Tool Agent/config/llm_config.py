@@ -1,13 +1,73 @@
 import os
-from openai import OpenAI
 
 # OpenAI Client Configuration
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# The client (and the openai package) is created on first use so that commands
+# such as `help` or `list`, and batch worker start-up, don't pay for it.
+_client = None
+
+def get_client():
+    """Return the shared OpenAI client, creating it on first use."""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+def __getattr__(name):
+    # PEP 562: keep `from config.llm_config import client` working without an import-time client
+    if name == "client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Model Configuration
 DEFAULT_MODEL = "gpt-4o"  # Using a more capable model for complex legal analysis
 MAX_REASONING_STEPS = 10
 
+# Model routing (core/router.py): intermediate tool-selection turns use the small
+# model, final answers and low-confidence turns the strong one (DEFAULT_MODEL).
+# Set LEGAL_AGENT_ROUTING=0 to send every turn to DEFAULT_MODEL.
+ROUTING_ENABLED = os.getenv("LEGAL_AGENT_ROUTING", "1") != "0"
+ROUTER_SMALL_MODEL = "gpt-4o-mini"
+
+# Per-run budget (None disables a limit); see core/budget.py
+MAX_RUN_TOKENS = 200_000
+MAX_RUN_COST_USD = 1.00
+MAX_RUN_WALL_SECONDS = 300
+MAX_DUPLICATE_ROUNDS = 2  # consecutive iterations of only repeated tool calls
+
+# Tool result cache for pure tools; set LEGAL_AGENT_TOOL_CACHE to a file path to persist across sessions
+TOOL_CACHE_SIZE = 512
+TOOL_CACHE_PATH = os.getenv("LEGAL_AGENT_TOOL_CACHE")
+
+# Local triage (core/triage.py): which clauses go into the opening prompt
+TRIAGE_MIN_RISK_SCORE = 2     # ReasoningAnalyzer risk score; keyword-classifier "high" always qualifies
+TRIAGE_MAX_CLAUSES = 25
+TRIAGE_CLAUSE_CHARS = 1500    # longer clauses are truncated in the prompt (get_clause has the full text)
+TRIAGE_INDEX_CHARS = 2000
+CLAUSE_STORE_DOCUMENTS = 32   # triaged documents kept for get_clause
+
+# Saved CLI sessions (`sessions`, `resume <session>`)
+SESSION_DIR = os.getenv("LEGAL_AGENT_SESSION_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sessions"))
+
+# HTTP service (app.py --serve)
+SERVICE_AGENT_THREADS = 16         # concurrent agent runs across all tenants
+SERVICE_PDF_WORKERS = 2            # processes for PDF parsing
+TENANT_MAX_CONCURRENT_RUNS = 2     # concurrent agent runs per tenant
+TENANT_QUEUE_TIMEOUT_SECONDS = 30  # wait for a free slot before answering 429
+SERVICE_MAX_SESSIONS = 1000        # sessions kept in memory; older ones are saved and evicted
+SERVICE_SESSION_IDLE_SECONDS = 1800  # evict sessions idle for longer (they reload from the store)
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+
+# Batch mode (app.py --batch); the request rate is shared by all worker processes
+BATCH_WORKERS = 4
+BATCH_REQUESTS_PER_MINUTE = 60
+
+# Pricing in USD per 1M tokens
+MODEL_PRICING = {
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+}
+
 # System Message
 LEGAL_ASSISTANT_SYSTEM_MESSAGE = """You are an advanced legal contract analysis assistant. 
 Your capabilities include:
@@ -46,122 +106,19 @@ Response guidelines and safeguards:
 Always maintain a helpful, professional tone. Your role is to assist understanding, not to make legal decisions or replace expert legal counsel.
 """
 
+# Reasoning instructions appended to the system message. Together with the tool
+# schemas this forms the static prompt prefix shared by every call; keep it free
+# of per-run content (ids, dates, contract text) so provider prompt caching applies.
+REASONING_REQUIREMENTS = """
+
+REASONING REQUIREMENTS:
+- Always explain your thought process step by step
+- When using tools, explain why you chose that specific tool
+- When making decisions, consider alternatives and explain your choice
+- Provide confidence levels for your analysis
+- Flag any assumptions you're making
+- Explain the reasoning behind flagging clauses for review
+"""
+
 # Tool Configuration
-tools = [
-    {
-        "type": "function",
-        "function": {
-            "name": "extract_clauses",
-            "description": "Extract clauses from a legal text",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "text": {"type": "string"}
-                },
-                "required": ["text"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "classify_clause",
-            "description": "Classify a legal clause by type and risk",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "clause": {"type": "string"}
-                },
-                "required": ["clause"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "flag_for_review",
-            "description": "Flag a clause as risky",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "clause": {"type": "string"},
-                    "reason": {"type": "string"}
-                },
-                "required": ["clause", "reason"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "read_pdf",
-            "description": "Extract text from a PDF file",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "file_path": {"type": "string"}
-                },
-                "required": ["file_path"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "summarize_document",
-            "description": "Generate a summary of a legal document",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "text": {"type": "string"},
-                    "max_length": {"type": "integer"}
-                },
-                "required": ["text"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "explain_clause",
-            "description": "Explain a legal clause in simple terms",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "clause": {"type": "string"}
-                },
-                "required": ["clause"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "search_document",
-            "description": "Search for specific terms or topics in the document",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "text": {"type": "string"},
-                    "query": {"type": "string"}
-                },
-                "required": ["text", "query"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "save_conversation_context",
-            "description": "Save the context of the current conversation for later reference",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "topic": {"type": "string"},
-                    "content": {"type": "string"}
-                },
-                "required": ["topic", "content"]
-            }
-        }
-    }
-]
\ No newline at end of file
+# Tool schemas are derived from the tool function signatures; see tools/registry.py
@@ -1,189 +1,369 @@
 """
 Core agent functionality for the legal assistant.
 """
-import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import os
 
 # Import LLM Configuration
-from config.llm_config import client, tools, DEFAULT_MODEL, MAX_REASONING_STEPS, LEGAL_ASSISTANT_SYSTEM_MESSAGE, LEGAL_ASSISTANT_SYSTEM_MESSAGE_V2
+from config.llm_config import get_client, DEFAULT_MODEL, TOOL_CACHE_SIZE, TOOL_CACHE_PATH, LEGAL_ASSISTANT_SYSTEM_MESSAGE, LEGAL_ASSISTANT_SYSTEM_MESSAGE_V2, REASONING_REQUIREMENTS
 
-# Import tool functions
-from tools.analysis_tools import classify_clause, flag_for_review
-from tools.document_tools import extract_clauses, read_pdf, summarize_document
-from tools.explanation_tools import explain_clause
-from tools.search_tools import search_document, save_conversation_context
+# Import tool modules; each one registers its tools with the shared registry
+import tools.analysis_tools
+import tools.document_tools
+import tools.explanation_tools
+import tools.search_tools
+from tools.registry import registry, ToolResult
+from tools.cache import ToolResultCache
 
 # Import reasoning capabilities
 from core.reasoning import ReasoningTracker, ReasoningAnalyzer
+from core.instrumentation import TokenUsage
+from core.budget import BudgetController, BudgetLimits
+from core.triage import TriageResult, triage_contract, triage_prompt
+from core.events import emit
+from core.router import ModelRouter
+
+# Static prompt prefix, built once: tool definitions (derived from the registered
+# tool signatures, in canonical order) and the system message. Every call sends the
+# same bytes first, so the provider's prompt cache can reuse them; per-run content
+# (the contract, questions, budget notices) always follows in later messages.
+tools = registry.schemas()
+SYSTEM_PROMPT = LEGAL_ASSISTANT_SYSTEM_MESSAGE_V2 + REASONING_REQUIREMENTS
+
+# Results of pure tools, shared across runs and follow-up turns
+tool_cache = ToolResultCache(max_entries=TOOL_CACHE_SIZE, path=TOOL_CACHE_PATH)
+
+# Optional limiter shared by batch workers; anything with an `acquire()` method
+_rate_limiter = None
+
+def set_rate_limiter(rate_limiter):
+    """Throttle every model call made by this process through `rate_limiter`."""
+    global _rate_limiter
+    _rate_limiter = rate_limiter
+
+def contract_analysis_prompt(contract_name: str, contract_text: str,
+                             result: Optional[TriageResult] = None) -> str:
+    """Build the opening prompt for reviewing a newly loaded contract.
+
+    Clauses are triaged locally first (unless `result` is given), so the prompt
+    holds the high-risk clauses and an index of the rest rather than the start
+    of the raw text.
+    """
+    result = result or triage_contract(contract_text)
+    emit("triage", document_id=result.document_id, clauses=len(result.clauses),
+         selected=len(result.high_risk), elapsed_ms=result.elapsed_ms)
+    return triage_prompt(contract_name, result)
 
 # -------------------------
 # Function Router
 # -------------------------
 
-def call_function(name: str, arguments: str):
+def call_function(name: str, arguments: str) -> ToolResult:
     """Route function calls to the appropriate tool function."""
-    data = json.loads(arguments)
-    if name == "extract_clauses":
-        return extract_clauses(**data).model_dump()
-    elif name == "classify_clause":
-        return classify_clause(**data).model_dump()
-    elif name == "flag_for_review":
-        return flag_for_review(**data).model_dump()
-    elif name == "read_pdf":
-        return read_pdf(**data)
-    elif name == "summarize_document":
-        return summarize_document(**data).model_dump()
-    elif name == "explain_clause":
-        return explain_clause(**data)
-    elif name == "search_document":
-        return search_document(**data).model_dump()
-    elif name == "save_conversation_context":
-        return save_conversation_context(**data).model_dump()
-    else:
-        raise ValueError(f"Unknown function: {name}")
+    return registry.call(name, arguments, cache=tool_cache)
 
 # -------------------------
 # ReAct Agent Loop
 # -------------------------
 
-def run_agent(input_text: str):
-    """Run the agent with a new input text and reasoning tracking."""
-    # Initialize reasoning tracker
-    reasoning_tracker = ReasoningTracker()
+# Wording used in the reasoning trace for a fresh analysis vs. a follow-up turn
+_LOOP_LABELS = {
+    "initial": {
+        "iteration": "Starting reasoning iteration {n}",
+        "action": "Using tool {tool} to gather information",
+        "observation": "Tool {tool} returned results",
+        "flag_decision": "Flagged clause for review",
+        "flag_risk": "Risk level based on: {reason}",
+        "final_decision": "Completed analysis and provided final response",
+        "final_reasoning": "Reached conclusion based on document analysis and tool usage",
+        "trace_title": "🧠 REASONING TRACE",
+        "trace_width": 60
+    },
+    "continuation": {
+        "iteration": "Processing continuation iteration {n}",
+        "action": "Using tool {tool} for additional analysis",
+        "observation": "Tool {tool} provided results",
+        "flag_decision": "Flagged additional clause for review",
+        "flag_risk": "Risk identified: {reason}",
+        "final_decision": "Provided follow-up response",
+        "final_reasoning": "Responded to user query based on conversation context",
+        "trace_title": "🧠 FOLLOW-UP REASONING",
+        "trace_width": 50
+    }
+}
+
+def _tool_call_dict(tool_call) -> Dict[str, Any]:
+    """Plain-dict form of an API tool call, so the message history can be serialized."""
+    return {
+        "id": tool_call.id,
+        "type": "function",
+        "function": {"name": tool_call.function.name, "arguments": tool_call.function.arguments}
+    }
+
+def _complete(messages: List[Dict[str, Any]], reasoning_tracker: ReasoningTracker,
+              budget: BudgetController, tool_choice: str = "auto", model: str = DEFAULT_MODEL):
+    """Call the model inside a timing span and charge its usage to the budget."""
+    metrics = reasoning_tracker.metrics
+    if _rate_limiter is not None:
+        _rate_limiter.acquire()
+    with metrics.span(f"chat {model}", kind="model", **{"gen_ai.request.model": model}) as model_span:
+        response = get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            tools=tools,
+            tool_choice=tool_choice
+        )
+    usage = TokenUsage.from_response(response)
+    metrics.record_usage(usage, model_span)
+    budget.record_usage(model, usage)
+    return response.choices[0].message, model_span, usage
+
+def _route_turn(messages: List[Dict[str, Any]], reasoning_tracker: ReasoningTracker, budget: BudgetController,
+                router: ModelRouter, iteration: int, last_target: Optional[str]):
+    """Run one turn on the route the router picks, escalating to the strong model when needed.
+
+    Returns the assistant content, its tool calls as dicts, the model time and
+    token usage of the turn, and the route that produced the answer.
+    """
+    route = router.route(messages, last_target)
+    if route.target == "planner":
+        reasoning_tracker.add_routing_decision(iteration, route.target, None, route.reason)
+        emit("route", iteration=iteration, route=route.target, model=None, reason=route.reason)
+        return None, route.tool_calls, 0.0, TokenUsage(), route.target
     
-    # Add initial reasoning step
+    msg, model_span, usage = _complete(messages, reasoning_tracker, budget, model=route.model)
+    duration_ms = model_span.duration_ms
+    tool_calls = [_tool_call_dict(tc) for tc in msg.tool_calls] if msg.tool_calls else None
+    
+    if route.target == "small":
+        reason = router.escalation_reason(msg.content, tool_calls,
+                                          lambda name, args: budget.lookup(name, args) is not None)
+        if reason:
+            # Discard the small model's turn and redo it on the strong model
+            reasoning_tracker.add_routing_decision(iteration, route.target, route.model, route.reason, escalated=True)
+            route = router.strong(reason)
+            msg, model_span, strong_usage = _complete(messages, reasoning_tracker, budget, model=route.model)
+            duration_ms += model_span.duration_ms
+            usage = TokenUsage(usage.prompt_tokens, usage.completion_tokens, usage.cached_tokens)
+            usage.add(strong_usage)
+            tool_calls = [_tool_call_dict(tc) for tc in msg.tool_calls] if msg.tool_calls else None
+    
+    reasoning_tracker.add_routing_decision(iteration, route.target, route.model, route.reason)
+    emit("route", iteration=iteration, route=route.target, model=route.model, reason=route.reason)
+    return msg.content, tool_calls, duration_ms, usage, route.target
+
+def _force_final_answer(messages: List[Dict[str, Any]], reasoning_tracker: ReasoningTracker,
+                        budget: BudgetController, reason: str, iteration: int):
+    """Ask for a final answer with tools disabled once the run is out of budget."""
+    emit("budget_exhausted", reason=reason, budget=budget.summary())
     reasoning_tracker.add_reasoning_step(
-        "observation", 
-        f"Received user input: {input_text[:100]}..." if len(input_text) > 100 else f"Received user input: {input_text}",
+        "thought",
+        f"Stopping tool use: {reason}",
         confidence=1.0
     )
-    
-    # Enhanced system message that includes reasoning requirements
-    enhanced_system_message = LEGAL_ASSISTANT_SYSTEM_MESSAGE_V2 + """
-
-REASONING REQUIREMENTS:
-- Always explain your thought process step by step
-- When using tools, explain why you chose that specific tool
-- When making decisions, consider alternatives and explain your choice
-- Provide confidence levels for your analysis
-- Flag any assumptions you're making
-- Explain the reasoning behind flagging clauses for review
-"""
-    
-    messages = [
-        {"role": "system", "content": enhanced_system_message},
-        {"role": "user", "content": input_text}
-    ]
+    messages.append({
+        "role": "system",
+        "content": "The analysis budget has been used up. Do not call any more tools. "
+                   "Give your final answer now using only the information gathered so far, "
+                   "and say which parts of the contract were not reviewed."
+    })
+    reasoning_tracker.add_routing_decision(iteration, "strong", DEFAULT_MODEL, "final answer after budget stop")
+    msg, model_span, usage = _complete(messages, reasoning_tracker, budget, tool_choice="none")
+    reasoning_tracker.add_reasoning_step(
+        "thought",
+        msg.content or "",
+        confidence=0.7,
+        duration_ms=model_span.duration_ms,
+        token_usage=usage
+    )
+    messages.append({"role": msg.role, "content": msg.content or ""})
+    emit("answer", content=msg.content or "", forced=True)
+    reasoning_tracker.add_decision(
+        decision="Returned final response early",
+        reasoning=f"Run budget exhausted: {reason}",
+        evidence=[f"Budget usage: {budget.summary()}"],
+        confidence=0.7
+    )
 
+def _run_reasoning_loop(messages: List[Dict[str, Any]], reasoning_tracker: ReasoningTracker, mode: str,
+                        limits: Optional[BudgetLimits] = None):
+    """Run the ReAct loop over `messages` within the given budget, timing every model and tool call."""
+    labels = _LOOP_LABELS[mode]
+    metrics = reasoning_tracker.metrics
+    budget = BudgetController(limits)
+    router = ModelRouter()
     flagged = []
+    answered = False
+    iteration = 0
+    last_target = None
     
-    for iteration in range(MAX_REASONING_STEPS):  # max reasoning steps
-        reasoning_tracker.add_reasoning_step(
-            "thought", 
-            f"Starting reasoning iteration {iteration + 1}",
-            confidence=0.8
-        )
-        
-        response = client.chat.completions.create(
-            model=DEFAULT_MODEL,
-            messages=messages,
-            tools=tools,
-            tool_choice="auto"
-        )
-        msg = response.choices[0].message
+    while True:
+        iteration += 1
+        stop_reason = budget.exhausted_reason(iteration)
+        if stop_reason:
+            break
         
-        # Track the assistant's reasoning
-        if msg.content:
-            reasoning_tracker.add_reasoning_step(
+        with metrics.span("react.iteration", kind="iteration", iteration=iteration):
+            iteration_step = reasoning_tracker.add_reasoning_step(
                 "thought", 
-                msg.content,
-                confidence=0.9
+                labels["iteration"].format(n=iteration),
+                confidence=0.8,
+                iteration=iteration
             )
-        
-        # Handle assistant message
-        if msg.tool_calls:
-            # For messages with tool calls, don't include content if it's None
-            messages.append({
-                "role": msg.role,
-                **({"content": msg.content} if msg.content is not None else {}),
-                "tool_calls": msg.tool_calls
-            })
             
-            # Process each tool call
-            for tool_call in msg.tool_calls:
-                tool_name = tool_call.function.name
-                tool_args = tool_call.function.arguments
-                
-                # Track tool usage reasoning
-                reasoning_tracker.add_reasoning_step(
-                    "action", 
-                    f"Using tool {tool_name} to gather information",
-                    tool_used=tool_name,
-                    confidence=0.8
-                )
-                
-                print(f"\n🛠 Tool call: {tool_name}()")
-                result = call_function(tool_name, tool_args)
-                
-                # Track tool result
+            content, tool_calls, duration_ms, usage, last_target = _route_turn(
+                messages, reasoning_tracker, budget, router, iteration, last_target
+            )
+            iteration_step.duration_ms = duration_ms
+            iteration_step.token_usage = usage
+            
+            # Track the assistant's reasoning
+            if content:
                 reasoning_tracker.add_reasoning_step(
-                    "observation", 
-                    f"Tool {tool_name} returned results",
-                    tool_used=tool_name,
-                    tool_result=result,
-                    confidence=1.0
+                    "thought", 
+                    content,
+                    confidence=0.9,
+                    iteration=iteration
                 )
-
+            
+            # Handle assistant message
+            if tool_calls:
+                # For messages with tool calls, don't include content if it's None
                 messages.append({
-                    "tool_call_id": tool_call.id,
-                    "role": "tool",
-                    "name": tool_name,
-                    "content": json.dumps(result)
+                    "role": "assistant",
+                    **({"content": content} if content is not None else {}),
+                    "tool_calls": tool_calls
                 })
-
-                if tool_name == "flag_for_review":
-                    flagged.append(json.loads(json.dumps(result)))
-                      # Record flagging decision
-                    reasoning_tracker.add_decision(
-                        decision=f"Flagged clause for review",
-                        reasoning=result.get('reason', 'No specific reason provided'),                        evidence=[f"Clause content: {result.get('clause', '')[:100]}..."],
+                
+                # Process each tool call
+                duplicates = 0
+                for tool_call in tool_calls:
+                    tool_name = tool_call["function"]["name"]
+                    tool_args = tool_call["function"]["arguments"]
+                    
+                    # Track tool usage reasoning
+                    reasoning_tracker.add_reasoning_step(
+                        "action", 
+                        labels["action"].format(tool=tool_name),
+                        tool_used=tool_name,
                         confidence=0.8,
-                        risk_assessment=f"Risk level based on: {result.get('reason', 'general concerns')}"
+                        iteration=iteration
                     )
-        else:
+                    
+                    result = budget.lookup(tool_name, tool_args)
+                    if result is not None:
+                        # The model repeated an identical call; reuse the earlier result
+                        duplicates += 1
+                        emit("tool_call", tool=tool_name, arguments=tool_args, iteration=iteration, repeated=True)
+                        reasoning_tracker.add_reasoning_step(
+                            "observation",
+                            f"Tool {tool_name} was already called with these arguments; reusing the earlier result",
+                            tool_used=tool_name,
+                            tool_result=result,
+                            confidence=1.0,
+                            iteration=iteration,
+                            cache_hit=True
+                        )
+                    else:
+                        emit("tool_call", tool=tool_name, arguments=tool_args, iteration=iteration, repeated=False)
+                        with metrics.span(f"execute_tool {tool_name}", kind="tool", **{"gen_ai.tool.name": tool_name}) as tool_span:
+                            result = call_function(tool_name, tool_args)
+                            tool_span.attributes["agent.tool.cache_hit"] = result.cached
+                        budget.remember(tool_name, tool_args, result)
+                        emit("tool_result", tool=tool_name, iteration=iteration, cached=result.cached,
+                             duration_ms=tool_span.duration_ms)
+                        
+                        # Track tool result
+                        reasoning_tracker.add_reasoning_step(
+                            "observation", 
+                            labels["observation"].format(tool=tool_name) + (" (from cache)" if result.cached else ""),
+                            tool_used=tool_name,
+                            tool_result=result,
+                            confidence=1.0,
+                            iteration=iteration,
+                            duration_ms=tool_span.duration_ms,
+                            cache_hit=result.cached
+                        )
+
+                    messages.append({
+                        "tool_call_id": tool_call["id"],
+                        "role": "tool",
+                        "name": tool_name,
+                        "content": result.payload
+                    })
+
+                    if tool_name == "flag_for_review" and result.success and result.value not in flagged:
+                        flagged_clause = result.value
+                        flagged.append(flagged_clause)
+                        # Record flagging decision
+                        reasoning_tracker.add_decision(
+                            decision=labels["flag_decision"],
+                            reasoning=flagged_clause.reason or 'No specific reason provided',
+                            evidence=[f"Clause content: {flagged_clause.clause[:100]}..."],
+                            confidence=0.8,
+                            risk_assessment=labels["flag_risk"].format(reason=flagged_clause.reason or 'general concerns')
+                        )
+                budget.end_round(len(tool_calls), duplicates)
+                continue
+            
             # For regular messages, always include content
-            messages.append({"role": msg.role, "content": msg.content or ""})
+            messages.append({"role": "assistant", "content": content or ""})
+            emit("answer", content=content or "", forced=False)
             
             # Record final decision
             reasoning_tracker.add_decision(
-                decision="Completed analysis and provided final response",
-                reasoning="Reached conclusion based on document analysis and tool usage",
+                decision=labels["final_decision"],
+                reasoning=labels["final_reasoning"],
                 confidence=0.9
             )
-            
-            # Display reasoning summary (which includes the final analysis)
-            print("\n" + "="*60)
-            print("🧠 REASONING TRACE")
-            print("="*60)
-            print(reasoning_tracker.get_reasoning_summary())
-            
-            if reasoning_tracker.decisions:
-                print(reasoning_tracker.get_decisions_summary())
-            
-            break
+            answered = True
+        break
+    
+    if not answered:
+        _force_final_answer(messages, reasoning_tracker, budget, stop_reason, iteration)
+    
+    # Report the reasoning summary (which includes the final analysis)
+    emit(
+        "trace",
+        title=labels["trace_title"],
+        width=labels["trace_width"],
+        reasoning=reasoning_tracker.get_reasoning_summary(),
+        decisions=reasoning_tracker.get_decisions_summary() if reasoning_tracker.decisions else "",
+        routing=reasoning_tracker.get_routing_summary() if reasoning_tracker.routing_decisions else "",
+        metrics=metrics.get_metrics_summary(),
+        metrics_summary=metrics.summary()
+    )
+    emit("flagged", clauses=[f.model_dump() for f in flagged])
+
+def run_agent(input_text: str, limits: Optional[BudgetLimits] = None):
+    """Run the agent with a new input text and reasoning tracking.
+
+    `limits` bounds the run; when it is exhausted the agent is asked for a
+    final answer with tools disabled instead of returning without one.
+    """
+    # Initialize reasoning tracker
+    reasoning_tracker = ReasoningTracker()
+    
+    # Add initial reasoning step
+    reasoning_tracker.add_reasoning_step(
+        "observation", 
+        f"Received user input: {input_text[:100]}..." if len(input_text) > 100 else f"Received user input: {input_text}",
+        confidence=1.0
+    )
+    
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": input_text}
+    ]
 
-    if flagged:
-        print("\n🚩 Flagged Clauses:")
-        for f in flagged:
-            print(f"- {f['reason']}\n  → {f['clause'][:80]}...\n")
+    _run_reasoning_loop(messages, reasoning_tracker, "initial", limits)
     
     # Store reasoning tracker for potential export
     messages.append({"role": "system", "content": f"reasoning_tracker_id:{reasoning_tracker.session_id}"})
     
     return messages, reasoning_tracker
 
-def run_agent_with_history(messages):
+def run_agent_with_history(messages, limits: Optional[BudgetLimits] = None):
     """Run the agent with an existing conversation history and reasoning tracking."""
     # Initialize reasoning tracker for this continuation
     reasoning_tracker = ReasoningTracker()
@@ -194,108 +374,7 @@ def run_agent_with_history(messages):
         confidence=1.0
     )
     
-    flagged = []
-    
-    for iteration in range(MAX_REASONING_STEPS):
-        reasoning_tracker.add_reasoning_step(
-            "thought", 
-            f"Processing continuation iteration {iteration + 1}",
-            confidence=0.8
-        )
-        
-        response = client.chat.completions.create(
-            model=DEFAULT_MODEL,
-            messages=messages,
-            tools=tools,
-            tool_choice="auto"
-        )
-        msg = response.choices[0].message
-        
-        # Track the assistant's reasoning
-        if msg.content:
-            reasoning_tracker.add_reasoning_step(
-                "thought", 
-                msg.content,
-                confidence=0.9
-            )
-        
-        # Handle assistant message
-        if msg.tool_calls:
-            # For messages with tool calls, don't include content if it's None
-            messages.append({
-                "role": msg.role,
-                **({"content": msg.content} if msg.content is not None else {}),
-                "tool_calls": msg.tool_calls
-            })
-            
-            # Process each tool call
-            for tool_call in msg.tool_calls:
-                tool_name = tool_call.function.name
-                tool_args = tool_call.function.arguments
-                
-                # Track tool usage reasoning
-                reasoning_tracker.add_reasoning_step(
-                    "action", 
-                    f"Using tool {tool_name} for additional analysis",
-                    tool_used=tool_name,
-                    confidence=0.8
-                )
-                
-                print(f"\n🛠 Tool call: {tool_name}()")
-                result = call_function(tool_name, tool_args)
-                
-                # Track tool result
-                reasoning_tracker.add_reasoning_step(
-                    "observation", 
-                    f"Tool {tool_name} provided results",
-                    tool_used=tool_name,
-                    tool_result=result,
-                    confidence=1.0
-                )
-
-                messages.append({
-                    "tool_call_id": tool_call.id,
-                    "role": "tool",
-                    "name": tool_name,
-                    "content": json.dumps(result)
-                })
-
-                if tool_name == "flag_for_review":
-                    flagged.append(json.loads(json.dumps(result)))
-                      # Record flagging decision
-                    reasoning_tracker.add_decision(
-                        decision=f"Flagged additional clause for review",
-                        reasoning=result.get('reason', 'No specific reason provided'),
-                        evidence=[f"Clause content: {result.get('clause', '')[:100]}..."],
-                        confidence=0.8,
-                        risk_assessment=f"Risk identified: {result.get('reason', 'general concerns')}"
-                    )
-        else:
-            # For regular messages, always include content
-            messages.append({"role": msg.role, "content": msg.content or ""})
-              # Record final decision
-            reasoning_tracker.add_decision(
-                decision="Provided follow-up response",
-                reasoning="Responded to user query based on conversation context",
-                confidence=0.9
-            )
-            
-            # Display reasoning summary for this interaction (which includes the response)
-            if reasoning_tracker.reasoning_steps:
-                print("\n" + "="*50)
-                print("🧠 FOLLOW-UP REASONING")
-                print("="*50)
-                print(reasoning_tracker.get_reasoning_summary())
-                
-                if reasoning_tracker.decisions:
-                    print(reasoning_tracker.get_decisions_summary())
-            
-            break
-
-    if flagged:
-        print("\n🚩 Flagged Clauses:")
-        for f in flagged:
-            print(f"- {f['reason']}\n  → {f['clause'][:80]}...\n")
+    _run_reasoning_loop(messages, reasoning_tracker, "continuation", limits)
     
     return messages, reasoning_tracker
 
@@ -0,0 +1,101 @@
+"""
+Budget control for the legal assistant agent.
+Bounds a ReAct run by iterations, tokens, dollars and wall-clock time, and
+detects the model repeating an identical tool call.
+"""
+import json
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from config.llm_config import (
+    MODEL_PRICING, MAX_REASONING_STEPS, MAX_RUN_TOKENS, MAX_RUN_COST_USD,
+    MAX_RUN_WALL_SECONDS, MAX_DUPLICATE_ROUNDS
+)
+from core.instrumentation import TokenUsage
+
+@dataclass
+class BudgetLimits:
+    """Limits for a single agent run. `None` disables a limit."""
+    max_iterations: int = MAX_REASONING_STEPS
+    max_tokens: Optional[int] = MAX_RUN_TOKENS
+    max_cost_usd: Optional[float] = MAX_RUN_COST_USD
+    max_wall_seconds: Optional[float] = MAX_RUN_WALL_SECONDS
+    max_duplicate_rounds: int = MAX_DUPLICATE_ROUNDS
+
+def estimate_cost(model: str, usage: TokenUsage) -> float:
+    """Estimate the dollar cost of a call from its token usage."""
+    pricing = MODEL_PRICING.get(model)
+    if pricing is None:
+        return 0.0
+    uncached = usage.prompt_tokens - usage.cached_tokens
+    return (
+        uncached * pricing["input"]
+        + usage.cached_tokens * pricing.get("cached_input", pricing["input"])
+        + usage.completion_tokens * pricing["output"]
+    ) / 1_000_000
+
+class BudgetController:
+    """Tracks spend for one run and decides when the agent must stop."""
+
+    def __init__(self, limits: Optional[BudgetLimits] = None):
+        self.limits = limits or BudgetLimits()
+        self.started = time.perf_counter()
+        self.tokens = 0
+        self.cost_usd = 0.0
+        self.duplicate_rounds = 0
+        self._memo: Dict[Tuple[str, str], object] = {}
+
+    @staticmethod
+    def call_key(name: str, arguments: str) -> Tuple[str, str]:
+        """Canonicalize a tool call so reordered or re-spaced JSON compares equal."""
+        try:
+            canonical = json.dumps(json.loads(arguments or "{}"), sort_keys=True, separators=(",", ":"))
+        except ValueError:
+            canonical = arguments
+        return name, canonical
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+    def record_usage(self, model: str, usage: TokenUsage):
+        """Add a model call's usage to the running totals."""
+        self.tokens += usage.total_tokens
+        self.cost_usd += estimate_cost(model, usage)
+
+    def lookup(self, name: str, arguments: str):
+        """Return the memoized result of an identical earlier call, if any."""
+        return self._memo.get(self.call_key(name, arguments))
+
+    def remember(self, name: str, arguments: str, result):
+        self._memo[self.call_key(name, arguments)] = result
+
+    def end_round(self, calls: int, duplicates: int):
+        """Count consecutive iterations in which every tool call was a repeat."""
+        if calls and calls == duplicates:
+            self.duplicate_rounds += 1
+        else:
+            self.duplicate_rounds = 0
+
+    def exhausted_reason(self, iteration: int) -> Optional[str]:
+        """Explain why the run must stop before `iteration`, or return None."""
+        limits = self.limits
+        if iteration > limits.max_iterations:
+            return f"reached the limit of {limits.max_iterations} reasoning iterations"
+        if limits.max_tokens is not None and self.tokens >= limits.max_tokens:
+            return f"used {self.tokens} of {limits.max_tokens} tokens"
+        if limits.max_cost_usd is not None and self.cost_usd >= limits.max_cost_usd:
+            return f"spent ${self.cost_usd:.4f} of ${limits.max_cost_usd:.2f}"
+        if limits.max_wall_seconds is not None and self.elapsed_seconds >= limits.max_wall_seconds:
+            return f"ran for {self.elapsed_seconds:.1f}s of {limits.max_wall_seconds:.0f}s"
+        if self.duplicate_rounds >= limits.max_duplicate_rounds:
+            return f"repeated identical tool calls for {self.duplicate_rounds} iterations"
+        return None
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "tokens": self.tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "elapsed_seconds": round(self.elapsed_seconds, 3)
+        }
@@ -0,0 +1,98 @@
+"""
+Event interface for the legal assistant agent.
+The agent reports progress (tool calls, budget stops, final answers and the
+reasoning trace) as events instead of printing. The CLI renders them with
+ConsoleEventSink; the HTTP service streams them to clients.
+
+The active sink is context-local, so concurrent runs in different threads
+each report to their own sink.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Callable
+
+@dataclass
+class AgentEvent:
+    """A single progress event from an agent run."""
+    type: str  # 'triage', 'route', 'tool_call', 'budget_exhausted', 'answer', 'trace', 'flagged'
+    data: Dict[str, Any]
+    timestamp: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": self.type, "timestamp": self.timestamp, **self.data}
+
+class EventSink(ABC):
+    """Receives agent events; subclasses decide where they go."""
+
+    @abstractmethod
+    def emit(self, event: AgentEvent):
+        """Handle one event."""
+
+class ConsoleEventSink(EventSink):
+    """Prints events in the CLI's format."""
+
+    def emit(self, event: AgentEvent):
+        data = event.data
+        if event.type == "triage":
+            print(f"🔎 Triage: {data['selected']} of {data['clauses']} clauses selected for review "
+                  f"({data['elapsed_ms']:.1f} ms)")
+        elif event.type == "tool_call":
+            if data["repeated"]:
+                print(f"\n♻️ Repeated tool call: {data['tool']}()")
+            else:
+                print(f"\n🛠 Tool call: {data['tool']}()")
+        elif event.type == "budget_exhausted":
+            print(f"\n⏳ Budget reached ({data['reason']}); requesting a final answer.")
+        elif event.type == "trace":
+            print("\n" + "=" * data["width"])
+            print(data["title"])
+            print("=" * data["width"])
+            print(data["reasoning"])
+            if data["decisions"]:
+                print(data["decisions"])
+            if data.get("routing"):
+                print(data["routing"])
+            print(data["metrics"])
+        elif event.type == "flagged" and data["clauses"]:
+            print("\n🚩 Flagged Clauses:")
+            for f in data["clauses"]:
+                print(f"- {f['reason']}\n  → {f['clause'][:80]}...\n")
+
+class CallbackEventSink(EventSink):
+    """Hands every event to a callback, e.g. to feed a queue in another thread."""
+
+    def __init__(self, callback: Callable[[AgentEvent], None]):
+        self.callback = callback
+
+    def emit(self, event: AgentEvent):
+        self.callback(event)
+
+class CollectingEventSink(EventSink):
+    """Keeps every event in memory."""
+
+    def __init__(self):
+        self.events: List[AgentEvent] = []
+        self._lock = threading.Lock()
+
+    def emit(self, event: AgentEvent):
+        with self._lock:
+            self.events.append(event)
+
+_current_sink: ContextVar[EventSink] = ContextVar("agent_event_sink", default=ConsoleEventSink())
+
+def emit(event_type: str, **data):
+    """Send an event to the sink active in the current context."""
+    _current_sink.get().emit(AgentEvent(type=event_type, data=data))
+
+@contextmanager
+def use_sink(sink: EventSink):
+    """Route events emitted in this context (and thread) to `sink`."""
+    token = _current_sink.set(sink)
+    try:
+        yield sink
+    finally:
+        _current_sink.reset(token)
@@ -0,0 +1,283 @@
+"""
+Instrumentation module for the legal assistant agent.
+Records timing spans around model and tool calls, token usage and
+iteration counts, and exports them as OpenTelemetry spans or Prometheus metrics.
+"""
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import List, Dict, Any, Optional
+
+@dataclass
+class TokenUsage:
+    """Token counts reported by the API for a single model call."""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Share of prompt tokens served from the provider's prompt cache."""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    @classmethod
+    def from_response(cls, response) -> "TokenUsage":
+        """Read `response.usage`, tolerating responses without usage details."""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return cls()
+        details = getattr(usage, "prompt_tokens_details", None)
+        return cls(
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            cached_tokens=(getattr(details, "cached_tokens", 0) or 0) if details else 0
+        )
+
+    def add(self, other: "TokenUsage"):
+        """Accumulate another usage record into this one."""
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cached_tokens += other.cached_tokens
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "total_tokens": self.total_tokens
+        }
+
+@dataclass
+class Span:
+    """A timed unit of work: an iteration, a model call or a tool call."""
+    name: str
+    kind: str  # 'iteration', 'model', 'tool'
+    span_id: str
+    parent_id: Optional[str] = None
+    start_time_ns: int = 0
+    duration_ms: float = 0.0
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def end_time_ns(self) -> int:
+        return self.start_time_ns + int(self.duration_ms * 1_000_000)
+
+class SessionMetrics:
+    """Aggregates spans and token usage for one agent session."""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self.usage = TokenUsage()
+        self.iterations = 0
+        self.start_time = time.perf_counter()
+        self.end_time: Optional[float] = None
+        self._span_stack: List[Span] = []
+
+    @contextmanager
+    def span(self, name: str, kind: str, **attributes):
+        """Time the enclosed block, nesting it under the currently open span."""
+        parent = self._span_stack[-1] if self._span_stack else None
+        span = Span(
+            name=name,
+            kind=kind,
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent else None,
+            start_time_ns=time.time_ns(),
+            attributes=dict(attributes)
+        )
+        if kind == "iteration":
+            self.iterations += 1
+        self._span_stack.append(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            span.status = "error"
+            span.attributes["error"] = str(e)
+            raise
+        finally:
+            span.duration_ms = (time.perf_counter() - started) * 1000
+            self._span_stack.pop()
+            self.spans.append(span)
+            self.end_time = time.perf_counter()
+
+    def record_usage(self, usage: TokenUsage, span: Optional[Span] = None):
+        """Add token usage to the session totals and to the given span."""
+        self.usage.add(usage)
+        if span is not None:
+            span.attributes.update({
+                "gen_ai.usage.input_tokens": usage.prompt_tokens,
+                "gen_ai.usage.output_tokens": usage.completion_tokens,
+                "gen_ai.usage.cached_tokens": usage.cached_tokens,
+                "agent.prompt_cache.hit_rate": round(usage.cache_hit_rate, 4)
+            })
+
+    def to_state(self) -> Dict[str, Any]:
+        """Serializable state, for restoring the metrics of a saved session."""
+        return {
+            "session_id": self.session_id,
+            "trace_id": self.trace_id,
+            "iterations": self.iterations,
+            "wall_ms": ((self.end_time or time.perf_counter()) - self.start_time) * 1000,
+            "usage": self.usage.to_dict(),
+            "spans": [asdict(s) for s in self.spans]
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "SessionMetrics":
+        """Rebuild metrics saved with `to_state`."""
+        metrics = cls(state["session_id"])
+        metrics.trace_id = state["trace_id"]
+        metrics.iterations = state["iterations"]
+        usage = state["usage"]
+        metrics.usage = TokenUsage(usage["prompt_tokens"], usage["completion_tokens"], usage["cached_tokens"])
+        metrics.spans = [Span(**s) for s in state["spans"]]
+        metrics.end_time = metrics.start_time + state["wall_ms"] / 1000
+        return metrics
+
+    def _total_ms(self, kind: str) -> float:
+        return sum(s.duration_ms for s in self.spans if s.kind == kind)
+
+    def summary(self) -> Dict[str, Any]:
+        """Summarize where the session spent its time and tokens."""
+        wall_ms = ((self.end_time or time.perf_counter()) - self.start_time) * 1000
+        model_ms = self._total_ms("model")
+        tool_ms = self._total_ms("tool")
+        loop_ms = max(wall_ms - model_ms - tool_ms, 0.0)
+
+        tool_breakdown: Dict[str, Dict[str, float]] = {}
+        for s in self.spans:
+            if s.kind == "tool":
+                tool_name = s.attributes.get("gen_ai.tool.name", s.name)
+                entry = tool_breakdown.setdefault(tool_name, {"calls": 0, "cache_hits": 0, "total_ms": 0.0})
+                entry["calls"] += 1
+                entry["cache_hits"] += 1 if s.attributes.get("agent.tool.cache_hit") else 0
+                entry["total_ms"] += s.duration_ms
+
+        timings = {"model": model_ms, "tool": tool_ms, "loop": loop_ms}
+        return {
+            "session_id": self.session_id,
+            "iterations": self.iterations,
+            "model_calls": sum(1 for s in self.spans if s.kind == "model"),
+            "tool_calls": sum(1 for s in self.spans if s.kind == "tool"),
+            "wall_ms": wall_ms,
+            "model_ms": model_ms,
+            "tool_ms": tool_ms,
+            "loop_ms": loop_ms,
+            "bound_by": max(timings, key=timings.get) if wall_ms > 0 else "unknown",
+            "tokens": self.usage.to_dict(),
+            "prompt_cache_hit_rate": self.usage.cache_hit_rate,
+            "prompt_cache_hit_rates": [
+                s.attributes.get("agent.prompt_cache.hit_rate", 0.0) for s in self.spans if s.kind == "model"
+            ],
+            "tools": tool_breakdown
+        }
+
+    def get_metrics_summary(self) -> str:
+        """Generate a human-readable summary of the session metrics."""
+        data = self.summary()
+        summary = f"⏱️ Session Metrics ({data['iterations']} iterations)\n"
+        summary += "=" * 40 + "\n\n"
+        summary += f"Wall time:   {data['wall_ms']:.0f} ms\n"
+        summary += f"Model calls: {data['model_calls']} ({data['model_ms']:.0f} ms)\n"
+        summary += f"Tool calls:  {data['tool_calls']} ({data['tool_ms']:.0f} ms)\n"
+        summary += f"Loop:        {data['loop_ms']:.0f} ms\n"
+        summary += f"Bound by:    {data['bound_by']}\n"
+        tokens = data["tokens"]
+        summary += (f"Tokens:      {tokens['prompt_tokens']} prompt / {tokens['completion_tokens']} completion"
+                    f" / {tokens['cached_tokens']} cached\n")
+        if data["prompt_cache_hit_rates"]:
+            per_call = ", ".join(f"{rate:.0%}" for rate in data["prompt_cache_hit_rates"])
+            summary += f"Prompt cache: {data['prompt_cache_hit_rate']:.0%} of prompt tokens (per call: {per_call})\n"
+
+        for name, entry in sorted(data["tools"].items(), key=lambda kv: -kv[1]["total_ms"]):
+            summary += f"  🛠️ {name}: {entry['calls']} calls ({entry['cache_hits']} cached), {entry['total_ms']:.1f} ms\n"
+
+        return summary
+
+    def to_otel_spans(self) -> Dict[str, Any]:
+        """Export spans in the OTLP/JSON `resourceSpans` layout."""
+        def _value(v):
+            if isinstance(v, bool):
+                return {"boolValue": v}
+            if isinstance(v, int):
+                return {"intValue": str(v)}
+            if isinstance(v, float):
+                return {"doubleValue": v}
+            return {"stringValue": str(v)}
+
+        spans = []
+        for s in self.spans:
+            spans.append({
+                "traceId": self.trace_id,
+                "spanId": s.span_id,
+                **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                "name": s.name,
+                "kind": "SPAN_KIND_CLIENT" if s.kind == "model" else "SPAN_KIND_INTERNAL",
+                "startTimeUnixNano": str(s.start_time_ns),
+                "endTimeUnixNano": str(s.end_time_ns),
+                "attributes": [
+                    {"key": k, "value": _value(v)}
+                    for k, v in {"agent.span_kind": s.kind, **s.attributes}.items()
+                ],
+                "status": {"code": "STATUS_CODE_ERROR" if s.status == "error" else "STATUS_CODE_OK"}
+            })
+
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": "legal-contract-assistant"}},
+                    {"key": "session.id", "value": {"stringValue": self.session_id}}
+                ]},
+                "scopeSpans": [{"scope": {"name": "core.instrumentation"}, "spans": spans}]
+            }]
+        }
+
+    def to_prometheus(self) -> str:
+        """Export session totals in the Prometheus text exposition format."""
+        session = f'session_id="{self.session_id}"'
+        data = self.summary()
+        lines = [
+            "# HELP legal_agent_iterations_total ReAct loop iterations.",
+            "# TYPE legal_agent_iterations_total counter",
+            f"legal_agent_iterations_total{{{session}}} {data['iterations']}",
+            "# HELP legal_agent_tokens_total Tokens reported by the API.",
+            "# TYPE legal_agent_tokens_total counter"
+        ]
+        for token_type in ("prompt", "completion", "cached"):
+            lines.append(
+                f'legal_agent_tokens_total{{{session},type="{token_type}"}} {data["tokens"][token_type + "_tokens"]}'
+            )
+
+        lines += [
+            "# HELP legal_agent_prompt_cache_hit_ratio Share of prompt tokens served from the prompt cache.",
+            "# TYPE legal_agent_prompt_cache_hit_ratio gauge",
+            f"legal_agent_prompt_cache_hit_ratio{{{session}}} {data['prompt_cache_hit_rate']:.4f}",
+            "# HELP legal_agent_model_call_seconds Time spent in chat completion calls.",
+            "# TYPE legal_agent_model_call_seconds summary",
+            f"legal_agent_model_call_seconds_sum{{{session}}} {data['model_ms'] / 1000:.6f}",
+            f"legal_agent_model_call_seconds_count{{{session}}} {data['model_calls']}",
+            "# HELP legal_agent_tool_call_seconds Time spent in local tool calls.",
+            "# TYPE legal_agent_tool_call_seconds summary"
+        ]
+        for name, entry in sorted(data["tools"].items()):
+            labels = f'{session},tool="{name}"'
+            lines.append(f"legal_agent_tool_call_seconds_sum{{{labels}}} {entry['total_ms'] / 1000:.6f}")
+            lines.append(f"legal_agent_tool_call_seconds_count{{{labels}}} {entry['calls']}")
+        lines += [
+            "# HELP legal_agent_tool_cache_hits_total Tool calls served from the result cache.",
+            "# TYPE legal_agent_tool_cache_hits_total counter"
+        ]
+        for name, entry in sorted(data["tools"].items()):
+            lines.append(f'legal_agent_tool_cache_hits_total{{{session},tool="{name}"}} {entry["cache_hits"]}')
+
+        return "\n".join(lines) + "\n"
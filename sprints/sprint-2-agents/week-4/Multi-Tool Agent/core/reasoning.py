@@ -6,6 +6,9 @@ from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
 import json
+import re
+
+from core.instrumentation import SessionMetrics, TokenUsage
 
 @dataclass
 class ReasoningStep:
@@ -14,9 +17,13 @@ class ReasoningStep:
     action_type: str  # 'observation', 'thought', 'action', 'decision'
     content: str
     tool_used: Optional[str] = None
-    tool_result: Optional[Dict[str, Any]] = None
+    tool_result: Optional[Any] = None  # ToolResult shared with the message list
     confidence: Optional[float] = None
     timestamp: datetime = field(default_factory=datetime.now)
+    iteration: Optional[int] = None
+    duration_ms: Optional[float] = None  # model call time for 'thought', tool time for 'observation'
+    token_usage: Optional[TokenUsage] = None
+    cache_hit: bool = False
 
 @dataclass
 class DecisionContext:
@@ -29,19 +36,77 @@ class DecisionContext:
     risk_assessment: str = ""
     timestamp: datetime = field(default_factory=datetime.now)
 
+@dataclass
+class RoutingDecision:
+    """Which model (or the rule-based planner) handled one turn of the loop, and why."""
+    iteration: int
+    route: str  # 'planner', 'small', 'strong'
+    model: Optional[str]
+    reason: str
+    escalated: bool = False  # the small model's answer was discarded for the strong model
+    timestamp: datetime = field(default_factory=datetime.now)
+
 class ReasoningTracker:
     """Tracks and manages the agent's reasoning process."""
     
     def __init__(self):
         self.reasoning_steps: List[ReasoningStep] = []
         self.decisions: List[DecisionContext] = []
+        self.routing_decisions: List[RoutingDecision] = []
         self.current_step = 0
         self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.metrics = SessionMetrics(self.session_id)
+    
+    @classmethod
+    def from_trace(cls, trace: Dict[str, Any], metrics_state: Optional[Dict[str, Any]] = None) -> "ReasoningTracker":
+        """Rebuild a tracker from `export_reasoning_trace` output (tool results are not restored)."""
+        tracker = cls()
+        tracker.session_id = trace["session_id"]
+        tracker.metrics = SessionMetrics.from_state(metrics_state) if metrics_state else SessionMetrics(tracker.session_id)
+        for s in trace["reasoning_steps"]:
+            usage = s.get("token_usage")
+            tracker.reasoning_steps.append(ReasoningStep(
+                step_number=s["step"],
+                action_type=s["action_type"],
+                content=s["content"],
+                tool_used=s["tool_used"],
+                confidence=s["confidence"],
+                timestamp=datetime.fromisoformat(s["timestamp"]),
+                iteration=s.get("iteration"),
+                duration_ms=s.get("duration_ms"),
+                token_usage=TokenUsage(usage["prompt_tokens"], usage["completion_tokens"], usage["cached_tokens"]) if usage else None,
+                cache_hit=s.get("cache_hit", False)
+            ))
+        for d in trace["decisions"]:
+            tracker.decisions.append(DecisionContext(
+                decision=d["decision"],
+                reasoning=d["reasoning"],
+                alternatives_considered=d["alternatives"],
+                evidence=d["evidence"],
+                confidence_score=d["confidence"],
+                risk_assessment=d["risk_assessment"],
+                timestamp=datetime.fromisoformat(d["timestamp"])
+            ))
+        for r in trace.get("routing", []):
+            tracker.routing_decisions.append(RoutingDecision(
+                iteration=r["iteration"],
+                route=r["route"],
+                model=r["model"],
+                reason=r["reason"],
+                escalated=r["escalated"],
+                timestamp=datetime.fromisoformat(r["timestamp"])
+            ))
+        tracker.current_step = len(tracker.reasoning_steps)
+        return tracker
     
     def add_reasoning_step(self, action_type: str, content: str, 
                           tool_used: Optional[str] = None, 
-                          tool_result: Optional[Dict[str, Any]] = None,
-                          confidence: Optional[float] = None):
+                          tool_result: Optional[Any] = None,
+                          confidence: Optional[float] = None,
+                          iteration: Optional[int] = None,
+                          duration_ms: Optional[float] = None,
+                          token_usage: Optional[TokenUsage] = None,
+                          cache_hit: bool = False):
         """Add a reasoning step to the tracker."""
         self.current_step += 1
         step = ReasoningStep(
@@ -50,7 +115,11 @@ class ReasoningTracker:
             content=content,
             tool_used=tool_used,
             tool_result=tool_result,
-            confidence=confidence
+            confidence=confidence,
+            iteration=iteration,
+            duration_ms=duration_ms,
+            token_usage=token_usage,
+            cache_hit=cache_hit
         )
         self.reasoning_steps.append(step)
         return step
@@ -72,6 +141,25 @@ class ReasoningTracker:
         self.decisions.append(decision_context)
         return decision_context
     
+    def add_routing_decision(self, iteration: int, route: str, model: Optional[str], reason: str,
+                             escalated: bool = False):
+        """Record which model handled a turn of the loop."""
+        decision = RoutingDecision(iteration=iteration, route=route, model=model, reason=reason, escalated=escalated)
+        self.routing_decisions.append(decision)
+        return decision
+    
+    def get_routing_summary(self) -> str:
+        """Generate a summary of the routing decisions."""
+        if not self.routing_decisions:
+            return "No routing decisions recorded."
+        
+        summary = f"🔀 Model Routing ({len(self.routing_decisions)} turns)\n"
+        summary += "=" * 40 + "\n\n"
+        for r in self.routing_decisions:
+            target = r.model or "local planner"
+            summary += f"Iteration {r.iteration}: {target} - {r.reason}{' (escalated)' if r.escalated else ''}\n"
+        return summary
+    
     def get_reasoning_summary(self) -> str:
         """Generate a summary of the reasoning process."""
         if not self.reasoning_steps:
@@ -85,11 +173,14 @@ class ReasoningTracker:
             summary += f"📝 {step.content}\n"
             
             if step.tool_used:
-                summary += f"🛠️ Tool: {step.tool_used}\n"
+                summary += f"🛠️ Tool: {step.tool_used}{' (cached)' if step.cache_hit else ''}\n"
             
             if step.confidence:
                 summary += f"🎯 Confidence: {step.confidence:.1%}\n"
             
+            if step.duration_ms is not None:
+                summary += f"⏱️ Duration: {step.duration_ms:.0f} ms\n"
+            
             summary += "\n"
         
         return summary
@@ -133,10 +224,26 @@ class ReasoningTracker:
                     "content": step.content,
                     "tool_used": step.tool_used,
                     "confidence": step.confidence,
-                    "timestamp": step.timestamp.isoformat()
+                    "timestamp": step.timestamp.isoformat(),
+                    "iteration": step.iteration,
+                    "duration_ms": step.duration_ms,
+                    "token_usage": step.token_usage.to_dict() if step.token_usage else None,
+                    "cache_hit": step.cache_hit
                 }
                 for step in self.reasoning_steps
             ],
+            "metrics": self.metrics.summary(),
+            "routing": [
+                {
+                    "iteration": r.iteration,
+                    "route": r.route,
+                    "model": r.model,
+                    "reason": r.reason,
+                    "escalated": r.escalated,
+                    "timestamp": r.timestamp.isoformat()
+                }
+                for r in self.routing_decisions
+            ],
             "decisions": [
                 {
                     "decision": decision.decision,
@@ -151,6 +258,18 @@ class ReasoningTracker:
             ]
         }
 
+RISK_KEYWORDS = (
+    "unlimited liability", "sole discretion", "without notice",
+    "as-is", "no warranty", "indemnify", "hold harmless",
+    "liquidated damages", "termination", "breach"
+)
+
+LONG_CLAUSE_CHARS = 500
+LOW_CLARITY_SCORE = 50
+
+# Words that decide `suggest_analysis_strategy`'s document type, found in one pass
+_DOCUMENT_TYPE_WORDS = re.compile("employment|employee|service|agreement|lease|rental|purchase|sale")
+
 class ReasoningAnalyzer:
     """Analyzes contract content and provides reasoning for analysis decisions."""
     
@@ -166,37 +285,72 @@ class ReasoningAnalyzer:
         }
         
         # Analyze complexity
-        if len(clause) > 500:
+        if len(clause) > LONG_CLAUSE_CHARS:
             reasoning["complexity_indicators"].append("Very long clause - may be difficult to understand")
         
         # Look for risk signals
-        risk_keywords = [
-            "unlimited liability", "sole discretion", "without notice",
-            "as-is", "no warranty", "indemnify", "hold harmless",
-            "liquidated damages", "termination", "breach"
-        ]
-        
-        for keyword in risk_keywords:
-            if keyword.lower() in clause.lower():
+        clause_lower = clause.lower()
+        for keyword in RISK_KEYWORDS:
+            if keyword in clause_lower:
                 reasoning["risk_signals"].append(f"Contains '{keyword}' - potential risk indicator")
         
-        # Calculate clarity score (simplified)
-        avg_word_length = sum(len(word) for word in clause.split()) / len(clause.split())
+        _, _, reasoning["clarity_score"] = ReasoningAnalyzer._clarity(clause)
+        reasoning["recommendation"] = ReasoningAnalyzer._recommendation(
+            bool(reasoning["risk_signals"]), reasoning["clarity_score"]
+        )
+        
+        return reasoning
+    
+    @staticmethod
+    def _clarity(clause: str):
+        """Word count, sentence count and clarity score (simplified) of a clause."""
+        # An empty clause has no words to average
+        words = clause.split()
+        avg_word_length = sum(len(word) for word in words) / max(len(words), 1)
         sentence_count = clause.count('.') + clause.count('!') + clause.count('?')
-        avg_sentence_length = len(clause.split()) / max(sentence_count, 1)
+        avg_sentence_length = len(words) / max(sentence_count, 1)
         
         # Lower score for longer words and sentences (harder to read)
-        reasoning["clarity_score"] = max(0, 100 - (avg_word_length * 2) - (avg_sentence_length * 0.5))
+        return len(words), sentence_count, max(0, 100 - (avg_word_length * 2) - (avg_sentence_length * 0.5))
+    
+    @staticmethod
+    def _recommendation(has_risk_signals: bool, clarity_score: float) -> str:
+        if has_risk_signals:
+            return "Requires careful review due to identified risk signals"
+        if clarity_score < LOW_CLARITY_SCORE:
+            return "Consider requesting clearer language"
+        return "Appears to be standard contract language"
+    
+    @staticmethod
+    def analyze_contract(clauses: List[str], top_n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Score every clause of a contract and return a ranked risk table.
         
-        # Generate recommendation
-        if reasoning["risk_signals"]:
-            reasoning["recommendation"] = "Requires careful review due to identified risk signals"
-        elif reasoning["clarity_score"] < 50:
-            reasoning["recommendation"] = "Consider requesting clearer language"
-        else:
-            reasoning["recommendation"] = "Appears to be standard contract language"
+        Scores match `analyze_clause_reasoning`; rows are ordered by risk score
+        (risk keywords plus complexity flags), then by lowest clarity.
+        """
+        rows = []
+        for i, clause in enumerate(clauses):
+            clause_lower = clause.lower()
+            signals = [keyword for keyword in RISK_KEYWORDS if keyword in clause_lower]
+            word_count, sentence_count, clarity_score = ReasoningAnalyzer._clarity(clause)
+            is_long = len(clause) > LONG_CLAUSE_CHARS
+            rows.append({
+                "clause_index": i,
+                "risk_score": len(signals) + is_long + (clarity_score < LOW_CLARITY_SCORE),
+                "risk_signals": signals,
+                "clarity_score": clarity_score,
+                "clause_length": len(clause),
+                "word_count": word_count,
+                "sentence_count": sentence_count,
+                "complexity_indicators": ["Very long clause - may be difficult to understand"] if is_long else [],
+                "recommendation": ReasoningAnalyzer._recommendation(bool(signals), clarity_score)
+            })
         
-        return reasoning
+        rows.sort(key=lambda row: (-row["risk_score"], row["clarity_score"]))
+        if top_n is not None:
+            rows = rows[:top_n]
+        return [{"rank": rank, **row} for rank, row in enumerate(rows, 1)]
     
     @staticmethod
     def suggest_analysis_strategy(contract_text: str) -> Dict[str, Any]:
@@ -209,19 +363,20 @@ class ReasoningAnalyzer:
             "reasoning": []
         }
         
-        text_lower = contract_text.lower()
+        # Lowercase and scan the text once, then decide on the words found
+        found = set(_DOCUMENT_TYPE_WORDS.findall(contract_text.lower()))
         
         # Determine document type
-        if "employment" in text_lower or "employee" in text_lower:
+        if "employment" in found or "employee" in found:
             strategy["document_type"] = "employment_agreement"
             strategy["priority_areas"] = ["termination", "compensation", "confidentiality", "non-compete"]
-        elif "service" in text_lower and "agreement" in text_lower:
+        elif "service" in found and "agreement" in found:
             strategy["document_type"] = "service_agreement"
             strategy["priority_areas"] = ["scope of work", "payment terms", "liability", "termination"]
-        elif "lease" in text_lower or "rental" in text_lower:
+        elif "lease" in found or "rental" in found:
             strategy["document_type"] = "lease_agreement"
             strategy["priority_areas"] = ["rent", "term", "security deposit", "maintenance"]
-        elif "purchase" in text_lower or "sale" in text_lower:
+        elif "purchase" in found or "sale" in found:
             strategy["document_type"] = "purchase_agreement"
             strategy["priority_areas"] = ["price", "delivery", "warranties", "returns"]
         
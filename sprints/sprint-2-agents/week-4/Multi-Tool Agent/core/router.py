@@ -0,0 +1,119 @@
+"""
+Model routing for the ReAct loop.
+The turn that answers a user message goes to a small model, or, for obvious
+requests such as "search X", to a rule-based planner that needs no model call.
+Turns after tool results, which write the final synthesis or go deeper, go
+straight to the strong model, as does any turn where the small model's tool
+choice looks unreliable.
+"""
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+
+from pydantic import ValidationError
+
+from config.llm_config import DEFAULT_MODEL, ROUTER_SMALL_MODEL, ROUTING_ENABLED
+from tools.registry import registry
+
+# Requests the planner turns straight into tool calls: the CLI's wording and bare commands
+_SEARCH_REQUEST = re.compile(
+    r"^(?:please search the contract for any mentions of '(?P<quoted>.+)'|search\s+(?P<bare>.+))",
+    re.IGNORECASE | re.DOTALL
+)
+_EXPLAIN_REQUEST = re.compile(
+    r"^(?:please explain this clause in simple terms: '(?P<quoted>.+)'|explain\s+(?P<bare>.+))",
+    re.IGNORECASE | re.DOTALL
+)
+_DOCUMENT_ID = re.compile(r"document id '([0-9a-f]+)'")
+
+@dataclass
+class Route:
+    """Where one turn of the loop goes."""
+    target: str  # 'planner', 'small' or 'strong'
+    reason: str
+    model: Optional[str] = None
+    tool_calls: Optional[List[Dict[str, Any]]] = None  # planner output, in API message format
+
+class ModelRouter:
+    """Chooses the model (or the planner) for each turn of one agent run."""
+
+    def __init__(self, small_model: str = ROUTER_SMALL_MODEL, strong_model: str = DEFAULT_MODEL,
+                 enabled: bool = ROUTING_ENABLED):
+        self.small_model = small_model
+        self.strong_model = strong_model
+        self.enabled = enabled
+
+    def strong(self, reason: str) -> Route:
+        return Route(target="strong", reason=reason, model=self.strong_model)
+
+    def route(self, messages: List[Dict[str, Any]], last_target: Optional[str]) -> Route:
+        """Pick the route for the next turn from the conversation so far."""
+        if not self.enabled:
+            return self.strong("routing disabled")
+        if messages and messages[-1].get("role") == "tool":
+            # Tool results are in, so this turn usually writes the answer: send it to the
+            # strong model up front rather than trying the small model and discarding its reply
+            if last_target == "planner":
+                return self.strong("final synthesis after planned tool call")
+            return self.strong("synthesis after tool results")
+        if messages and messages[-1].get("role") == "user":
+            tool_calls = self.plan(messages)
+            if tool_calls:
+                return Route(target="planner", reason="rule-based plan for a direct request", tool_calls=tool_calls)
+        return Route(target="small", reason="tool selection", model=self.small_model)
+
+    def plan(self, messages: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """Turn an obvious request in the last user message into tool calls, or return None."""
+        request = (messages[-1].get("content") or "").strip()
+        search = _SEARCH_REQUEST.match(request)
+        if search:
+            document_id = self._document_id(messages)
+            if document_id is None:
+                return None
+            query = (search["quoted"] or search["bare"]).strip()
+            return [self._tool_call("search_clauses", {"document_id": document_id, "query": query})]
+        explain = _EXPLAIN_REQUEST.match(request)
+        if explain:
+            clause = (explain["quoted"] or explain["bare"]).strip()
+            return [self._tool_call("explain_clause", {"clause": clause})]
+        return None
+
+    def escalation_reason(self, content: Optional[str], tool_calls, is_duplicate) -> Optional[str]:
+        """Why the small model's turn should not be trusted, or None if it looks sound.
+
+        A direct answer is kept if it is not empty. `tool_calls` are in API message
+        format; `is_duplicate(name, arguments)` tells whether the run already made that call.
+        """
+        if not tool_calls:
+            return None if content and content.strip() else "low confidence: empty answer"
+        duplicates = 0
+        for tool_call in tool_calls:
+            name, arguments = tool_call["function"]["name"], tool_call["function"]["arguments"]
+            if name not in registry:
+                return f"low confidence: unknown tool {name}"
+            try:
+                registry.get(name).args_model.model_validate_json(arguments or "{}")
+            except (ValidationError, ValueError):
+                return f"low confidence: invalid arguments for {name}"
+            if is_duplicate(name, arguments):
+                duplicates += 1
+        if duplicates == len(tool_calls):
+            return "low confidence: only repeated earlier tool calls"
+        return None
+
+    def _document_id(self, messages: List[Dict[str, Any]]) -> Optional[str]:
+        for message in messages:
+            if message.get("role") == "user":
+                match = _DOCUMENT_ID.search(message.get("content") or "")
+                if match:
+                    return match[1]
+        return None
+
+    def _tool_call(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": f"call_plan_{os.urandom(6).hex()}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(arguments)}
+        }
@@ -0,0 +1,172 @@
+"""
+Session persistence for the legal assistant CLI.
+Saves the conversation, the loaded contract, its triaged clauses, saved
+conversation notes and reasoning traces, so a review can be resumed without
+re-reading the PDF or re-running the analysis.
+
+Sessions are stored as msgpack + zstd when those packages are installed and
+as zlib-compressed JSON otherwise; both formats can always be read back if the
+codec is available.
+"""
+import json
+import os
+import re
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+try:
+    import msgpack
+    import zstandard
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+from config.llm_config import SESSION_DIR
+from models.data_models import ContractClause
+from tools.clause_store import clause_store
+
+MSGPACK_SUFFIX = ".msgpack.zst"
+JSON_SUFFIX = ".json.z"
+
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]+$")
+
+@dataclass
+class Session:
+    """Everything needed to pick a contract review back up."""
+    session_id: str
+    tenant: Optional[str] = None  # owner, for sessions created through the HTTP service
+    contract_name: Optional[str] = None
+    contract_path: Optional[str] = None
+    contract_text: Optional[str] = None
+    document: Dict[str, Any] = field(default_factory=dict)  # path, size, mtime and triage document id
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+    clauses: List[Dict[str, Any]] = field(default_factory=list)  # triaged ContractClause dumps
+    notes: List[Dict[str, Any]] = field(default_factory=list)  # save_conversation_context results
+    traces: List[Dict[str, Any]] = field(default_factory=list)  # reasoning trace + metrics state per turn
+    created: str = field(default_factory=lambda: datetime.now().isoformat())
+    updated: str = field(default_factory=lambda: datetime.now().isoformat())
+
+    @classmethod
+    def new(cls, tenant: Optional[str] = None) -> "Session":
+        # The random suffix keeps sessions opened in the same second from overwriting each other
+        session_id = datetime.now().strftime("%Y%m%d_%H%M%S") + "_" + os.urandom(4).hex()
+        return cls(session_id=session_id, tenant=tenant)
+
+    def set_contract(self, path: Optional[str], text: str, document_id: str, clauses: List[Dict[str, Any]],
+                     name: Optional[str] = None):
+        """Attach a freshly opened contract, dropping the previous conversation.
+
+        `path` is None for contracts uploaded to the service, which have no file to watch.
+        """
+        self.contract_name = name or os.path.basename(path)
+        self.contract_path = path
+        self.contract_text = text
+        self.document = {"path": path, "document_id": document_id}
+        if path:
+            stat = os.stat(path)
+            self.document.update({"size": stat.st_size, "mtime": stat.st_mtime})
+        self.clauses = clauses
+        self.messages = []
+        self.notes = []
+        self.traces = []
+
+    def record_turn(self, messages: List[Dict[str, Any]], tracker):
+        """Store the conversation after an agent turn, with its trace and any saved notes."""
+        self.messages = messages
+        self.traces.append({
+            "trace": tracker.export_reasoning_trace(),
+            "metrics_state": tracker.metrics.to_state()
+        })
+        for step in tracker.reasoning_steps:
+            if step.tool_used == "save_conversation_context" and step.tool_result is not None and step.tool_result.success:
+                note = step.tool_result.value.model_dump()
+                if note not in self.notes:
+                    self.notes.append(note)
+        self.updated = datetime.now().isoformat()
+
+    def restore_clauses(self):
+        """Put the session's triaged clauses back into the clause store for get_clause."""
+        if self.clauses:
+            clause_store.add_document(self.document["document_id"], [ContractClause(**c) for c in self.clauses])
+
+    def document_changed(self) -> bool:
+        """True if the contract file was modified or removed since it was opened."""
+        path = self.document.get("path")
+        if not path:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return True
+        return stat.st_size != self.document["size"] or stat.st_mtime != self.document["mtime"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+class SessionStore:
+    """Saves and loads sessions as compressed files in one directory."""
+
+    def __init__(self, directory: str = SESSION_DIR):
+        self.directory = directory
+
+    def _path(self, session_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, session_id + suffix)
+
+    def save(self, session: Session) -> str:
+        """Write `session` atomically and return its path."""
+        os.makedirs(self.directory, exist_ok=True)
+        data = session.to_dict()
+        if MSGPACK_AVAILABLE:
+            suffix = MSGPACK_SUFFIX
+            blob = zstandard.ZstdCompressor(level=3).compress(msgpack.packb(data, use_bin_type=True))
+        else:
+            suffix = JSON_SUFFIX
+            blob = zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"), 6)
+
+        path = self._path(session.session_id, suffix)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(blob)
+        os.replace(tmp_path, path)
+        return path
+
+    def load(self, session_id: str) -> Session:
+        """Load a saved session; raises FileNotFoundError if there is none."""
+        if not _SESSION_ID.match(session_id):
+            raise FileNotFoundError(f"Invalid session id: {session_id!r}")
+        path = self._path(session_id, MSGPACK_SUFFIX)
+        if os.path.exists(path):
+            if not MSGPACK_AVAILABLE:
+                raise RuntimeError(f"Session {session_id} needs msgpack and zstandard to load")
+            with open(path, "rb") as f:
+                data = msgpack.unpackb(zstandard.ZstdDecompressor().decompress(f.read()), raw=False)
+        else:
+            path = self._path(session_id, JSON_SUFFIX)
+            with open(path, "rb") as f:
+                data = json.loads(zlib.decompress(f.read()).decode("utf-8"))
+        return Session(**data)
+
+    def list_sessions(self) -> List[Dict[str, Any]]:
+        """Summaries of saved sessions, most recently updated first."""
+        if not os.path.isdir(self.directory):
+            return []
+        sessions = []
+        for filename in os.listdir(self.directory):
+            for suffix in (MSGPACK_SUFFIX, JSON_SUFFIX):
+                if filename.endswith(suffix):
+                    session_id = filename[:-len(suffix)]
+                    try:
+                        session = self.load(session_id)
+                    except Exception:
+                        continue  # unreadable or written by an unavailable codec
+                    sessions.append({
+                        "session_id": session_id,
+                        "tenant": session.tenant,
+                        "contract_name": session.contract_name,
+                        "turns": len(session.traces),
+                        "updated": session.updated,
+                        "size_bytes": os.path.getsize(os.path.join(self.directory, filename))
+                    })
+        return sorted(sessions, key=lambda s: s["updated"], reverse=True)
@@ -0,0 +1,142 @@
+"""
+Local triage stage for contract reviews.
+Scores every clause with the keyword classifier and ReasoningAnalyzer heuristics
+before the model is called, so the opening prompt carries only the high-risk
+clauses plus a compact index of the rest, which the model can fetch with get_clause.
+"""
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+from config.llm_config import (
+    TRIAGE_MIN_RISK_SCORE, TRIAGE_MAX_CLAUSES, TRIAGE_CLAUSE_CHARS, TRIAGE_INDEX_CHARS
+)
+from core.reasoning import ReasoningAnalyzer
+from models.data_models import ContractClause
+from tools.analysis_tools import classify_clause
+from tools.clause_store import clause_store
+from tools.document_tools import extract_clauses
+
+@dataclass
+class TriageResult:
+    """Outcome of triaging one contract."""
+    document_id: str
+    text_length: int
+    clauses: List[ContractClause]    # every clause, in document order
+    high_risk: List[ContractClause]  # clauses for the prompt, riskiest first
+    elapsed_ms: float
+
+    @property
+    def indexed(self) -> List[ContractClause]:
+        """Clauses left out of the prompt and only listed in the index."""
+        selected = {c.clause_id for c in self.high_risk}
+        return [c for c in self.clauses if c.clause_id not in selected]
+
+def document_id_for(text: str) -> str:
+    """Short, stable id for a contract text."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:10]
+
+def triage_contract(text: str, min_risk_score: int = TRIAGE_MIN_RISK_SCORE,
+                    max_clauses: int = TRIAGE_MAX_CLAUSES) -> TriageResult:
+    """Score all clauses of `text` locally and select the high-risk subset for the model."""
+    started = time.perf_counter()
+    document_id = document_id_for(text)
+    extracted = extract_clauses(text).clauses
+    table = ReasoningAnalyzer.analyze_contract([c.text for c in extracted])
+    rows = {row["clause_index"]: row for row in table}
+
+    clauses = []
+    for i, clause in enumerate(extracted):
+        classification = classify_clause(clause.text)
+        clauses.append(ContractClause(
+            text=clause.text,
+            start_idx=clause.start_idx,
+            end_idx=clause.end_idx,
+            document_id=document_id,
+            clause_id=i + 1,
+            category=classification.category,
+            risk_level=classification.risk_level,
+            risk_score=rows[i]["risk_score"],
+            risk_signals=rows[i]["risk_signals"]
+        ))
+
+    # The analyzer's ranking orders the selection: risk score, then lowest clarity
+    high_risk = [
+        clauses[row["clause_index"]] for row in table
+        if row["risk_score"] >= min_risk_score or clauses[row["clause_index"]].risk_level == "high"
+    ][:max_clauses]
+
+    clause_store.add_document(document_id, clauses)
+    return TriageResult(
+        document_id=document_id,
+        text_length=len(text),
+        clauses=clauses,
+        high_risk=high_risk,
+        elapsed_ms=(time.perf_counter() - started) * 1000
+    )
+
+def _id_ranges(ids: List[int]) -> List[str]:
+    """Collapse sorted ids into ranges: [1, 2, 3, 7] -> ['1-3', '7']."""
+    ranges = []
+    start = prev = ids[0]
+    for clause_id in ids[1:] + [None]:
+        if clause_id is not None and clause_id == prev + 1:
+            prev = clause_id
+            continue
+        ranges.append(str(start) if start == prev else f"{start}-{prev}")
+        if clause_id is not None:
+            start = prev = clause_id
+    return ranges
+
+def format_clause_index(clauses: List[ContractClause], max_chars: int = TRIAGE_INDEX_CHARS) -> str:
+    """Compact index of clause ids grouped by category and risk level."""
+    groups: Dict[str, List[int]] = {}
+    for clause in clauses:
+        groups.setdefault(f"{clause.category} ({clause.risk_level})", []).append(clause.clause_id)
+
+    # Every category keeps its header; the id ranges share the character budget evenly
+    per_group = max_chars // max(len(groups), 1)
+    lines = []
+    for label, ids in sorted(groups.items(), key=lambda g: -len(g[1])):
+        line = f"- {label}, {len(ids)} clauses: "
+        ranges = _id_ranges(ids)
+        for i, id_range in enumerate(ranges):
+            if len(line) + len(id_range) + 2 > per_group:
+                line += f"… ({len(ranges) - i} more ranges)"
+                break
+            line += id_range + (", " if i < len(ranges) - 1 else "")
+        lines.append(line)
+    return "\n".join(lines)
+
+def triage_prompt(contract_name: str, result: TriageResult) -> str:
+    """Build the opening review prompt from a triage result."""
+    sections = [
+        f"I have uploaded a contract called '{contract_name}' "
+        f"({result.text_length} characters, {len(result.clauses)} clauses, document id '{result.document_id}').",
+    ]
+    if result.high_risk:
+        sections.append(
+            f"A local pre-screen selected these {len(result.high_risk)} clauses as high risk "
+            "(id, character offsets, keyword category, risk signals):"
+        )
+        for clause in result.high_risk:
+            text = clause.text
+            if len(text) > TRIAGE_CLAUSE_CHARS:
+                text = text[:TRIAGE_CLAUSE_CHARS] + " …[truncated]"
+            signals = ", ".join(clause.risk_signals) or "none"
+            sections.append(
+                f"[{clause.clause_id}] chars {clause.start_idx}-{clause.end_idx} | "
+                f"{clause.category}, {clause.risk_level} | signals: {signals}\n{text}"
+            )
+    else:
+        sections.append("A local pre-screen found no high-risk clauses.")
+
+    if result.indexed:
+        sections.append(
+            "The remaining clauses are indexed below by id. Fetch any you need with "
+            f"get_clause(document_id='{result.document_id}', clause_id=<id>):\n"
+            + format_clause_index(result.indexed)
+        )
+    sections.append("Please analyze this contract, focusing on the high-risk clauses, and provide a summary.")
+    return "\n\n".join(sections)
@@ -1,7 +1,7 @@
 """
 Data models for the legal assistant agent.
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Dict, Optional, Literal
 
 class Clause(BaseModel):
@@ -10,6 +10,15 @@ class Clause(BaseModel):
     start_idx: int
     end_idx: int
 
+class ContractClause(Clause):
+    """Model for a clause scored by the local triage stage, addressable by id."""
+    document_id: str
+    clause_id: int
+    category: str
+    risk_level: Literal["low", "medium", "high"]
+    risk_score: int
+    risk_signals: List[str]
+
 class ClauseExtractionOutput(BaseModel):
     """Output model for extracted clauses."""
     clauses: List[Clause]
@@ -25,6 +34,8 @@ class ClassificationOutput(BaseModel):
 
 class FlaggedClause(BaseModel):
     """Model for clauses flagged for review."""
+    model_config = ConfigDict(frozen=True)
+
     clause: str
     reason: str
 
@@ -0,0 +1,61 @@
+import json
+import sqlite3
+
+from tools.cache import ToolResultCache
+from tools.registry import ToolRegistry
+
+registry = ToolRegistry()
+
+@registry.register("Add two numbers", pure=True)
+def add(a: int, b: int = 1) -> int:
+    """Add two numbers."""
+    return a + b
+
+@registry.register("Read a file")
+def read_file(path: str) -> str:
+    """Read a file."""
+    with open(path) as f:
+        return f.read()
+
+def test_valid_call_returns_the_serialized_result():
+    result = registry.call("add", '{"a": 2, "b": 3}')
+    assert result.success
+    assert result.value == 5
+    assert result.payload == "5"
+
+def test_malformed_json_returns_a_failed_result():
+    result = registry.call("add", '{"a": 2,')
+    assert not result.success
+    assert result.value is None
+    assert "Invalid arguments for add" in json.loads(result.payload)["error"]
+
+def test_invalid_arguments_name_the_fields():
+    result = registry.call("add", '{"a": "two", "c": 1}')
+    assert not result.success
+    assert "a:" in result.error
+    assert "c: Extra inputs are not permitted" in result.error
+
+def test_unknown_tool_returns_a_failed_result():
+    result = registry.call("subtract", "{}")
+    assert not result.success
+    assert result.error == "Unknown function: subtract"
+
+def test_failed_calls_are_not_cached():
+    cache = ToolResultCache()
+    registry.call("add", '{"a": "x"}', cache=cache)
+    assert cache.stats()["entries"] == 0
+    assert registry.call("add", '{"a": 1}', cache=cache).value == 2
+
+def test_tool_exceptions_return_a_failed_result():
+    result = registry.call("read_file", '{"path": "/nonexistent/contract.txt"}')
+    assert not result.success
+    assert result.error.startswith("FileNotFoundError:")
+
+def test_cache_errors_return_a_failed_result():
+    class LockedCache(ToolResultCache):
+        def get_payload(self, key):
+            raise sqlite3.OperationalError("database is locked")
+
+    result = registry.call("add", '{"a": 1}', cache=LockedCache())
+    assert not result.success
+    assert result.error == "OperationalError: database is locked"
@@ -4,7 +4,9 @@ Analysis tools for the legal assistant agent.
 from typing import List, Dict
 # Import models from the models module
 from models.data_models import ClassificationOutput, FlaggedClause
+from tools.registry import tool
 
+@tool("Classify a legal clause by type and risk", pure=True)
 def classify_clause(clause: str) -> ClassificationOutput:
     """Classify a legal clause by type and risk level."""
     lc = clause.lower()
@@ -19,6 +21,7 @@ def classify_clause(clause: str) -> ClassificationOutput:
     else:
         return ClassificationOutput(category="Other", risk_level="low", summary="No critical issues detected.")
 
+@tool("Flag a clause as risky")
 def flag_for_review(clause: str, reason: str) -> FlaggedClause:
     """Flag a clause as risky for further review."""
     return FlaggedClause(clause=clause, reason=reason)
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Result cache for pure tools.
+Keeps recent results in an in-memory LRU and, optionally, in a SQLite file
+so they survive across sessions and restarts.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+class ToolResultCache:
+    """Two-tier cache keyed by tool name plus a hash of the validated arguments."""
+
+    def __init__(self, max_entries: int = 512, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS tool_results "
+                "(key TEXT PRIMARY KEY, tool TEXT NOT NULL, payload TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(tool_name: str, canonical_args: str) -> str:
+        digest = hashlib.sha256(canonical_args.encode("utf-8")).hexdigest()
+        return f"{tool_name}:{digest}"
+
+    def get_memory(self, key: str):
+        """Return a result from the in-memory tier, refreshing its LRU position."""
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+            return result
+
+    def get_payload(self, key: str) -> Optional[str]:
+        """Return the serialized result from the persistent tier, if configured."""
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT payload FROM tool_results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.hits += 1
+            return row[0] if row else None
+
+    def put(self, key: str, result, persist: bool = True):
+        """Store a result in memory and, when `persist` is set, on disk."""
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+            if persist and self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO tool_results (key, tool, payload, created) VALUES (?, ?, ?, ?)",
+                    (key, result.name, result.payload, time.time())
+                )
+                self._db.commit()
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def clear(self):
+        """Drop every cached result, including the persistent tier."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM tool_results")
+                self._db.commit()
+
+    def stats(self):
+        return {"entries": len(self._memory), "hits": self.hits, "misses": self.misses,
+                "persistent": self.path is not None}
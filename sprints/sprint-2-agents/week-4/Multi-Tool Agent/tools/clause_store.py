@@ -0,0 +1,50 @@
+"""
+Clause store for the get_clause tool.
+Keeps the clauses of recently triaged documents so the model can fetch any
+clause from the prompt's clause index by id instead of receiving the full text.
+"""
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from config.llm_config import CLAUSE_STORE_DOCUMENTS
+from models.data_models import ContractClause
+
+class ClauseStore:
+    """LRU of triaged documents, each a list of clauses numbered from 1."""
+
+    def __init__(self, max_documents: int = 32):
+        self.max_documents = max_documents
+        self._documents: "OrderedDict[str, List[ContractClause]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add_document(self, document_id: str, clauses: List[ContractClause]):
+        """Store (or refresh) the clauses of a document."""
+        with self._lock:
+            self._documents[document_id] = clauses
+            self._documents.move_to_end(document_id)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+
+    def get(self, document_id: str, clause_id: int) -> Optional[ContractClause]:
+        """Return a stored clause, or None if the document or id is unknown."""
+        with self._lock:
+            clauses = self._documents.get(document_id)
+            if clauses is None:
+                return None
+            self._documents.move_to_end(document_id)
+        if 1 <= clause_id <= len(clauses):
+            return clauses[clause_id - 1]
+        return None
+
+    def get_document(self, document_id: str) -> Optional[List[ContractClause]]:
+        """Return all stored clauses of a document, or None if it is unknown."""
+        with self._lock:
+            return self._documents.get(document_id)
+
+    def __contains__(self, document_id: str) -> bool:
+        with self._lock:
+            return document_id in self._documents
+
+# Shared store used by the triage stage and the get_clause tool
+clause_store = ClauseStore(max_documents=CLAUSE_STORE_DOCUMENTS)
@@ -1,20 +1,51 @@
 """
 Document processing tools for the legal assistant agent.
 """
-import PyPDF2
-from typing import List, Dict
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from functools import lru_cache
+from typing import List, Dict, Union
 
 # Import models from the models module
-from models.data_models import Clause, ClauseExtractionOutput, DocumentSummary
+from models.data_models import Clause, ClauseExtractionOutput, ContractClause, DocumentSummary
+from tools.clause_store import clause_store
+from tools.registry import tool
 
+@lru_cache(maxsize=None)
+def get_text_splitter(chunk_size: int, chunk_overlap: int):
+    """Build (once per configuration) a splitter for legal text.
+
+    LangChain is imported here rather than at module level because it is
+    by far the heaviest import of the tool layer.
+    """
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", ".", " "]
+    )
+
+@tool("Extract clauses from a legal text", pure=True)
 def extract_clauses(text: str) -> ClauseExtractionOutput:
     """Extract clauses from a legal text."""
-    parts = [p.strip() for p in text.split("\n\n") if p.strip()]
-    return ClauseExtractionOutput(
-        clauses=[Clause(text=p, start_idx=i, end_idx=i+len(p)) for i, p in enumerate(parts)]
-    )
+    clauses = []
+    offset = 0
+    for part in text.split("\n\n"):
+        stripped = part.strip()
+        if stripped:
+            # Character offsets of the clause within `text`
+            start = offset + len(part) - len(part.lstrip())
+            clauses.append(Clause(text=stripped, start_idx=start, end_idx=start + len(stripped)))
+        offset += len(part) + 2
+    return ClauseExtractionOutput(clauses=clauses)
+
+@tool("Fetch the full text of a contract clause listed in the clause index")
+def get_clause(document_id: str, clause_id: int) -> Union[ContractClause, str]:
+    """Fetch a clause stored by the triage stage by its document and clause id."""
+    clause = clause_store.get(document_id, clause_id)
+    if clause is None:
+        return f"Unknown clause {clause_id} in document {document_id}"
+    return clause
 
+@tool("Extract text from a PDF file")
 def read_pdf(file_path: str) -> str:
     """Extract text from a PDF file or read text file."""
     try:
@@ -24,6 +55,7 @@ def read_pdf(file_path: str) -> str:
                 return file.read()
         # Otherwise, try to read it as a PDF
         else:
+            import PyPDF2
             with open(file_path, 'rb') as file:
                 reader = PyPDF2.PdfReader(file)
                 text = ""
@@ -33,14 +65,23 @@ def read_pdf(file_path: str) -> str:
     except Exception as e:
         return f"Error reading file: {str(e)}"
 
+def read_contract_bytes(filename: str, data: bytes) -> str:
+    """Extract text from an uploaded PDF or text file (used by the HTTP service's parser pool)."""
+    try:
+        if filename.lower().endswith('.txt'):
+            return data.decode('utf-8')
+        import io
+        import PyPDF2
+        reader = PyPDF2.PdfReader(io.BytesIO(data))
+        return "".join(page.extract_text() + "\n\n" for page in reader.pages)
+    except Exception as e:
+        return f"Error reading file: {str(e)}"
+
+@tool("Generate a summary of a legal document", pure=True)
 def summarize_document(text: str, max_length: int = 500) -> DocumentSummary:
     """Generate a summary of a legal document."""
     # Using a text splitter to break the document into manageable chunks
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=500,
-        chunk_overlap=20,
-        separators=["\n\n", "\n", ".", " "]
-    )
+    text_splitter = get_text_splitter(chunk_size=500, chunk_overlap=20)
     chunks = text_splitter.split_text(text)
     
     key_points = []
@@ -1,7 +1,9 @@
 """
 Explanation tools for the legal assistant agent.
 """
+from tools.registry import tool
 
+@tool("Explain a legal clause in simple terms", pure=True)
 def explain_clause(clause: str) -> str:
     """Explain a legal clause in simple terms."""
     # In a real implementation, this would use the LLM to explain the clause
@@ -0,0 +1,180 @@
+"""
+Tool registry for the legal assistant agent.
+Tools register themselves with the `tool` decorator; the registry derives each
+tool's JSON schema from its signature and dispatches calls by name.
+"""
+import inspect
+import json
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, List, Optional, Type, get_type_hints
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError, create_model
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """A registered tool with its pre-built argument validator and result serializer."""
+    name: str
+    description: str
+    func: Callable[..., Any]
+    args_model: Type[BaseModel]
+    result_adapter: TypeAdapter
+    schema: Dict[str, Any]
+    pure: bool = False  # pure tools depend only on their arguments and may be cached
+
+@dataclass(frozen=True)
+class ToolResult:
+    """The outcome of a tool call, serialized exactly once.
+
+    `value` is the object returned by the tool and `payload` is its JSON text.
+    The same instance is shared by the tool message, the flagged-clause list and
+    the reasoning trace, so results are never re-encoded or deep-copied.
+    A failed call has `success=False`, no value and the error as its payload.
+    """
+    name: str
+    value: Any
+    payload: str
+    cached: bool = False
+    success: bool = True
+    error: Optional[str] = None
+
+    @classmethod
+    def failure(cls, name: str, error: str) -> "ToolResult":
+        return cls(name=name, value=None, payload=json.dumps({"error": error}), success=False, error=error)
+
+def _strip_titles(schema: Any) -> Any:
+    """Drop the auto-generated `title` keys Pydantic adds to JSON schemas."""
+    if isinstance(schema, dict):
+        return {k: _strip_titles(v) for k, v in schema.items() if k != "title"}
+    if isinstance(schema, list):
+        return [_strip_titles(v) for v in schema]
+    return schema
+
+class ToolRegistry:
+    """Maps tool names to their specs for O(1) dispatch."""
+
+    def __init__(self):
+        self._tools: Dict[str, ToolSpec] = {}
+        self._schemas: Optional[List[Dict[str, Any]]] = None
+
+    def register(self, description: Optional[str] = None, name: Optional[str] = None, pure: bool = False):
+        """Decorator that registers a function as a tool the model can call.
+
+        Mark a tool `pure` only if its result depends on nothing but its
+        arguments; pure results may be served from a `ToolResultCache`.
+        """
+        def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+            tool_name = name or func.__name__
+            if tool_name in self._tools:
+                raise ValueError(f"Tool already registered: {tool_name}")
+
+            hints = get_type_hints(func)
+            fields = {}
+            for param in inspect.signature(func).parameters.values():
+                default = ... if param.default is inspect.Parameter.empty else param.default
+                fields[param.name] = (hints.get(param.name, Any), default)
+
+            args_model = create_model(
+                f"{tool_name}_arguments",
+                __config__=ConfigDict(extra="forbid"),
+                **fields
+            )
+            parameters = _strip_titles(args_model.model_json_schema())
+            parameters.pop("additionalProperties", None)
+
+            tool_description = description or inspect.getdoc(func).splitlines()[0]
+            self._tools[tool_name] = ToolSpec(
+                name=tool_name,
+                description=tool_description,
+                func=func,
+                args_model=args_model,
+                result_adapter=TypeAdapter(hints.get("return", Any)),
+                schema={
+                    "type": "function",
+                    "function": {
+                        "name": tool_name,
+                        "description": tool_description,
+                        "parameters": parameters
+                    }
+                },
+                pure=pure
+            )
+            self._schemas = None
+            return func
+        return decorator
+
+    def get(self, name: str) -> ToolSpec:
+        """Look up a registered tool by name."""
+        try:
+            return self._tools[name]
+        except KeyError:
+            raise ValueError(f"Unknown function: {name}") from None
+
+    def schemas(self) -> List[Dict[str, Any]]:
+        """Return the tool definitions in the format expected by the chat API.
+
+        Tools are sorted by name and every object's keys are sorted, so the list
+        serializes to the same bytes regardless of import order; the tools are
+        part of the prompt prefix the provider caches.
+        """
+        if self._schemas is None:
+            self._schemas = [
+                json.loads(json.dumps(self._tools[name].schema, sort_keys=True)) for name in sorted(self._tools)
+            ]
+        return self._schemas
+
+    def call(self, name: str, arguments: str, cache=None) -> ToolResult:
+        """Validate the JSON `arguments` for a tool, run it and serialize its result.
+
+        When a cache is given, results of pure tools are looked up by their
+        validated arguments first and stored after a miss. An unknown tool,
+        invalid arguments or an exception from the tool or the cache give a
+        failed result, so the model can see the error and retry instead of the
+        run aborting.
+        """
+        spec = self._tools.get(name)
+        if spec is None:
+            return ToolResult.failure(name, f"Unknown function: {name}")
+        try:
+            args = spec.args_model.model_validate_json(arguments or "{}")
+        except ValidationError as e:
+            details = "; ".join(
+                f"{'.'.join(str(part) for part in err['loc']) or 'arguments'}: {err['msg']}" for err in e.errors()
+            )
+            return ToolResult.failure(name, f"Invalid arguments for {name}: {details}")
+
+        try:
+            key = None
+            if cache is not None and spec.pure:
+                key = cache.make_key(name, args.model_dump_json())
+                hit = cache.get_memory(key)
+                if hit is not None:
+                    return replace(hit, cached=True)
+                payload = cache.get_payload(key)
+                if payload is not None:
+                    hit = ToolResult(name=name, value=spec.result_adapter.validate_json(payload), payload=payload)
+                    cache.put(key, hit, persist=False)
+                    return replace(hit, cached=True)
+                cache.record_miss()
+
+            result = spec.func(**dict(args))
+            tool_result = ToolResult(
+                name=name,
+                value=result,
+                payload=spec.result_adapter.dump_json(result).decode("utf-8")
+            )
+            if key is not None:
+                cache.put(key, tool_result)
+            return tool_result
+        except Exception as e:
+            # A failing tool or cache (e.g. a locked SQLite file) is reported to the model like bad arguments
+            return ToolResult.failure(name, f"{type(e).__name__}: {e}")
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+# Shared registry used by the agent
+registry = ToolRegistry()
+tool = registry.register
@@ -3,18 +3,17 @@ Search tools for the legal assistant agent.
 """
 from typing import List, Dict
 from datetime import datetime
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 
 # Import models from the models module
 from models.data_models import SearchResult, ConversationContext
+from tools.registry import tool
+from tools.clause_store import clause_store
+from tools.document_tools import get_text_splitter
 
+@tool("Search for specific terms or topics in the document", pure=True)
 def search_document(text: str, query: str) -> SearchResult:
     """Search for specific terms or topics in the document."""
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=300,
-        chunk_overlap=50,
-        separators=["\n\n", "\n", ".", " "]
-    )
+    text_splitter = get_text_splitter(chunk_size=300, chunk_overlap=50)
     chunks = text_splitter.split_text(text)
     
     matches = []
@@ -30,6 +29,30 @@ def search_document(text: str, query: str) -> SearchResult:
         context=f"Found {len(matches)} sections mentioning '{query}'"
     )
 
+@tool("Search the clauses of a loaded contract (by document id) for specific terms or topics")
+def search_clauses(document_id: str, query: str) -> SearchResult:
+    """Search the triaged clauses of a loaded contract without resending its text."""
+    clauses = clause_store.get_document(document_id)
+    if clauses is None:
+        return SearchResult(matches=[], context=f"Unknown document {document_id}")
+    
+    q = query.lower()
+    matches = []
+    for clause in clauses:
+        count = clause.text.lower().count(q)
+        if count:
+            matches.append({
+                "clause_id": str(clause.clause_id),
+                "text": clause.text,
+                "relevance": "high" if count > 1 else "medium"
+            })
+    
+    return SearchResult(
+        matches=matches[:5],  # Return top 5 matches
+        context=f"Found {len(matches)} clauses mentioning '{query}'"
+    )
+
+@tool("Save the context of the current conversation for later reference")
 def save_conversation_context(topic: str, content: str) -> ConversationContext:
     """Save the context of the conversation for later reference."""
     timestamp = datetime.now().isoformat()
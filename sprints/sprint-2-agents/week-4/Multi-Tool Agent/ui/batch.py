@@ -0,0 +1,138 @@
+"""
+Headless batch mode for the Legal Contract Analysis Tool.
+Reviews every contract in a folder across worker processes and writes one
+JSON record per contract, skipping contracts already reviewed in earlier runs.
+"""
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Set
+
+from config.llm_config import BATCH_REQUESTS_PER_MINUTE, BATCH_WORKERS
+
+class SharedRateLimiter:
+    """Spaces model calls evenly across all worker processes."""
+
+    def __init__(self, requests_per_minute: int):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_slot = multiprocessing.Value("d", 0.0)
+
+    def acquire(self):
+        """Block until this process may make its next model call."""
+        if not self.interval:
+            return
+        with self._next_slot.get_lock():
+            now = time.time()
+            slot = max(now, self._next_slot.value)
+            self._next_slot.value = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def _init_worker(rate_limiter: SharedRateLimiter):
+    """Install the shared rate limiter in a freshly started worker."""
+    from core.agent import set_rate_limiter
+    set_rate_limiter(rate_limiter)
+
+def _review_contract(path: str) -> Dict[str, Any]:
+    """Review one contract and return its structured result record."""
+    from core.agent import run_agent, contract_analysis_prompt
+    from core.events import CollectingEventSink, use_sink
+    from tools.document_tools import read_pdf
+
+    record: Dict[str, Any] = {"contract": os.path.basename(path), "path": path}
+    started = time.perf_counter()
+    try:
+        with use_sink(CollectingEventSink()):
+            read_started = time.perf_counter()
+            contract_text = read_pdf(path)
+            read_ms = (time.perf_counter() - read_started) * 1000
+            if contract_text.startswith("Error reading file"):
+                raise ValueError(contract_text)
+            messages, tracker = run_agent(contract_analysis_prompt(record["contract"], contract_text))
+
+        flags: List[Dict[str, Any]] = []
+        classifications: List[Dict[str, Any]] = []
+        for step in tracker.reasoning_steps:
+            if step.action_type != "observation" or step.tool_result is None or not step.tool_result.success:
+                continue
+            if step.tool_used == "flag_for_review" and step.tool_result.value.model_dump() not in flags:
+                flags.append(step.tool_result.value.model_dump())
+            elif step.tool_used == "classify_clause":
+                classifications.append(step.tool_result.value.model_dump())
+
+        final = next((m for m in reversed(messages) if m.get("role") == "assistant" and m.get("content")), None)
+        record.update({
+            "status": "ok",
+            "summary": final["content"] if final else "",
+            "flags": flags,
+            "classifications": classifications,
+            "timings": {"read_ms": read_ms, **tracker.metrics.summary()}
+        })
+    except Exception as e:
+        record.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    record["elapsed_ms"] = (time.perf_counter() - started) * 1000
+    return record
+
+def _completed_contracts(out_path: str) -> Set[str]:
+    """Read the contracts that already have a successful record in `out_path`."""
+    done: Set[str] = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # partial line from an interrupted run
+            if record.get("status") == "ok":
+                done.add(record["path"])
+    return done
+
+def run_batch(contracts_dir: str, out_path: str, workers: Optional[int] = None,
+              requests_per_minute: Optional[int] = None):
+    """Review every PDF/TXT contract in `contracts_dir`, appending results to `out_path`."""
+    workers = workers or BATCH_WORKERS
+    requests_per_minute = requests_per_minute or BATCH_REQUESTS_PER_MINUTE
+
+    paths = sorted(
+        os.path.abspath(os.path.join(contracts_dir, f))
+        for f in os.listdir(contracts_dir) if f.lower().endswith(('.pdf', '.txt'))
+    )
+    done = _completed_contracts(out_path)
+    pending = [p for p in paths if p not in done]
+    print(f"📚 {len(paths)} contracts found, {len(done & set(paths))} already reviewed, {len(pending)} to go")
+    if not pending:
+        return
+
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    os.makedirs(out_dir, exist_ok=True)
+
+    rate_limiter = SharedRateLimiter(requests_per_minute)
+    started = time.perf_counter()
+    failures = 0
+    with open(out_path, "a", encoding="utf-8") as out, ProcessPoolExecutor(
+        max_workers=min(workers, len(pending)),
+        initializer=_init_worker,
+        initargs=(rate_limiter,)
+    ) as pool:
+        futures = {pool.submit(_review_contract, path): path for path in pending}
+        for i, future in enumerate(as_completed(futures), 1):
+            try:
+                record = future.result()
+            except Exception as e:
+                # e.g. BrokenProcessPool after a worker died; the contract is retried on the next run
+                path = futures[future]
+                record = {"contract": os.path.basename(path), "path": path, "status": "error",
+                          "error": f"{type(e).__name__}: {e}", "elapsed_ms": 0.0}
+            # One flushed line per contract, so an interrupted run can resume where it stopped
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            if record["status"] != "ok":
+                failures += 1
+            status = "✅" if record["status"] == "ok" else f"❌ {record['error']}"
+            print(f"[{i}/{len(pending)}] {record['contract']} {status} ({record['elapsed_ms'] / 1000:.1f}s)")
+
+    print(f"\n🏁 Reviewed {len(pending)} contracts in {time.perf_counter() - started:.1f}s "
+          f"({failures} failed) → {out_path}")
@@ -5,7 +5,11 @@ import os
 import json
 
 # Import agent functions from core module
-from core.agent import run_agent, run_agent_with_history, list_available_contracts
+from core.agent import run_agent, run_agent_with_history, list_available_contracts, contract_analysis_prompt
+from core.reasoning import ReasoningTracker
+from core.session import Session, SessionStore
+from core.triage import document_id_for
+from tools.clause_store import clause_store
 from tools.document_tools import read_pdf
 
 def display_help():
@@ -21,9 +25,53 @@ def display_help():
     print("reasoning               - Display the reasoning trace from the last analysis")
     print("decisions               - Display the decision summary from the last analysis")
     print("export-reasoning        - Export the reasoning trace to a JSON file")
+    print("metrics                 - Display timing and token usage from the last analysis")
+    print("export-metrics          - Export the last analysis as OpenTelemetry spans and Prometheus metrics")
+    print("sessions                - List saved sessions")
+    print("resume <session>        - Resume a saved session by id or number, without re-analysis")
     print("exit, quit              - Exit the application")
     print("\nYou can also ask questions in natural language about the contract.")
 
+def save_turn(store: SessionStore, session: Session, messages, reasoning_tracker):
+    """Record the latest agent turn in the session and save it."""
+    session.record_turn(messages, reasoning_tracker)
+    try:
+        store.save(session)
+    except Exception as e:
+        print(f"\n⚠️ Could not save session {session.session_id}: {e}")
+
+def cli_sessions(store: SessionStore):
+    """Saved CLI sessions; the HTTP service's per-tenant sessions share the directory but are left out."""
+    return [s for s in store.list_sessions() if s["tenant"] is None]
+
+def resume_session(store: SessionStore, session_ref: str):
+    """Load a saved session by id or list number and restore its clause index."""
+    if session_ref.isdigit():
+        sessions = cli_sessions(store)
+        index = int(session_ref) - 1
+        if not 0 <= index < len(sessions):
+            print(f"\n❌ Invalid session number. Please use a number between 1 and {len(sessions)}.")
+            return None
+        session_ref = sessions[index]["session_id"]
+    try:
+        session = store.load(session_ref)
+        if session.tenant is not None:
+            raise FileNotFoundError(session_ref)
+    except FileNotFoundError:
+        print(f"\n❌ Session not found: {session_ref}")
+        print("Type 'sessions' to see saved sessions.")
+        return None
+    
+    session.restore_clauses()
+    print(f"\n📂 Resumed session {session.session_id}: {session.contract_name or 'no contract'} "
+          f"({len(session.traces)} turns, {len(session.messages)} messages)")
+    if session.document_changed():
+        print(f"⚠️ {session.contract_name} has changed since this session was saved; "
+              f"use 'open {session.contract_name}' to re-analyze it.")
+    for note in session.notes:
+        print(f"📌 {note['topic']}: {note['content'][:80]}")
+    return session
+
 def run_cli():
     """Run the CLI interface for the Legal Contract Analysis Assistant."""
     print("🤖 Legal Contract Analysis Assistant")
@@ -37,6 +85,8 @@ def run_cli():
     contract_text = None
     conversation_messages = []
     current_reasoning_tracker = None  # Store the latest reasoning tracker
+    session_store = SessionStore()
+    session = None
     
     # Create contracts directory if it doesn't exist
     contracts_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "docs", "contracts")
@@ -98,9 +148,19 @@ def run_cli():
                 conversation_messages = []
                 
                 # Start analysis with the new contract
-                prompt = f"I have uploaded a contract in PDF format called '{os.path.basename(contract_path)}'. Here is the text:\n\n{contract_text[:3000]}...\n\nPlease analyze this contract, extract key clauses, and provide a summary."
+                prompt = contract_analysis_prompt(os.path.basename(contract_path), contract_text)
                 conversation_messages, current_reasoning_tracker = run_agent(prompt)
                 
+                # Start a new saved session for this contract
+                document_id = document_id_for(contract_text)
+                session = Session.new()
+                session.set_contract(
+                    contract_path, contract_text, document_id,
+                    [c.model_dump() for c in clause_store.get_document(document_id) or []]
+                )
+                save_turn(session_store, session, conversation_messages, current_reasoning_tracker)
+                print(f"\n💾 Session saved as {session.session_id} (use 'resume {session.session_id}' to continue later)")
+                
             else:
                 print(f"\n❌ Contract not found: {contract_name}")
                 print("Type 'list' to see available contracts.")
@@ -111,6 +171,7 @@ def run_cli():
                 prompt = f"Please provide a concise summary of the main points in this contract."
                 conversation_messages.append({"role": "user", "content": prompt})
                 conversation_messages, current_reasoning_tracker = run_agent_with_history(conversation_messages)
+                save_turn(session_store, session, conversation_messages, current_reasoning_tracker)
             else:
                 print("\n❌ No contract loaded. Use 'open <contract_name>' to load a contract first.")
             continue
@@ -121,6 +182,7 @@ def run_cli():
                 prompt = f"Please search the contract for any mentions of '{search_term}' and explain the relevant sections."
                 conversation_messages.append({"role": "user", "content": prompt})
                 conversation_messages, current_reasoning_tracker = run_agent_with_history(conversation_messages)
+                save_turn(session_store, session, conversation_messages, current_reasoning_tracker)
             else:
                 print("\n❌ No contract loaded. Use 'open <contract_name>' to load a contract first.")
             continue
@@ -131,6 +193,7 @@ def run_cli():
                 prompt = f"Please explain this clause in simple terms: '{clause}'"
                 conversation_messages.append({"role": "user", "content": prompt})
                 conversation_messages, current_reasoning_tracker = run_agent_with_history(conversation_messages)
+                save_turn(session_store, session, conversation_messages, current_reasoning_tracker)
             else:
                 print("\n❌ No contract loaded. Use 'open <contract_name>' to load a contract first.")
             continue
@@ -171,11 +234,67 @@ def run_cli():
             else:
                 print("\n❌ No reasoning trace to export. Perform an analysis first.")
             continue
+        elif user_input.lower() == 'metrics':
+            if current_reasoning_tracker:
+                print("\n" + "="*60)
+                print("⏱️ SESSION METRICS")
+                print("="*60)
+                print(current_reasoning_tracker.metrics.get_metrics_summary())
+            else:
+                print("\n❌ No metrics available. Perform an analysis first.")
+            continue
+            
+        elif user_input.lower() == 'export-metrics':
+            if current_reasoning_tracker:
+                metrics = current_reasoning_tracker.metrics
+                spans_file = f"metrics_spans_{current_reasoning_tracker.session_id}.json"
+                prom_file = f"metrics_{current_reasoning_tracker.session_id}.prom"
+                
+                try:
+                    with open(spans_file, 'w', encoding='utf-8') as f:
+                        json.dump(metrics.to_otel_spans(), f, indent=2)
+                    with open(prom_file, 'w', encoding='utf-8') as f:
+                        f.write(metrics.to_prometheus())
+                    print(f"\n✅ OpenTelemetry spans exported to: {spans_file}")
+                    print(f"✅ Prometheus metrics exported to: {prom_file}")
+                except Exception as e:
+                    print(f"\n❌ Error exporting metrics: {e}")
+            else:
+                print("\n❌ No metrics to export. Perform an analysis first.")
+            continue
+        
+        elif user_input.lower() == 'sessions':
+            sessions = cli_sessions(session_store)
+            if sessions:
+                print("\n💾 Saved Sessions:")
+                for i, saved in enumerate(sessions, 1):
+                    print(f"  {i}. {saved['session_id']}  {saved['contract_name'] or '-'}  "
+                          f"{saved['turns']} turns, updated {saved['updated'][:16]} ({saved['size_bytes'] / 1024:.1f} KB)")
+                print("\nType 'resume <session>' to continue a session.")
+            else:
+                print("\nNo saved sessions yet. Sessions are saved when you open a contract.")
+            continue
+        
+        elif user_input.lower().startswith('resume '):
+            resumed = resume_session(session_store, user_input[7:].strip())
+            if resumed:
+                session = resumed
+                contract_path = session.contract_path
+                contract_name = session.contract_name
+                contract_text = session.contract_text
+                conversation_messages = session.messages
+                current_reasoning_tracker = None
+                if session.traces:
+                    last = session.traces[-1]
+                    current_reasoning_tracker = ReasoningTracker.from_trace(last["trace"], last["metrics_state"])
+            continue
           # Continue the conversation with previous context
         if conversation_messages:
             # Add the new user message to existing conversation
             conversation_messages.append({"role": "user", "content": user_input})
             conversation_messages, current_reasoning_tracker = run_agent_with_history(conversation_messages)
+            if session:
+                save_turn(session_store, session, conversation_messages, current_reasoning_tracker)
         else:
             # First interaction without a contract
             print("\n❓ No contract loaded. Please use 'list' to see available contracts or 'open <contract_name>' to load a contract.")
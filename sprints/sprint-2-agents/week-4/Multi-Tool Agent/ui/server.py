@@ -0,0 +1,328 @@
+"""
+HTTP service for the Legal Contract Analysis Tool.
+Serves contract reviews and follow-up questions per session, streaming the
+agent's events as server-sent events. Agent runs are limited per tenant
+(X-Tenant-ID header), PDFs are parsed in a process pool, and sessions are
+saved with the same store as the CLI. Idle sessions are saved and evicted
+from memory, and reloaded from the store on their next request.
+
+Run with `python app.py --serve` or `uvicorn ui.server:app`.
+"""
+import asyncio
+import base64
+import binascii
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, Awaitable, Callable, Tuple
+
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from config.llm_config import (
+    SERVICE_AGENT_THREADS, SERVICE_PDF_WORKERS, TENANT_MAX_CONCURRENT_RUNS,
+    TENANT_QUEUE_TIMEOUT_SECONDS, MAX_UPLOAD_BYTES, SERVICE_MAX_SESSIONS, SERVICE_SESSION_IDLE_SECONDS
+)
+from core.agent import run_agent, run_agent_with_history, list_available_contracts, contract_analysis_prompt
+from core.events import AgentEvent, CallbackEventSink, EventSink, use_sink
+from core.session import Session, SessionStore
+from core.triage import triage_contract
+from tools.document_tools import read_pdf, read_contract_bytes
+
+CONTRACTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "docs", "contracts")
+
+class OpenContractRequest(BaseModel):
+    """A contract from docs/contracts (`contract_name`) or an upload (`filename` + `content_base64`)."""
+    contract_name: Optional[str] = None
+    filename: Optional[str] = None
+    content_base64: Optional[str] = None
+
+class MessageRequest(BaseModel):
+    """A follow-up question in an open session."""
+    content: str
+
+class ServiceState:
+    """Worker pools, per-tenant limits and the sessions currently in memory.
+
+    At most `max_sessions` sessions stay in memory, least recently used first
+    out, and sessions idle for `idle_seconds` are evicted too. Evicted sessions
+    are saved to the store. Locks and tenant slots exist only while in use.
+    """
+
+    def __init__(self, store: SessionStore, max_sessions: int = SERVICE_MAX_SESSIONS,
+                 idle_seconds: float = SERVICE_SESSION_IDLE_SECONDS):
+        self.store = store
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.agent_pool = ThreadPoolExecutor(max_workers=SERVICE_AGENT_THREADS, thread_name_prefix="agent")
+        self.pdf_pool = ProcessPoolExecutor(max_workers=SERVICE_PDF_WORKERS)
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.last_used: Dict[str, float] = {}
+        self.session_locks: Dict[str, asyncio.Lock] = {}
+        self.tenant_slots: Dict[str, asyncio.Semaphore] = {}
+        self.tenant_users: Dict[str, int] = {}  # runs holding or waiting for each tenant's slots
+        self.runs = set()  # running tasks, referenced until they finish
+
+    def shutdown(self):
+        self.agent_pool.shutdown(wait=True)
+        self.pdf_pool.shutdown(wait=True)
+
+    def add_session(self, session: Session):
+        """Keep `session` in memory as the most recently used one, evicting idle sessions."""
+        self.sessions[session.session_id] = session
+        self.touch(session.session_id)
+        self.evict()
+
+    def touch(self, session_id: str):
+        self.sessions.move_to_end(session_id)
+        self.last_used[session_id] = time.monotonic()
+
+    def evict(self):
+        """Save and drop sessions over the limit or idle too long, skipping ones with a run in progress."""
+        now = time.monotonic()
+        loop = asyncio.get_running_loop()
+        for session_id in list(self.sessions):
+            over_limit = len(self.sessions) > self.max_sessions
+            if not over_limit and now - self.last_used[session_id] < self.idle_seconds:
+                break  # the rest were used more recently
+            lock = self.session_locks.get(session_id)
+            if lock is not None and lock.locked():
+                continue
+            session = self.sessions.pop(session_id)
+            del self.last_used[session_id]
+            self.session_locks.pop(session_id, None)
+            loop.run_in_executor(self.agent_pool, self.store.save, session)
+
+    async def get_session(self, tenant: str, session_id: str) -> Session:
+        """Return a session owned by `tenant`, loading it from the store if needed."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            loop = asyncio.get_running_loop()
+            try:
+                session = await loop.run_in_executor(self.agent_pool, self.store.load, session_id)
+            except FileNotFoundError:
+                raise HTTPException(status_code=404, detail="Session not found")
+            if session.tenant != tenant:
+                raise HTTPException(status_code=404, detail="Session not found")
+            # Another request may have loaded it meanwhile; keep a single copy
+            session = self.sessions.get(session_id) or session
+            session.restore_clauses()
+            self.add_session(session)
+        elif session.tenant != tenant:
+            raise HTTPException(status_code=404, detail="Session not found")
+        else:
+            self.touch(session_id)
+        return session
+
+    async def acquire_run(self, tenant: str, session_id: str) -> Callable[[], None]:
+        """Reserve a run slot for the tenant and the session; returns the release function."""
+        lock = self.session_locks.setdefault(session_id, asyncio.Lock())
+        if lock.locked():
+            raise HTTPException(status_code=409, detail="Session is busy with another request")
+        await lock.acquire()
+
+        slots = self.tenant_slots.setdefault(tenant, asyncio.Semaphore(TENANT_MAX_CONCURRENT_RUNS))
+        self.tenant_users[tenant] = self.tenant_users.get(tenant, 0) + 1
+
+        def leave_tenant():
+            self.tenant_users[tenant] -= 1
+            if not self.tenant_users[tenant]:
+                del self.tenant_users[tenant]
+                del self.tenant_slots[tenant]
+
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=TENANT_QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            leave_tenant()
+            lock.release()
+            raise HTTPException(status_code=429, detail="Too many concurrent runs for this tenant")
+
+        def release():
+            slots.release()
+            leave_tenant()
+            lock.release()
+            if session_id in self.sessions:
+                self.touch(session_id)
+        return release
+
+# -------------------------
+# Streaming runs
+# -------------------------
+
+def _sse(event: AgentEvent) -> str:
+    return f"event: {event.type}\ndata: {json.dumps(event.to_dict(), ensure_ascii=False, default=str)}\n\n"
+
+async def _start_run(state: ServiceState, session: Session, release: Callable[[], None],
+                     work: Callable[[EventSink], Awaitable[Tuple[list, Any]]], stream: bool):
+    """Run `work` as a background task and return its events as SSE (or JSON when not streaming).
+
+    The run continues and the session is saved even if the client disconnects.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    sink = CallbackEventSink(lambda event: loop.call_soon_threadsafe(queue.put_nowait, event))
+
+    async def runner():
+        try:
+            messages, tracker = await work(sink)
+            session.record_turn(messages, tracker)
+            await loop.run_in_executor(state.agent_pool, state.store.save, session)
+            final = next((m for m in reversed(messages) if m.get("role") == "assistant" and m.get("content")), None)
+            queue.put_nowait(AgentEvent("done", {
+                "session_id": session.session_id,
+                "answer": final["content"] if final else "",
+                "metrics": tracker.metrics.summary()
+            }))
+        except Exception as e:
+            queue.put_nowait(AgentEvent("error", {"message": f"{type(e).__name__}: {e}"}))
+        finally:
+            release()
+            queue.put_nowait(None)
+
+    task = asyncio.create_task(runner())
+    state.runs.add(task)
+    task.add_done_callback(state.runs.discard)
+
+    async def events():
+        while True:
+            event = await queue.get()
+            if event is None:
+                return
+            yield event
+
+    if stream:
+        async def body():
+            async for event in events():
+                yield _sse(event)
+        return StreamingResponse(body(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+    return {"session_id": session.session_id, "events": [event.to_dict() async for event in events()]}
+
+# -------------------------
+# App
+# -------------------------
+
+def create_app(store: Optional[SessionStore] = None) -> FastAPI:
+    """Build the service; `store` defaults to the CLI's session directory."""
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        app.state.service = ServiceState(store or SessionStore())
+        yield
+        app.state.service.shutdown()
+
+    app = FastAPI(title="Legal Contract Analysis Service", lifespan=lifespan)
+
+    def service() -> ServiceState:
+        return app.state.service
+
+    @app.get("/health")
+    async def health():
+        state = service()
+        return {"status": "ok", "active_runs": len(state.runs), "sessions_in_memory": len(state.sessions)}
+
+    @app.get("/contracts")
+    async def contracts():
+        return {"contracts": list_available_contracts()}
+
+    @app.post("/sessions", status_code=201)
+    async def create_session(x_tenant_id: str = Header("default")):
+        state = service()
+        session = Session.new(tenant=x_tenant_id)
+        state.add_session(session)
+        await asyncio.get_running_loop().run_in_executor(state.agent_pool, state.store.save, session)
+        return {"session_id": session.session_id}
+
+    @app.get("/sessions")
+    async def list_sessions(x_tenant_id: str = Header("default")):
+        state = service()
+        sessions = await asyncio.get_running_loop().run_in_executor(state.agent_pool, state.store.list_sessions)
+        return {"sessions": [s for s in sessions if s["tenant"] == x_tenant_id]}
+
+    @app.get("/sessions/{session_id}")
+    async def get_session(session_id: str, x_tenant_id: str = Header("default")):
+        session = await service().get_session(x_tenant_id, session_id)
+        return {
+            "session_id": session.session_id,
+            "contract_name": session.contract_name,
+            "turns": len(session.traces),
+            "messages": [m for m in session.messages if m.get("role") in ("user", "assistant") and m.get("content")],
+            "notes": session.notes,
+            "metrics": session.traces[-1]["trace"]["metrics"] if session.traces else None,
+            "updated": session.updated
+        }
+
+    @app.post("/sessions/{session_id}/contract")
+    async def open_contract(session_id: str, request: OpenContractRequest, stream: bool = True,
+                            x_tenant_id: str = Header("default")):
+        """Load a contract into the session and stream its initial review."""
+        state = service()
+        session = await state.get_session(x_tenant_id, session_id)
+
+        if request.contract_name:
+            name = os.path.basename(request.contract_name)
+            path = os.path.join(CONTRACTS_DIR, name)
+            if not os.path.exists(path):
+                raise HTTPException(status_code=404, detail=f"Contract not found: {name}")
+            parse, parse_args = read_pdf, (path,)
+        elif request.filename and request.content_base64:
+            if len(request.content_base64) * 3 // 4 > MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail="Contract is too large")
+            try:
+                data = base64.b64decode(request.content_base64, validate=True)
+            except binascii.Error:
+                raise HTTPException(status_code=400, detail="content_base64 is not valid base64")
+            name, path = os.path.basename(request.filename), None
+            parse, parse_args = read_contract_bytes, (name, data)
+        else:
+            raise HTTPException(status_code=400, detail="Provide contract_name, or filename and content_base64")
+
+        release = await state.acquire_run(x_tenant_id, session_id)
+
+        async def work(sink: EventSink):
+            loop = asyncio.get_running_loop()
+            text = await loop.run_in_executor(state.pdf_pool, parse, *parse_args)
+            if text.startswith("Error reading file"):
+                raise ValueError(text)
+            sink.emit(AgentEvent("document", {"contract_name": name, "characters": len(text)}))
+
+            def run():
+                # Keep the triaged clauses from this run; the shared clause store may drop them
+                result = triage_contract(text)
+                with use_sink(sink):
+                    messages, tracker = run_agent(contract_analysis_prompt(name, text, result))
+                session.set_contract(path, text, result.document_id, [c.model_dump() for c in result.clauses],
+                                     name=name)
+                return messages, tracker
+            return await loop.run_in_executor(state.agent_pool, run)
+
+        return await _start_run(state, session, release, work, stream)
+
+    @app.post("/sessions/{session_id}/messages")
+    async def post_message(session_id: str, request: MessageRequest, stream: bool = True,
+                           x_tenant_id: str = Header("default")):
+        """Ask a follow-up question and stream the answer."""
+        state = service()
+        session = await state.get_session(x_tenant_id, session_id)
+        if not session.contract_text:
+            raise HTTPException(status_code=409, detail="Open a contract in this session first")
+
+        release = await state.acquire_run(x_tenant_id, session_id)
+
+        async def work(sink: EventSink):
+            def run():
+                # Other sessions' contracts may have pushed this one out of the shared clause store
+                session.restore_clauses()
+                messages = list(session.messages) + [{"role": "user", "content": request.content}]
+                with use_sink(sink):
+                    return run_agent_with_history(messages)
+            return await asyncio.get_running_loop().run_in_executor(state.agent_pool, run)
+
+        return await _start_run(state, session, release, work, stream)
+
+    return app
+
+app = create_app()